@@ -49,7 +49,9 @@ License: MIT
 
 import os
 import sys
+import abc
 import json
+import copy
 import asyncio
 import argparse
 import logging
@@ -58,15 +60,25 @@ import subprocess
 import tempfile
 import shutil
 import re
+import random
 import signal
+import socket
 import hashlib
+import zlib
+import mmap
+import fcntl
+import shlex
+import math
+import heapq
+import statistics
 import traceback
 import uuid
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any, Set, Union, AsyncIterator
+from typing import Dict, List, Optional, Tuple, Any, Set, Union, AsyncIterator, Callable
 from dataclasses import dataclass, field, asdict
+from types import SimpleNamespace
 from datetime import datetime, timedelta
-from collections import defaultdict, Counter
+from collections import defaultdict, Counter, deque
 from contextlib import contextmanager, asynccontextmanager
 from enum import Enum, auto
 
@@ -116,6 +128,14 @@ except ImportError:
     print("Warning: aiofiles not installed. Install with: pip install aiofiles")
     aiofiles = None
 
+# Optional vectorised math for near-duplicate detection and scoring
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    np = None
+    NUMPY_AVAILABLE = False
+
 # Initialize Rich console for beautiful output
 console = Console()
 
@@ -132,6 +152,13 @@ TOKEN_COSTS = {
     "claude-3-opus-20240229": {"input": 15.00, "output": 75.00},
 }
 
+# Prompt caching price multipliers relative to the base input rate
+PROMPT_CACHE_WRITE_MULTIPLIER = 1.25
+PROMPT_CACHE_READ_MULTIPLIER = 0.10
+
+# Message Batches requests are billed at half the standard rate
+BATCH_PRICE_MULTIPLIER = 0.5
+
 # Default models for different tasks
 DEFAULT_ANALYZER_MODEL = "claude-opus-4-20250514"  # Best for complex analysis
 DEFAULT_EXECUTOR_MODEL = "claude-opus-4-20250514"  # Best for code generation
@@ -141,6 +168,80 @@ DEFAULT_RESEARCH_MODEL = "claude-sonnet-4-20250514"  # Good balance for research
 MAX_RETRIES = 3
 RETRY_DELAY = 2.0  # seconds
 
+# API rate limiting shared by every Anthropic call in the process (0 disables a budget)
+API_REQUESTS_PER_MINUTE = 50
+API_TOKENS_PER_MINUTE = 40_000  # Estimated input tokens
+API_MAX_RETRY_DELAY = 60.0  # seconds
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504, 529}
+
+# Concurrent npm installs for --auto-install-mcp
+MCP_INSTALL_CONCURRENCY = 3
+
+# MCP server warm-up (--mcp-warmup)
+MCP_WARMUP_CONCURRENCY = 4
+MCP_WARMUP_TIMEOUT = 120.0  # seconds for a cold start, including npx download
+MCP_WARMUP_MAX_START = 10.0  # Drop servers whose warm start exceeds this many seconds
+MCP_PROTOCOL_VERSION = "2024-11-05"
+MCP_MESSAGE_LIMIT = 64 * 1024 * 1024  # Longest JSON-RPC line read from a server or client
+
+# Research scheduling configuration
+RESEARCH_MAX_CONCURRENCY = 6  # In-flight research agent calls
+RESEARCH_AGENT_TIMEOUT = 120.0  # seconds per agent call
+RESEARCH_COVERAGE_CONFIDENCE = 0.0  # Combined confidence at which a query is covered (0 disables, e.g. 0.95)
+RESEARCH_COVERAGE_ITEMS = 15  # Distinct findings required before a query is covered
+RESEARCH_COVERAGE_MIN_AGENTS = 2  # Agents that must answer before a query can be covered
+RESEARCH_AGENT_CONFIDENCE_CAP = 0.7  # Self-reported agent confidence counts at most this much
+RESEARCH_HEDGE_PERCENTILE = 0.0  # Hedge jobs slower than this latency percentile (0 disables, e.g. 90)
+RESEARCH_HEDGE_MODEL = "claude-3-5-haiku-20241022"
+RESEARCH_HEDGE_MIN_SAMPLES = 3  # Completed jobs needed before hedging
+RESEARCH_SCHEDULER_TICK = 1.0  # seconds between hedge checks
+
+# Queries assigned to the same agent are merged into one call
+RESEARCH_MAX_QUERIES_PER_CALL = 4
+RESEARCH_MAX_TOKENS_PER_QUERY = 4096
+RESEARCH_MAX_OUTPUT_TOKENS = 16384
+
+# Shared research prompt prefix, sent behind a prompt cache marker
+RESEARCH_PREFIX_SPEC_TOKENS = 1500  # Specification excerpt included in the prefix
+PROMPT_CACHE_MIN_TOKENS = 1024  # Shorter prefixes are not cached by the API, so no marker is sent
+
+# Two-level research synthesis: per-query summaries, then one merge call
+SYNTHESIS_SUMMARY_MODEL = "claude-3-5-haiku-20241022"
+SYNTHESIS_SUMMARY_INPUT_BUDGET = 6000  # tokens per summary prompt
+SYNTHESIS_SUMMARY_MAX_TOKENS = 1024
+SYNTHESIS_MERGE_INPUT_BUDGET = 8000  # tokens for the merge prompt
+SYNTHESIS_MERGE_MAX_TOKENS = 4096
+
+# Near-duplicate collapsing of research findings
+RESEARCH_DEDUP_THRESHOLD = 0.5  # Estimated Jaccard similarity of word shingles
+
+# Phases whose dependencies are met may run concurrently in git worktrees (1 keeps serial execution)
+MAX_PARALLEL_PHASES = 1
+
+# Tasks of a phase may run in concurrent sessions with disjoint write leases (1 keeps one session per phase)
+MAX_PARALLEL_TASK_GROUPS = 1
+
+# Watchdog for Claude Code sessions (0 disables a limit)
+PHASE_TIMEOUT = 1800  # Wall-clock seconds per session
+PHASE_IDLE_TIMEOUT = 900  # Seconds without stream output; above the 600s ceiling of a single Bash tool call
+PHASE_KILL_GRACE = 10  # Seconds between SIGTERM and SIGKILL
+
+# Phase duration estimates for the execution plan
+PHASE_SECONDS_PER_TASK = 25  # Used for phases without recorded durations
+PHASE_HISTORY_BUILDS = 5  # Recent .analytics build stats consulted
+
+# Specification excerpt budget for phases after phase 1 (about 2000 characters)
+SPEC_CONTEXT_TOKENS = 500
+
+# Message Batches polling for --research-batch
+RESEARCH_BATCH_POLL_INTERVAL = 30.0  # seconds
+RESEARCH_BATCH_DEADLINE = 3600.0  # seconds before unfinished requests fall back to direct calls (0 waits for the batch)
+
+# Shared on-disk cache shared by all builds on this host
+BUILDER_CACHE_DIR = Path(os.environ.get("CLAUDE_CODE_BUILDER_CACHE", "~/.cache/claude-code-builder")).expanduser()
+RESEARCH_CACHE_TTL_HOURS = 24 * 7  # One week
+RESEARCH_CACHE_MAX_MB = 100.0
+
 # Enhanced MCP Server Registry with v2.3 improvements
 MCP_SERVER_REGISTRY = {
     # Core MCP Servers - Essential for most projects
@@ -269,6 +370,55 @@ MCP_SERVER_REGISTRY = {
     }
 }
 
+# Recommendation scoring: registry package name fragment -> technologies it serves ("*" matches every project)
+MCP_TECH_MAPPINGS = {
+    "postgres": ["database", "postgresql", "sql"],
+    "sqlite": ["database", "sqlite", "sql"],
+    "mongodb": ["database", "mongodb", "nosql"],
+    "redis": ["database", "redis", "cache"],
+    "git": ["git", "version control"],
+    "github": ["git", "github", "ci/cd"],
+    "web": ["api", "frontend", "web", "testing"],
+    "filesystem": ["*"],
+    "memory": ["*"],
+    "sequential-thinking": ["*"],
+    "context7": ["*"]  # Documentation for every project
+}
+
+# Requirement -> keywords looked for in a server's use cases and tools
+MCP_REQUIREMENT_MAPPINGS = {
+    "database": ["database", "data", "storage", "query", "schema"],
+    "api": ["api", "service", "endpoint", "integration"],
+    "authentication": ["auth", "security", "user", "permission"],
+    "testing": ["test", "validation", "quality", "automation"],
+    "deployment": ["deploy", "release", "production", "ci_cd"],
+    "monitoring": ["monitor", "log", "metric", "observability", "tracking"],
+    "collaboration": ["team", "share", "collaborate", "workflow"],
+    "documentation": ["doc", "guide", "help", "reference"],
+    "realtime": ["realtime", "live", "push", "websocket", "streaming"],
+    "scalability": ["scale", "performance", "optimize", "concurrent"],
+    "security": ["security", "encrypt", "protect", "firewall"],
+    "backup": ["backup", "restore", "recovery"],
+    "integration": ["integrate", "connect", "sync", "webhook"]
+}
+
+# Project type -> server categories that suit it (unknown types match core servers)
+MCP_PROJECT_TYPE_CATEGORIES = {
+    "web_application": ["core", "development", "database", "external", "documentation"],
+    "api_service": ["core", "development", "database", "external", "documentation"],
+    "cli_tool": ["core", "development", "documentation"],
+    "data_pipeline": ["database", "core", "external"],
+    "ml_system": ["database", "core", "external", "documentation"],
+    "mobile_app": ["development", "external", "database"],
+    "desktop_app": ["development", "core", "database"],
+    "library": ["core", "development", "documentation"],
+    "automation": ["external", "communication", "core"],
+    "game": ["core", "development"],
+    "iot": ["core", "external", "database"],
+    "blockchain": ["core", "database", "external"],
+    "general": ["core", "documentation"]
+}
+
 class BuildStatus(Enum):
     """Enumeration for build phase status"""
     PENDING = auto()
@@ -441,6 +591,10 @@ class BuildStats:
     # Performance metrics (new in v2.3)
     phase_durations: Dict[str, float] = field(default_factory=dict)
     tool_durations: Dict[str, List[float]] = field(default_factory=lambda: defaultdict(list))
+    mcp_install_durations: Dict[str, float] = field(default_factory=dict)
+    mcp_start_times: Dict[str, Dict[str, Any]] = field(default_factory=dict)
+    phase_task_groups: Dict[str, int] = field(default_factory=dict)
+    phase_timeouts: Dict[str, str] = field(default_factory=dict)
     
     # Active tool tracking
     active_tool_calls: Dict[str, ToolCall] = field(default_factory=dict)
@@ -591,6 +745,10 @@ class BuildStats:
             },
             "performance": {
                 "phase_durations": {k: f"{v:.1f}s" for k, v in self.phase_durations.items()},
+                "mcp_install_durations": {k: f"{v:.1f}s" for k, v in self.mcp_install_durations.items()},
+                "mcp_start_times": self.mcp_start_times,
+                "phase_task_groups": self.phase_task_groups,
+                "phase_timeouts": self.phase_timeouts,
                 "total_tool_time": sum(sum(d) for d in self.tool_durations.values())
             }
         }
@@ -603,36 +761,51 @@ class CostTracker:
     """
     total_input_tokens: int = 0
     total_output_tokens: int = 0
+    total_cache_write_tokens: int = 0
+    total_cache_read_tokens: int = 0
     total_cost: float = 0.0
     claude_code_cost: float = 0.0  # New in v2.3
     research_cost: float = 0.0  # New in v2.3
+    batch_cost: float = 0.0
     phase_costs: Dict[str, float] = field(default_factory=dict)
     phase_tokens: Dict[str, Dict[str, int]] = field(default_factory=dict)
-    model_usage: Dict[str, Dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: {"input": 0, "output": 0}))
+    model_usage: Dict[str, Dict[str, int]] = field(default_factory=lambda: defaultdict(lambda: {"input": 0, "output": 0, "cache_write": 0, "cache_read": 0}))
     claude_code_sessions: List[Dict[str, Any]] = field(default_factory=list)  # New in v2.3
+    model_costs: Dict[str, float] = field(default_factory=lambda: defaultdict(float))
     
-    def add_tokens(self, input_tokens: int, output_tokens: int, model: str, phase: str = "general"):
+    def add_tokens(self, input_tokens: int, output_tokens: int, model: str, phase: str = "general",
+                   cache_write_tokens: int = 0, cache_read_tokens: int = 0, batch: bool = False):
         """Add tokens and calculate cost for a specific model and phase"""
         self.total_input_tokens += input_tokens
         self.total_output_tokens += output_tokens
+        self.total_cache_write_tokens += cache_write_tokens
+        self.total_cache_read_tokens += cache_read_tokens
         
         # Track per-phase tokens
         if phase not in self.phase_tokens:
             self.phase_tokens[phase] = {"input": 0, "output": 0}
         self.phase_tokens[phase]["input"] += input_tokens
         self.phase_tokens[phase]["output"] += output_tokens
+        if cache_write_tokens or cache_read_tokens:
+            self.phase_tokens[phase]["cache_write"] = self.phase_tokens[phase].get("cache_write", 0) + cache_write_tokens
+            self.phase_tokens[phase]["cache_read"] = self.phase_tokens[phase].get("cache_read", 0) + cache_read_tokens
         
         # Track per-model usage
-        self.model_usage[model]["input"] += input_tokens
-        self.model_usage[model]["output"] += output_tokens
+        usage = self.model_usage[model]
+        usage["input"] += input_tokens
+        usage["output"] += output_tokens
+        usage["cache_write"] = usage.get("cache_write", 0) + cache_write_tokens
+        usage["cache_read"] = usage.get("cache_read", 0) + cache_read_tokens
         
         # Calculate cost
         if model in TOKEN_COSTS:
-            input_cost = (input_tokens / 1_000_000) * TOKEN_COSTS[model]["input"]
-            output_cost = (output_tokens / 1_000_000) * TOKEN_COSTS[model]["output"]
-            phase_cost = input_cost + output_cost
+            phase_cost = self._calculate_cost(model, input_tokens, output_tokens,
+                                              cache_write_tokens, cache_read_tokens, batch)
             
             self.total_cost += phase_cost
+            self.model_costs[model] += phase_cost
+            if batch:
+                self.batch_cost += phase_cost
             if phase not in self.phase_costs:
                 self.phase_costs[phase] = 0.0
             self.phase_costs[phase] += phase_cost
@@ -641,10 +814,31 @@ class CostTracker:
             if "research" in phase.lower():
                 self.research_cost += phase_cost
     
-    def add_usage(self, usage: 'Usage', model: str, phase: str = "general"):
+    @staticmethod
+    def _calculate_cost(model: str, input_tokens: int, output_tokens: int,
+                        cache_write_tokens: int = 0, cache_read_tokens: int = 0,
+                        batch: bool = False) -> float:
+        """Calculate cost including prompt cache writes and reads"""
+        rates = TOKEN_COSTS[model]
+        input_cost = (input_tokens / 1_000_000) * rates["input"]
+        cache_write_cost = (cache_write_tokens / 1_000_000) * rates["input"] * PROMPT_CACHE_WRITE_MULTIPLIER
+        cache_read_cost = (cache_read_tokens / 1_000_000) * rates["input"] * PROMPT_CACHE_READ_MULTIPLIER
+        output_cost = (output_tokens / 1_000_000) * rates["output"]
+        cost = input_cost + cache_write_cost + cache_read_cost + output_cost
+        return cost * BATCH_PRICE_MULTIPLIER if batch else cost
+    
+    def add_usage(self, usage: 'Usage', model: str, phase: str = "general", batch: bool = False):
         """Add tokens from Anthropic Usage object"""
         if usage:
-            self.add_tokens(usage.input_tokens, usage.output_tokens, model, phase)
+            self.add_tokens(
+                usage.input_tokens,
+                usage.output_tokens,
+                model,
+                phase,
+                cache_write_tokens=getattr(usage, 'cache_creation_input_tokens', None) or 0,
+                cache_read_tokens=getattr(usage, 'cache_read_input_tokens', None) or 0,
+                batch=batch
+            )
     
     def add_claude_code_cost(self, cost: float, session_data: Dict[str, Any]):
         """Add Claude Code execution cost with session tracking"""
@@ -678,14 +872,18 @@ class CostTracker:
         return {
             "total_input_tokens": self.total_input_tokens,
             "total_output_tokens": self.total_output_tokens,
+            "total_cache_write_tokens": self.total_cache_write_tokens,
+            "total_cache_read_tokens": self.total_cache_read_tokens,
             "total_tokens": self.total_input_tokens + self.total_output_tokens,
             "total_cost": round(self.total_cost, 2),
             "claude_code_cost": round(self.claude_code_cost, 2),
             "research_cost": round(self.research_cost, 2),
+            "batch_cost": round(self.batch_cost, 2),
             "analysis_cost": round(self.total_cost - self.claude_code_cost - self.research_cost, 2),
             "phase_costs": {k: round(v, 2) for k, v in self.phase_costs.items()},
             "phase_tokens": self.phase_tokens,
             "model_usage": dict(self.model_usage),
+            "model_costs": dict(self.model_costs),
             "claude_code_sessions": len(self.claude_code_sessions),
             "avg_claude_code_cost": round(avg_claude_code_cost, 4),
             "average_cost_per_phase": round(self.total_cost / max(len(self.phase_costs), 1), 2)
@@ -696,16 +894,25 @@ class CostTracker:
         breakdown = []
         for model, usage in self.model_usage.items():
             if model in TOKEN_COSTS:
-                input_cost = (usage["input"] / 1_000_000) * TOKEN_COSTS[model]["input"]
-                output_cost = (usage["output"] / 1_000_000) * TOKEN_COSTS[model]["output"]
-                total_cost = input_cost + output_cost
+                cache_write = usage.get("cache_write", 0)
+                cache_read = usage.get("cache_read", 0)
+                standard_cost = self._calculate_cost(model, usage["input"], usage["output"], cache_write, cache_read)
+                
+                # Prefer the accumulated cost, which reflects batch pricing
+                total_cost = self.model_costs.get(model, standard_cost)
+                
+                # Savings versus sending every cached token at the full input rate
+                uncached_cost = self._calculate_cost(model, usage["input"] + cache_write + cache_read, usage["output"])
                 
                 breakdown.append({
                     "model": model,
                     "input_tokens": usage["input"],
                     "output_tokens": usage["output"],
-                    "total_tokens": usage["input"] + usage["output"],
-                    "cost": round(total_cost, 2)
+                    "cache_write_tokens": cache_write,
+                    "cache_read_tokens": cache_read,
+                    "total_tokens": usage["input"] + usage["output"] + cache_write + cache_read,
+                    "cost": round(total_cost, 2),
+                    "cache_savings": round(uncached_cost - standard_cost, 4)
                 })
         
         # Add Claude Code as a separate entry
@@ -743,6 +950,9 @@ class Phase:
     tool_calls: List[str] = field(default_factory=list)  # Tool call IDs
     context: Dict[str, Any] = field(default_factory=dict)  # New in v2.3
     validation_results: Dict[str, bool] = field(default_factory=dict)  # New in v2.3
+    timeout_reason: Optional[str] = None
+    session_id: Optional[str] = None  # Latest Claude Code session, resumed on retry
+    attempts: List[Dict[str, Any]] = field(default_factory=list)
     
     @property
     def duration(self) -> Optional[timedelta]:
@@ -802,7 +1012,10 @@ class Phase:
             "messages": self.messages,
             "tool_calls": self.tool_calls,
             "context": self.context,
-            "validation_results": self.validation_results
+            "validation_results": self.validation_results,
+            "timeout_reason": self.timeout_reason,
+            "session_id": self.session_id,
+            "attempts": self.attempts
         }
     
     @classmethod
@@ -848,6 +1061,7 @@ class ProjectMemory:
     updated_at: datetime = field(default_factory=datetime.now)
     phase_contexts: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # New in v2.3
     error_log: List[Dict[str, Any]] = field(default_factory=list)  # New in v2.3
+    _phase_index: Dict[str, Phase] = field(default_factory=dict, init=False, repr=False, compare=False)
     
     def to_json(self) -> str:
         """Convert to JSON for storage"""
@@ -921,7 +1135,12 @@ class ProjectMemory:
     
     def get_phase_by_id(self, phase_id: str) -> Optional[Phase]:
         """Get phase by ID"""
-        return next((p for p in self.phases if p.id == phase_id), None)
+        phase = self._phase_index.get(phase_id)
+        if phase is None or len(self._phase_index) != len(self.phases):
+            # Phases were added or replaced since the index was built
+            self._phase_index = {p.id: p for p in self.phases}
+            phase = self._phase_index.get(phase_id)
+        return phase
     
     def get_accumulated_context(self, up_to_phase: str) -> Dict[str, Any]:
         """Get accumulated context up to a specific phase"""
@@ -936,6 +1155,377 @@ class ProjectMemory:
         
         return accumulated
 
+@dataclass
+class PhasePlanEstimate:
+    """Schedule estimate for a phase plan, in seconds"""
+    durations: Dict[str, float]
+    earliest_start: Dict[str, float]
+    critical_path: List[str]
+    critical_path_seconds: float
+    serial_seconds: float
+    makespan: float
+    max_parallel: int
+
+class PhasePlanGraph:
+    """
+    Dependency graph of a phase plan with an id index. Orders phases with
+    Kahn's algorithm in O(V + E), breaking cycles by dropping the edges that
+    close them, and estimates earliest starts, the critical path and the
+    makespan from per-phase durations. Repeated phase ids get a numeric
+    suffix so no phase is lost; dependencies keep pointing at the first.
+    """
+    
+    def __init__(self, phases: List[Phase]):
+        self.index: Dict[str, Phase] = {}
+        self.renamed_ids: List[Tuple[str, str]] = []
+        for phase in phases:
+            if phase.id in self.index:
+                original, suffix = phase.id, 2
+                while f"{original}-{suffix}" in self.index:
+                    suffix += 1
+                phase.id = f"{original}-{suffix}"
+                self.renamed_ids.append((original, phase.id))
+            self.index[phase.id] = phase
+        self.broken_edges: List[Tuple[str, str]] = []
+        self.missing_edges: List[Tuple[str, str]] = []
+        self.order = self._topological_order(phases)
+    
+    def get(self, phase_id: str) -> Optional[Phase]:
+        """Get phase by ID"""
+        return self.index.get(phase_id)
+    
+    def _topological_order(self, phases: List[Phase]) -> List[Phase]:
+        """Kahn's algorithm, preferring plan order among ready phases"""
+        nodes = list(self.index.values())
+        indegree: Dict[str, int] = {}
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for phase in nodes:
+            deps = []
+            for dep in dict.fromkeys(phase.dependencies):
+                if dep not in self.index or dep == phase.id:
+                    self.missing_edges.append((dep, phase.id))
+                    continue
+                deps.append(dep)
+                dependents[dep].append(phase.id)
+            phase.dependencies = deps
+            indegree[phase.id] = len(deps)
+        
+        ready = deque(phase.id for phase in nodes if indegree[phase.id] == 0)
+        order: List[Phase] = []
+        placed: Set[str] = set()
+        cursor = 0
+        while len(order) < len(nodes):
+            if not ready:
+                # Only cycles are left: release the earliest unplaced phase
+                while nodes[cursor].id in placed:
+                    cursor += 1
+                phase = nodes[cursor]
+                kept = []
+                for dep in phase.dependencies:
+                    if dep in placed:
+                        kept.append(dep)
+                    else:
+                        self.broken_edges.append((dep, phase.id))
+                        dependents[dep].remove(phase.id)
+                phase.dependencies = kept
+                indegree[phase.id] = 0
+                ready.append(phase.id)
+            
+            phase_id = ready.popleft()
+            placed.add(phase_id)
+            order.append(self.index[phase_id])
+            for dependent in dependents[phase_id]:
+                indegree[dependent] -= 1
+                if indegree[dependent] == 0:
+                    ready.append(dependent)
+        
+        return order
+    
+    def estimate(self, durations: Dict[str, float], max_parallel: int = 1) -> PhasePlanEstimate:
+        """Earliest starts, critical path and makespan for the given phase durations"""
+        durations = {phase.id: max(durations.get(phase.id, 0.0), 0.0) for phase in self.order}
+        earliest_start: Dict[str, float] = {}
+        finish: Dict[str, float] = {}
+        critical_parent: Dict[str, Optional[str]] = {}
+        for phase in self.order:
+            start, parent = 0.0, None
+            for dep in phase.dependencies:
+                if parent is None or finish[dep] > start:
+                    start, parent = finish[dep], dep
+            earliest_start[phase.id] = start
+            finish[phase.id] = start + durations[phase.id]
+            critical_parent[phase.id] = parent
+        
+        critical_path: List[str] = []
+        if finish:
+            node: Optional[str] = max(finish, key=finish.get)
+            while node is not None:
+                critical_path.append(node)
+                node = critical_parent[node]
+            critical_path.reverse()
+        critical_path_seconds = max(finish.values(), default=0.0)
+        
+        return PhasePlanEstimate(
+            durations=durations,
+            earliest_start=earliest_start,
+            critical_path=critical_path,
+            critical_path_seconds=critical_path_seconds,
+            serial_seconds=sum(durations.values()),
+            makespan=self._list_schedule(durations, max(max_parallel, 1)),
+            max_parallel=max(max_parallel, 1)
+        )
+    
+    def _list_schedule(self, durations: Dict[str, float], slots: int) -> float:
+        """Simulate running ready phases in plan order on a fixed number of slots"""
+        if slots == 1:
+            return sum(durations.values())
+        
+        position = {phase.id: i for i, phase in enumerate(self.order)}
+        waiting = {phase.id: len(phase.dependencies) for phase in self.order}
+        dependents: Dict[str, List[str]] = defaultdict(list)
+        for phase in self.order:
+            for dep in phase.dependencies:
+                dependents[dep].append(phase.id)
+        
+        ready = [position[phase_id] for phase_id, count in waiting.items() if count == 0]
+        heapq.heapify(ready)
+        running: List[Tuple[float, str]] = []
+        now = 0.0
+        while ready or running:
+            while ready and len(running) < slots:
+                phase_id = self.order[heapq.heappop(ready)].id
+                heapq.heappush(running, (now + durations[phase_id], phase_id))
+            now, phase_id = heapq.heappop(running)
+            for dependent in dependents[phase_id]:
+                waiting[dependent] -= 1
+                if waiting[dependent] == 0:
+                    heapq.heappush(ready, position[dependent])
+        return now
+
+def paths_overlap(a: str, b: str) -> bool:
+    """Whether one relative path is the other or lies inside it"""
+    return a == b or a.startswith(b + "/") or b.startswith(a + "/")
+
+class PathLeaseTable:
+    """
+    Write leases on path prefixes shared by concurrent Claude Code sessions.
+    The table is a JSON file guarded by flock; each session runs a PreToolUse
+    hook on the built-in and filesystem MCP write tools that rejects writes
+    under another session's lease and leases unclaimed paths to the first
+    session that writes them. Writes made by shell commands are not seen.
+    """
+    
+    HOOK_SCRIPT = (
+        "import fcntl, json, os, sys\n"
+        "event = json.load(sys.stdin)\n"
+        "tool_input = event.get('tool_input') or {}\n"
+        "root, owner = os.environ['CCB_LEASE_ROOT'], os.environ['CCB_LEASE_OWNER']\n"
+        "paths = []\n"
+        "for key in ('file_path', 'notebook_path', 'path', 'source', 'destination'):\n"
+        "    target = tool_input.get(key)\n"
+        "    if isinstance(target, str) and target:\n"
+        "        path = os.path.relpath(os.path.join(event.get('cwd') or root, target), root).replace(os.sep, '/')\n"
+        "        if path != '..' and not path.startswith('../'):\n"
+        "            paths.append(path)\n"
+        "if not paths:\n"
+        "    sys.exit(0)\n"
+        "with open(os.environ['CCB_LEASE_TABLE'], 'r+') as f:\n"
+        "    fcntl.flock(f, fcntl.LOCK_EX)\n"
+        "    table = json.load(f)\n"
+        "    leases = table['leases']\n"
+        "    for path in paths:\n"
+        "        for prefix, holder in leases.items():\n"
+        "            if holder != owner and (path == prefix or path.startswith(prefix + '/') or prefix.startswith(path + '/')):\n"
+        "                table['denied'].append([owner, path, holder])\n"
+        "                f.seek(0); json.dump(table, f); f.truncate()\n"
+        "                print(f'{path} belongs to task group {holder}, which is running concurrently. '\n"
+        "                      'Do not write it; mention what it needs in your final summary.', file=sys.stderr)\n"
+        "                sys.exit(2)\n"
+        "    for path in paths:\n"
+        "        if not any(h == owner and (path == p or path.startswith(p + '/')) for p, h in leases.items()):\n"
+        "            leases[path] = owner\n"
+        "    f.seek(0); json.dump(table, f); f.truncate()\n"
+    )
+    # Built-in edit tools and the filesystem MCP server's write tools
+    HOOK_MATCHER = (
+        "Write|Edit|MultiEdit|NotebookEdit|"
+        "mcp__filesystem__write_file|mcp__filesystem__edit_file|mcp__filesystem__move_file"
+    )
+    
+    def __init__(self, path: Path, root: Path):
+        self.path = path
+        self.root = root
+        self.settings_path = path.with_name(f"{path.stem}.settings.json")
+        with open(self.path, 'w') as f:
+            json.dump({"leases": {}, "denied": []}, f)
+        with open(self.settings_path, 'w') as f:
+            json.dump(self.settings(), f, indent=2)
+    
+    @contextmanager
+    def _locked(self):
+        with open(self.path, 'r+') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            table = json.load(f)
+            yield table
+            f.seek(0)
+            json.dump(table, f)
+            f.truncate()
+    
+    def grant(self, owner: str, prefixes: List[str]) -> List[str]:
+        """Lease prefixes to owner, returning those already held by someone else"""
+        conflicts = []
+        with self._locked() as table:
+            leases = table["leases"]
+            for prefix in prefixes:
+                holder = next((h for p, h in leases.items() if h != owner and paths_overlap(p, prefix)), None)
+                if holder:
+                    conflicts.append(prefix)
+                else:
+                    leases[prefix] = owner
+        return conflicts
+    
+    def release(self, owner: str):
+        """Drop every lease held by owner"""
+        with self._locked() as table:
+            table["leases"] = {p: h for p, h in table["leases"].items() if h != owner}
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Current leases and rejected writes"""
+        with open(self.path) as f:
+            return json.load(f)
+    
+    def held_by(self, owner: str) -> List[str]:
+        """Prefixes currently leased to owner"""
+        return sorted(p for p, h in self.snapshot()["leases"].items() if h == owner)
+    
+    def settings(self) -> Dict[str, Any]:
+        """Claude Code settings that install the lease hook"""
+        command = f"{shlex.quote(sys.executable)} -c {shlex.quote(self.HOOK_SCRIPT)}"
+        return {"hooks": {"PreToolUse": [{
+            "matcher": self.HOOK_MATCHER,
+            "hooks": [{"type": "command", "command": command}]
+        }]}}
+    
+    def environment(self, owner: str) -> Dict[str, str]:
+        """Environment variables the hook reads"""
+        return {
+            "CCB_LEASE_TABLE": str(self.path),
+            "CCB_LEASE_ROOT": str(self.root),
+            "CCB_LEASE_OWNER": owner
+        }
+
+class TaskGroupPartitioner:
+    """
+    Splits phase tasks into groups whose target paths do not overlap.
+    Targets are path-like tokens in the task text plus files from the
+    build manifest named in it; tasks sharing a target end up together,
+    and tasks without targets share one group.
+    """
+    
+    PATH_PATTERN = re.compile(
+        r"(?<![\w/.:-])((?:\.?[\w-]+/)+(?:[\w.-]*[\w])?/?|\.?[\w-]+(?:\.[\w-]+)*\.(?:"
+        r"py|pyi|js|jsx|mjs|cjs|ts|tsx|json|md|rst|txt|yml|yaml|toml|ini|cfg|env|html|css|scss|"
+        r"sql|sh|go|rs|java|kt|rb|php|cs|c|h|cpp|hpp|swift|vue|svelte|proto|graphql|lock|xml"
+        r")|\.[a-z][\w-]*(?:\.[\w-]+)*)(?![\w/-])"
+    )
+    WORD_PATTERN = re.compile(r"[\w.-]+")
+    COMMON_DIRS = {
+        "src", "lib", "app", "api", "tests", "test", "docs", "config", "scripts", "public",
+        "static", "assets", "components", "pages", "server", "client", "packages", "cmd",
+        "internal", "pkg", "migrations", "templates", "models", "routes", "services", "utils"
+    }
+    
+    def __init__(self, manifest: List[str], root: Path):
+        self.root = root
+        self.by_name: Dict[str, Set[str]] = defaultdict(set)
+        self.top_dirs = set(self.COMMON_DIRS)
+        if root.is_dir():
+            self.top_dirs.update(entry.name.lower() for entry in root.iterdir() if entry.is_dir())
+        for file_path in manifest:
+            relative = self.normalize(file_path)
+            if relative:
+                if "/" in relative:
+                    self.top_dirs.add(relative.split("/", 1)[0].lower())
+                name = relative.rsplit("/", 1)[-1].lower()
+                self.by_name[name].add(relative)
+                stem = name.split(".", 1)[0]
+                if len(stem) >= 4:
+                    self.by_name[stem].add(relative)
+    
+    def normalize(self, path: str) -> Optional[str]:
+        """Project-relative POSIX path, or None for paths outside the project"""
+        path = path.strip().strip("`'\"").rstrip(".,;:")
+        if os.path.isabs(path):
+            path = os.path.relpath(path, self.root)
+        path = os.path.normpath(path).replace(os.sep, "/")
+        if path in (".", "") or path == ".." or path.startswith("../"):
+            return None
+        return path
+    
+    def targets(self, task: str) -> Set[str]:
+        """Paths a task is expected to write"""
+        found = set()
+        for match in self.PATH_PATTERN.finditer(task):
+            token = match.group(1)
+            if "/" not in token and token[0].isupper() and token.lower().endswith(".js"):
+                continue  # Framework names such as Node.js
+            if (token.count("/") == 1 and "." not in token and
+                    token.split("/", 1)[0].lower() not in self.top_dirs):
+                continue  # Word pairs such as and/or or CI/CD
+            if "/" not in token and token.lower() in self.by_name:
+                continue  # Resolved against the manifest below
+            relative = self.normalize(token)
+            if relative:
+                found.add(relative)
+        for word in self.WORD_PATTERN.findall(task.lower()):
+            found.update(self.by_name.get(word.rstrip("."), ()))
+        return found
+    
+    def partition(self, tasks: List[str], max_groups: int) -> List[Tuple[List[int], List[str]]]:
+        """Task indices and lease prefixes per group, at most max_groups groups"""
+        parent = list(range(len(tasks)))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        task_targets = [self.targets(task) for task in tasks]
+        owners: List[Tuple[str, int]] = []
+        unscoped = []
+        for i, targets in enumerate(task_targets):
+            if not targets:
+                unscoped.append(i)
+                continue
+            for target in targets:
+                for other, j in owners:
+                    if paths_overlap(target, other):
+                        parent[find(i)] = find(j)
+                owners.append((target, i))
+        
+        components: Dict[int, List[int]] = defaultdict(list)
+        for i, targets in enumerate(task_targets):
+            if targets:
+                components[find(i)].append(i)
+        groups = sorted(components.values(), key=len, reverse=True)
+        if unscoped:
+            groups.append(unscoped)
+        
+        # Pack independent components into at most max_groups sessions, largest first
+        bins: List[Tuple[int, int, List[int]]] = [(0, b, []) for b in range(min(max_groups, len(groups)))]
+        for group in groups:
+            size, b, members = heapq.heappop(bins)
+            members.extend(group)
+            heapq.heappush(bins, (size + len(group), b, members))
+        
+        partitioned = []
+        for _, _, members in sorted(bins, key=lambda item: item[1]):
+            members.sort()
+            prefixes = sorted({target for i in members for target in task_targets[i]})
+            partitioned.append((members, prefixes))
+        return partitioned
+
 @dataclass
 class MCPRecommendation:
     """
@@ -972,6 +1562,31 @@ class ResearchQuery:
     def to_dict(self) -> Dict[str, Any]:
         return asdict(self)
 
+@dataclass
+class ResearchJob:
+    """
+    A single scheduled research call: one agent answering one or more queries.
+    """
+    agent_name: str
+    queries: List[ResearchQuery]
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    
+    @property
+    def query_ids(self) -> List[str]:
+        return [q.id for q in self.queries]
+    
+    @property
+    def job_id(self) -> str:
+        return f"{self.agent_name}:{'+'.join(self.query_ids)}"
+    
+    @property
+    def latency(self) -> Optional[float]:
+        """Wall-clock seconds spent in the agent call"""
+        if self.started_at is not None and self.finished_at is not None:
+            return self.finished_at - self.started_at
+        return None
+
 @dataclass
 class CustomInstruction:
     """
@@ -1030,16 +1645,1150 @@ class CustomInstruction:
                 return False
         return True
 
+class MCPInventory:
+    """
+    Shared snapshot of which registry MCP servers are installed.
+    A single `npm ls -g --json --depth=0` runs alongside one node process
+    that resolves every registry package, instead of per-package npm and
+    node subprocesses.
+    """
+    
+    NODE_RESOLVE_SCRIPT = (
+        "for (const p of JSON.parse(process.argv[1])) {"
+        " try { require.resolve(p); console.log(p); } catch (e) {} }"
+    )
+    
+    def __init__(self, registry: Optional[Dict[str, Dict[str, Any]]] = None, command_timeout: float = 30.0,
+                 cache_dir: Optional[Path] = None, force_refresh: bool = False):
+        self.registry = registry if registry is not None else MCP_SERVER_REGISTRY
+        self.command_timeout = command_timeout
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.force_refresh = force_refresh
+        self.global_packages: Dict[str, str] = {}  # package -> version
+        self.resolvable_packages: Set[str] = set()
+        self.scan_seconds = 0.0
+        self.from_cache = False
+        self._installed: Optional[Set[str]] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._cache_file: Optional[Path] = None
+    
+    async def get_installed(self, refresh: bool = False) -> Set[str]:
+        """Return installed server names, scanning once and sharing the answer"""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            refresh = refresh or self.force_refresh
+            self.force_refresh = False
+            if self._installed is None or refresh:
+                cache_key = await self._cache_key() if self.cache_dir else None
+                if cache_key and not refresh:
+                    self._installed = self._load_cached(cache_key)
+                if self._installed is None:
+                    self._installed = await self._scan()
+                    if cache_key:
+                        self._save_cached(cache_key)
+            return set(self._installed)
+    
+    def invalidate(self):
+        """Forget the snapshot, e.g. after installing packages"""
+        self._installed = None
+        if self._cache_file:
+            try:
+                self._cache_file.unlink()
+            except OSError:
+                pass
+    
+    async def _npm_global_prefix(self) -> Optional[str]:
+        """Resolve the npm global prefix, remembering it per npm binary and npmrc files"""
+        prefix = os.environ.get("npm_config_prefix") or os.environ.get("NPM_CONFIG_PREFIX")
+        if prefix:
+            return prefix
+        
+        npm_path = shutil.which("npm")
+        if not npm_path:
+            return None
+        
+        prefix_file = self.cache_dir / "npm_prefix.json"
+        prefix_key = self._npm_prefix_key(npm_path)
+        try:
+            with open(prefix_file, 'r') as f:
+                cached = json.load(f)
+            if cached.get("key") == prefix_key:
+                return cached["prefix"]
+        except (OSError, json.JSONDecodeError, KeyError):
+            pass
+        
+        returncode, output = await self._run(["npm", "prefix", "-g"])
+        prefix = output.strip()
+        if returncode != 0 or not prefix:
+            return None
+        
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            with open(prefix_file, 'w') as f:
+                json.dump({"key": prefix_key, "prefix": prefix}, f)
+        except OSError:
+            pass
+        return prefix
+    
+    @staticmethod
+    def _npm_prefix_key(npm_path: str) -> List[Any]:
+        """npm binary and npmrc files (user, project, global override) that can set the prefix"""
+        npmrc_files = [
+            os.environ.get("npm_config_userconfig") or os.environ.get("NPM_CONFIG_USERCONFIG")
+            or str(Path.home() / ".npmrc"),
+            str(Path.cwd() / ".npmrc"),
+            os.environ.get("npm_config_globalconfig") or os.environ.get("NPM_CONFIG_GLOBALCONFIG") or "",
+        ]
+        key: List[Any] = []
+        for path in [npm_path] + npmrc_files:
+            try:
+                key.append([path, os.stat(path).st_mtime_ns])
+            except OSError:
+                key.append([path, 0])
+        return key
+    
+    async def _cache_key(self) -> Optional[str]:
+        """Key the snapshot on everything that changes what is installed or resolvable"""
+        prefix = await self._npm_global_prefix()
+        if not prefix:
+            return None
+        
+        # POSIX installs into lib/node_modules, Windows into node_modules
+        modules_dir = Path(prefix) / "lib" / "node_modules"
+        if not modules_dir.is_dir():
+            modules_dir = Path(prefix) / "node_modules"
+        
+        # Scoped packages land in @scope/ without touching the parent directory mtime
+        watched = [modules_dir, Path.cwd() / "node_modules"]
+        scopes = {info["package"].split("/")[0] for info in self.registry.values()
+                  if info.get("package", "").startswith("@")}
+        watched.extend(modules_dir / scope for scope in sorted(scopes))
+        
+        mtimes = []
+        for path in watched:
+            try:
+                mtimes.append(os.stat(path).st_mtime_ns)
+            except OSError:
+                mtimes.append(0)
+        
+        self._cache_file = self.cache_dir / f"inventory_{hashlib.sha256(prefix.encode()).hexdigest()[:16]}.json"
+        registry_hash = hashlib.sha256(json.dumps(self.registry, sort_keys=True, default=str).encode()).hexdigest()
+        return compact_json([prefix, mtimes, os.environ.get("NODE_PATH", ""), str(Path.cwd()), registry_hash])
+    
+    def _load_cached(self, cache_key: str) -> Optional[Set[str]]:
+        try:
+            with open(self._cache_file, 'r') as f:
+                cached = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if cached.get("key") != cache_key:
+            return None
+        
+        self.global_packages = cached.get("global_packages", {})
+        self.resolvable_packages = set(cached.get("resolvable_packages", []))
+        self.scan_seconds = 0.0
+        self.from_cache = True
+        return set(cached.get("installed", []))
+    
+    def _save_cached(self, cache_key: str):
+        try:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            temp_file = self._cache_file.with_suffix('.tmp')
+            with open(temp_file, 'w') as f:
+                json.dump({
+                    "key": cache_key,
+                    "created_at": datetime.now().isoformat(),
+                    "installed": sorted(self._installed),
+                    "global_packages": self.global_packages,
+                    "resolvable_packages": sorted(self.resolvable_packages)
+                }, f)
+            temp_file.replace(self._cache_file)
+        except OSError:
+            pass
+    
+    async def _scan(self) -> Set[str]:
+        start = time.monotonic()
+        self.from_cache = False
+        packages = sorted({info["package"] for info in self.registry.values() if info.get("package")})
+        
+        (_, npm_output), (_, node_output) = await asyncio.gather(
+            self._run(["npm", "ls", "-g", "--json", "--depth=0"]),
+            self._run(["node", "-e", self.NODE_RESOLVE_SCRIPT, json.dumps(packages)])
+        )
+        
+        # npm exits non-zero on extraneous or missing peers but still prints the tree
+        self.global_packages = {}
+        try:
+            dependencies = json.loads(npm_output or "{}").get("dependencies", {})
+            self.global_packages = {name: info.get("version", "") for name, info in dependencies.items()}
+        except (json.JSONDecodeError, AttributeError):
+            pass
+        
+        self.resolvable_packages = set(node_output.split())
+        
+        installed = {
+            server_name for server_name, info in self.registry.items()
+            if info.get("package") in self.global_packages or info.get("package") in self.resolvable_packages
+        }
+        self.scan_seconds = time.monotonic() - start
+        return installed
+    
+    async def _run(self, cmd: List[str]) -> Tuple[int, str]:
+        """Run a command and return (returncode, stdout); failures yield (-1, "")"""
+        try:
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
+        except OSError:
+            return -1, ""
+        
+        try:
+            stdout, _ = await asyncio.wait_for(process.communicate(), timeout=self.command_timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            return -1, ""
+        
+        return process.returncode, stdout.decode("utf-8", errors="replace")
+
+def mcp_initialize_request(request_id: Any) -> Dict[str, Any]:
+    """Build the client initialize request sent to stdio MCP servers"""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": MCP_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "claude-code-builder", "version": "2.3.0"}
+        }
+    }
+
+async def spawn_mcp_server(config: Dict[str, Any]) -> asyncio.subprocess.Process:
+    """Start a stdio MCP server from an .mcp.json entry in its own process group"""
+    env = os.environ.copy()
+    env.update({k: v for k, v in config.get("env", {}).items() if "${" not in v})
+    
+    return await asyncio.create_subprocess_exec(
+        config["command"], *config.get("args", []),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+        env=env,
+        start_new_session=True,
+        limit=MCP_MESSAGE_LIMIT
+    )
+
+async def stop_mcp_server(process: asyncio.subprocess.Process):
+    """Close stdin, then kill the process group if the server does not exit"""
+    # npx runs the server as a child, so signal the whole process group
+    if process.returncode is not None:
+        return
+    try:
+        process.stdin.close()
+        await asyncio.wait_for(process.wait(), timeout=2.0)
+        return
+    except (asyncio.TimeoutError, OSError):
+        pass
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError, AttributeError):
+        process.kill()
+    await process.wait()
+
+async def terminate_process_group(process: asyncio.subprocess.Process, grace: float = PHASE_KILL_GRACE):
+    """SIGTERM a session's process group, then SIGKILL whatever is left after grace seconds"""
+    for sig in (signal.SIGTERM, signal.SIGKILL):
+        try:
+            os.killpg(process.pid, sig)
+        except ProcessLookupError:
+            break
+        except (PermissionError, AttributeError):
+            process.send_signal(sig)
+        if sig == signal.SIGTERM:
+            try:
+                await asyncio.wait_for(process.wait(), timeout=grace)
+            except asyncio.TimeoutError:
+                pass
+    await process.wait()
+
+class ProcessWatchdog:
+    """
+    Enforces wall-clock and idle-output deadlines on a subprocess started in
+    its own session. On expiry the whole process group is terminated, so MCP
+    servers and tool commands spawned by the session go with it.
+    """
+    
+    def __init__(self, process: asyncio.subprocess.Process, wall_timeout: float = PHASE_TIMEOUT,
+                 idle_timeout: float = 0, grace: float = PHASE_KILL_GRACE,
+                 stop_requested: Optional[Callable[[], bool]] = None):
+        self.process = process
+        self.wall_timeout = wall_timeout
+        self.idle_timeout = idle_timeout
+        self.grace = grace
+        self.stop_requested = stop_requested
+        self.started = time.monotonic()
+        self.last_activity = self.started
+        self.reason: Optional[str] = None
+        self.stopped = False
+    
+    def touch(self):
+        """Record output from the process"""
+        self.last_activity = time.monotonic()
+    
+    async def run(self):
+        """Poll the deadlines until the process exits or one of them passes"""
+        while self.process.returncode is None:
+            now = time.monotonic()
+            if self.wall_timeout and now - self.started >= self.wall_timeout:
+                self.reason = f"wall-clock limit of {self.wall_timeout:.0f}s exceeded"
+            elif self.idle_timeout and now - self.last_activity >= self.idle_timeout:
+                self.reason = f"no output for {self.idle_timeout:.0f}s"
+            elif self.stop_requested and self.stop_requested():
+                self.stopped = True
+            
+            if self.reason or self.stopped:
+                await terminate_process_group(self.process, self.grace)
+                return
+            await asyncio.sleep(1.0)
+
+class MCPServerWarmer:
+    """
+    Starts each configured MCP server twice before the first phase: the cold
+    start lets npx resolve and cache the package, the warm start measures
+    what every phase will pay. Both must answer an MCP initialize handshake.
+    """
+    
+    def __init__(self, startup_timeout: float = MCP_WARMUP_TIMEOUT, max_warm_start: float = MCP_WARMUP_MAX_START,
+                 concurrency: int = MCP_WARMUP_CONCURRENCY):
+        self.startup_timeout = startup_timeout
+        self.max_warm_start = max_warm_start
+        self.concurrency = max(1, concurrency)
+        self.results: Dict[str, Dict[str, Any]] = {}
+    
+    async def warm(self, servers: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Warm every server in an .mcp.json mcpServers mapping and return the healthy ones"""
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def warm_one(name: str, config: Dict[str, Any]):
+            async with semaphore:
+                self.results[name] = await self._warm_server(config)
+        
+        await asyncio.gather(*[warm_one(name, config) for name, config in servers.items()])
+        return {name: config for name, config in servers.items() if self.results[name]["healthy"]}
+    
+    async def _warm_server(self, config: Dict[str, Any]) -> Dict[str, Any]:
+        result = {"healthy": False, "cold_start": None, "warm_start": None, "error": None}
+        try:
+            result["cold_start"] = await self._handshake(config, self.startup_timeout)
+            result["warm_start"] = await self._handshake(config, self.startup_timeout)
+        except Exception as e:
+            result["error"] = str(e) or type(e).__name__
+            return result
+        
+        if result["warm_start"] > self.max_warm_start:
+            result["error"] = f"warm start {result['warm_start']:.1f}s exceeds {self.max_warm_start:.1f}s"
+        else:
+            result["healthy"] = True
+        return result
+    
+    async def _handshake(self, config: Dict[str, Any], timeout: float) -> float:
+        """Spawn the server, send initialize and return seconds until it answers"""
+        start = time.monotonic()
+        process = await spawn_mcp_server(config)
+        
+        try:
+            request = mcp_initialize_request(1)
+            process.stdin.write((json.dumps(request) + "\n").encode())
+            await process.stdin.drain()
+            
+            response = await asyncio.wait_for(self._read_response(process, request["id"]), timeout=timeout)
+            if "error" in response:
+                raise RuntimeError(f"initialize failed: {response['error'].get('message', response['error'])}")
+            return time.monotonic() - start
+        except asyncio.TimeoutError:
+            raise RuntimeError(f"no initialize response within {timeout:.0f}s")
+        finally:
+            await stop_mcp_server(process)
+    
+    @staticmethod
+    async def _read_response(process: asyncio.subprocess.Process, request_id: int) -> Dict[str, Any]:
+        # Stdio transport is newline-delimited JSON; skip anything else a server prints
+        while True:
+            line = await process.stdout.readline()
+            if not line:
+                raise RuntimeError(f"server exited with code {await process.wait()}")
+            try:
+                message = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(message, dict) and message.get("id") == request_id:
+                return message
+
+class MultiplexedMCPServer:
+    """
+    One long-lived stdio MCP server shared by many client connections.
+    The server is initialized once; each client's initialize is answered
+    from that result and request ids are rewritten so concurrent clients
+    cannot collide.
+    """
+    
+    def __init__(self, name: str, config: Dict[str, Any], startup_timeout: float = MCP_WARMUP_TIMEOUT):
+        self.name = name
+        self.config = config
+        self.startup_timeout = startup_timeout
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.initialize_result: Optional[Dict[str, Any]] = None
+        self.starts = 0
+        self.connections = 0
+        self.requests = 0
+        self._clients: Set[asyncio.StreamWriter] = set()
+        self._pending: Dict[int, Tuple[Optional[asyncio.StreamWriter], Any]] = {}
+        self._init_future: Optional[asyncio.Future] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._next_id = 0
+        self._start_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+    
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None and self.initialize_result is not None
+    
+    async def ensure_started(self):
+        """Start and initialize the server unless it is already running"""
+        async with self._start_lock:
+            if self.running:
+                return
+            
+            self.initialize_result = None
+            self.process = await spawn_mcp_server(self.config)
+            self.starts += 1
+            self._reader_task = asyncio.create_task(self._read_server(self.process))
+            
+            request_id = self._allocate_id(None, None)
+            self._init_future = asyncio.get_running_loop().create_future()
+            await self._send(mcp_initialize_request(request_id))
+            try:
+                response = await asyncio.wait_for(self._init_future, timeout=self.startup_timeout)
+            except asyncio.TimeoutError:
+                await self.stop()
+                raise RuntimeError(f"no initialize response within {self.startup_timeout:.0f}s")
+            
+            if "error" in response:
+                await self.stop()
+                raise RuntimeError(f"initialize failed: {response['error'].get('message', response['error'])}")
+            
+            self.initialize_result = response["result"]
+            await self._send({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Relay one proxy connection until it disconnects"""
+        self.connections += 1
+        try:
+            await self.ensure_started()
+        except Exception:
+            writer.close()
+            return
+        
+        self._clients.add(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if isinstance(message, dict):
+                    await self._from_client(writer, message)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except ValueError:
+            # Message longer than MCP_MESSAGE_LIMIT: the stream cannot be resynchronized
+            pass
+        finally:
+            self._clients.discard(writer)
+            for request_id, (client, _) in list(self._pending.items()):
+                if client is writer:
+                    del self._pending[request_id]
+            writer.close()
+    
+    async def stop(self):
+        if self.process:
+            await stop_mcp_server(self.process)
+        if self._reader_task:
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+        self.initialize_result = None
+    
+    def _allocate_id(self, client: Optional[asyncio.StreamWriter], client_id: Any) -> int:
+        self._next_id += 1
+        self._pending[self._next_id] = (client, client_id)
+        return self._next_id
+    
+    async def _from_client(self, writer: asyncio.StreamWriter, message: Dict[str, Any]):
+        method = message.get("method")
+        
+        if method == "initialize" and "id" in message:
+            await self._write_client(writer, {"jsonrpc": "2.0", "id": message["id"], "result": self.initialize_result})
+            return
+        if method == "notifications/initialized" or not method:
+            # Already initialized, and the daemon never forwards server requests to clients
+            return
+        
+        message = dict(message)
+        if "id" in message:
+            self.requests += 1
+            message["id"] = self._allocate_id(writer, message["id"])
+        elif method == "notifications/cancelled":
+            params = dict(message.get("params") or {})
+            for request_id, (client, client_id) in self._pending.items():
+                if client is writer and client_id == params.get("requestId"):
+                    params["requestId"] = request_id
+                    break
+            message["params"] = params
+        
+        if not self.running:
+            try:
+                await self.ensure_started()
+            except Exception as e:
+                if "id" in message:
+                    _, client_id = self._pending.pop(message["id"], (None, None))
+                    await self._write_client(writer, self._error(client_id, f"{self.name} unavailable: {e}"))
+                return
+        await self._send(message)
+    
+    async def _read_server(self, process: asyncio.subprocess.Process):
+        reason = f"{self.name} exited"
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if not isinstance(message, dict):
+                    continue
+                
+                if "id" in message and "method" in message:
+                    # Server-to-client requests (sampling, roots) are not supported through the daemon
+                    await self._send(self._error(message["id"], "Method not found", code=-32601))
+                elif "id" in message:
+                    client, client_id = self._pending.pop(message["id"], (None, None))
+                    if client is None:
+                        if self._init_future and not self._init_future.done():
+                            self._init_future.set_result(message)
+                        continue
+                    message["id"] = client_id
+                    await self._write_client(client, message)
+                else:
+                    for client in list(self._clients):
+                        await self._write_client(client, message)
+        except ValueError:
+            # A message longer than MCP_MESSAGE_LIMIT leaves the stream unreadable
+            reason = f"{self.name} sent a message over {MCP_MESSAGE_LIMIT} bytes"
+            await stop_mcp_server(process)
+        
+        # Server stopped: fail everything in flight, it is restarted on next use
+        if process is not self.process:
+            return
+        self.initialize_result = None
+        if self._init_future and not self._init_future.done():
+            self._init_future.set_result({"error": {"message": f"{reason} (code {await process.wait()})"}})
+        pending, self._pending = self._pending, {}
+        for client, client_id in pending.values():
+            if client is not None:
+                await self._write_client(client, self._error(client_id, reason))
+    
+    async def _send(self, message: Dict[str, Any]):
+        async with self._write_lock:
+            try:
+                self.process.stdin.write((json.dumps(message) + "\n").encode())
+                await self.process.stdin.drain()
+            except (ConnectionError, OSError):
+                pass
+    
+    @staticmethod
+    async def _write_client(writer: asyncio.StreamWriter, message: Dict[str, Any]):
+        try:
+            writer.write((json.dumps(message) + "\n").encode())
+            await writer.drain()
+        except (ConnectionError, OSError):
+            pass
+    
+    @staticmethod
+    def _error(request_id: Any, message: str, code: int = -32603) -> Dict[str, Any]:
+        return {"jsonrpc": "2.0", "id": request_id, "error": {"code": code, "message": message}}
+
+class MCPServerDaemon:
+    """
+    Keeps each stdio MCP server running for the whole build. Phases reach
+    them through a small proxy command in .mcp.json that pipes stdio to a
+    local socket, so start-up is paid once and server state (e.g. memory)
+    survives across phases.
+    """
+    
+    PROXY_SCRIPT = (
+        "import os, socket, sys, threading\n"
+        "kind, address = sys.argv[1], sys.argv[2]\n"
+        "if kind == 'unix':\n"
+        "    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)\n"
+        "    sock.connect(address)\n"
+        "else:\n"
+        "    sock = socket.create_connection(('127.0.0.1', int(address)))\n"
+        "def pump():\n"
+        "    while True:\n"
+        "        data = sock.recv(65536)\n"
+        "        if not data:\n"
+        "            break\n"
+        "        sys.stdout.buffer.write(data)\n"
+        "        sys.stdout.buffer.flush()\n"
+        "    os._exit(0)\n"
+        "threading.Thread(target=pump, daemon=True).start()\n"
+        "for chunk in iter(lambda: sys.stdin.buffer.read1(65536), b''):\n"
+        "    sock.sendall(chunk)\n"
+        "sock.shutdown(socket.SHUT_WR)\n"
+        "os._exit(0)\n"
+    )
+    
+    def __init__(self, servers: Dict[str, Dict[str, Any]], startup_timeout: float = MCP_WARMUP_TIMEOUT):
+        self.servers = servers
+        self.startup_timeout = startup_timeout
+        self.channels: Dict[str, MultiplexedMCPServer] = {}
+        self.failed: Dict[str, str] = {}
+        self._listeners: List[asyncio.AbstractServer] = []
+        self._socket_dir: Optional[Path] = None
+    
+    async def start(self) -> Dict[str, Dict[str, Any]]:
+        """Start every server and return .mcp.json entries that reach them through proxies"""
+        if hasattr(socket, "AF_UNIX"):
+            self._socket_dir = Path(tempfile.mkdtemp(prefix="ccb-mcp-"))
+        
+        async def start_one(name: str, config: Dict[str, Any]) -> Dict[str, Any]:
+            channel = MultiplexedMCPServer(name, config, self.startup_timeout)
+            try:
+                await channel.ensure_started()
+            except Exception as e:
+                # Leave it to each phase to start the server directly
+                self.failed[name] = str(e) or type(e).__name__
+                return config
+            self.channels[name] = channel
+            address = await self._listen(name, channel)
+            return {"command": sys.executable, "args": ["-c", self.PROXY_SCRIPT, *address]}
+        
+        names = list(self.servers)
+        entries = await asyncio.gather(*[start_one(name, self.servers[name]) for name in names])
+        return dict(zip(names, entries))
+    
+    async def stop(self):
+        for listener in self._listeners:
+            listener.close()
+        await asyncio.gather(*[channel.stop() for channel in self.channels.values()], return_exceptions=True)
+        if self._socket_dir:
+            shutil.rmtree(self._socket_dir, ignore_errors=True)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "servers": {
+                name: {"starts": channel.starts, "connections": channel.connections, "requests": channel.requests}
+                for name, channel in self.channels.items()
+            },
+            "failed": self.failed
+        }
+    
+    async def _listen(self, name: str, channel: MultiplexedMCPServer) -> List[str]:
+        if self._socket_dir:
+            path = self._socket_dir / (re.sub(r"[^A-Za-z0-9_.-]", "_", name) + ".sock")
+            listener = await asyncio.start_unix_server(channel.handle_client, path=str(path), limit=MCP_MESSAGE_LIMIT)
+            os.chmod(path, 0o600)
+            address = ["unix", str(path)]
+        else:
+            listener = await asyncio.start_server(channel.handle_client, "127.0.0.1", 0, limit=MCP_MESSAGE_LIMIT)
+            address = ["tcp", str(listener.sockets[0].getsockname()[1])]
+        self._listeners.append(listener)
+        return address
+
+@dataclass
+class SpecSection:
+    """A Markdown heading and the byte range it covers, nested sections included"""
+    id: str
+    title: str
+    level: int
+    start: int  # Offset of the heading line
+    body_start: int
+    end: int
+    parent: Optional[str] = None
+    children: List[str] = field(default_factory=list)
+    digest: str = ""
+
+class SpecificationIndex:
+    """
+    Memory-mapped view of a Markdown specification. Records the byte
+    offset of every ATX heading (outside fenced code), the section tree
+    they form and a hash per section, so prompts and analyzers can pull
+    exact sections by id without holding more copies of the spec.
+    """
+    
+    ROOT = ""
+    LINE = re.compile(rb"^(?:(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*|[ \t]{0,3}(`{3,}|~{3,}).*?)\r?$", re.M)
+    
+    def __init__(self, path: Path, encoding: str = "utf-8"):
+        self.path = Path(path)
+        self.encoding = encoding
+        self._file = open(self.path, 'rb')
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.sections: Dict[str, SpecSection] = {}
+        self._build()
+    
+    def _build(self):
+        size = len(self._map)
+        root = SpecSection(id=self.ROOT, title=self.path.name, level=0, start=0, body_start=0, end=size)
+        self.sections[root.id] = root
+        stack = [root]
+        fence: Optional[bytes] = None
+        
+        for match in self.LINE.finditer(self._map):
+            marker, fence_marker = match.group(1), match.group(3)
+            if fence_marker:
+                if fence is None:
+                    fence = fence_marker[:1]
+                elif fence_marker[:1] == fence:
+                    fence = None
+                continue
+            if fence is not None:
+                continue
+            
+            level = len(marker)
+            while stack[-1].level >= level:
+                stack.pop().end = match.start()
+            
+            title = match.group(2).decode(self.encoding, errors="replace").strip()
+            section = SpecSection(
+                id=self._unique_id(title),
+                title=title,
+                level=level,
+                start=match.start(),
+                body_start=min(match.end() + 1, size),
+                end=size,
+                parent=stack[-1].id
+            )
+            stack[-1].children.append(section.id)
+            self.sections[section.id] = section
+            stack.append(section)
+        
+        for section in self.sections.values():
+            section.digest = hashlib.sha256(self._map[section.start:section.end]).hexdigest()[:16]
+    
+    def _unique_id(self, title: str) -> str:
+        base = re.sub(r"[^a-z0-9]+", "-", title.lower()).strip("-") or "section"
+        section_id, suffix = base, 1
+        while section_id in self.sections:
+            suffix += 1
+            section_id = f"{base}-{suffix}"
+        return section_id
+    
+    def section(self, section_id: str) -> SpecSection:
+        return self.sections[section_id]
+    
+    def text(self, section_id: str = ROOT, include_children: bool = True) -> str:
+        """Decode one section, with or without its subsections"""
+        section = self.sections[section_id]
+        end = section.end
+        if not include_children and section.children:
+            end = self.sections[section.children[0]].start
+        return self._map[section.start:end].decode(self.encoding, errors="replace")
+    
+    def outline(self, max_level: int = 6) -> str:
+        """Indented list of headings with their section ids"""
+        return "\n".join(
+            f"{'  ' * (section.level - 1)}- {section.title} [{section.id}]"
+            for section in self.sections.values()
+            if 0 < section.level <= max_level
+        )
+    
+    def overview(self, max_chars: int) -> str:
+        """Leading sections in document order, whole, up to max_chars"""
+        parts = []
+        used = 0
+        for section_id in self.sections:
+            text = self.text(section_id, include_children=False).strip()
+            if not text:
+                continue
+            if used + len(text) > max_chars:
+                if not parts:
+                    # Even the first section is too long: cut it at a line break
+                    cut = text.rfind("\n", 0, max_chars)
+                    parts.append(text[:cut if cut > 0 else max_chars])
+                break
+            parts.append(text)
+            used += len(text) + 2
+        return "\n\n".join(parts)
+    
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+class SpecSectionRetriever:
+    """
+    Okapi BM25 over the own text of every specification section (without
+    subsections, so nested content is not counted twice). Used to pick
+    the sections most relevant to a phase for its prompt.
+    """
+    
+    TOKEN = re.compile(r"[a-z0-9]{2,}")
+    STOPWORDS = frozenset(
+        "an and are as at be by for from has have in is it its of on or that the this to was were will with "
+        "all any can should must use using into each".split()
+    )
+    
+    def __init__(self, index: SpecificationIndex, k1: float = 1.5, b: float = 0.75):
+        self.index = index
+        self.k1 = k1
+        self.b = b
+        self.section_ids: List[str] = []
+        self.lengths: List[int] = []
+        self.postings: Dict[str, List[Tuple[int, int]]] = defaultdict(list)  # term -> [(doc, tf)]
+        
+        for section_id in index.sections:
+            terms = Counter(self.tokenize(index.text(section_id, include_children=False)))
+            if not terms:
+                continue
+            doc = len(self.section_ids)
+            self.section_ids.append(section_id)
+            self.lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc, tf))
+        
+        self.avg_length = sum(self.lengths) / max(len(self.lengths), 1)
+        doc_count = len(self.section_ids)
+        self.idf = {
+            term: math.log(1 + (doc_count - len(docs) + 0.5) / (len(docs) + 0.5))
+            for term, docs in self.postings.items()
+        }
+    
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        return [token for token in cls.TOKEN.findall(text.lower()) if token not in cls.STOPWORDS]
+    
+    def search(self, query: str, limit: int = 10) -> List[Tuple[str, float]]:
+        """Best matching section ids with their scores"""
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(self.tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for doc, tf in self.postings[term]:
+                norm = self.k1 * (1 - self.b + self.b * self.lengths[doc] / self.avg_length)
+                scores[doc] += idf * tf * (self.k1 + 1) / (tf + norm)
+        
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [(self.section_ids[doc], score) for doc, score in ranked]
+    
+    def context(self, query: str, max_tokens: int) -> str:
+        """Top-ranked sections that fit max_tokens, in document order"""
+        chosen: Dict[str, str] = {}
+        remaining = max_tokens
+        for section_id, _ in self.search(query, limit=len(self.section_ids)):
+            text = self.index.text(section_id, include_children=False).strip()
+            cost = estimate_tokens(text)
+            if cost <= remaining:
+                chosen[section_id] = text
+                remaining -= cost
+            elif not chosen:
+                # The best match alone is over budget: keep its leading part, cut at a line break
+                max_chars = max_tokens * 4
+                cut = text.rfind("\n", 0, max_chars)
+                chosen[section_id] = text[:cut if cut > 0 else max_chars]
+                break
+            if remaining < 50:
+                break
+        
+        if not chosen:
+            return self.index.overview(max_tokens * 4)
+        
+        order = {section_id: position for position, section_id in enumerate(self.index.sections)}
+        return "\n\n".join(chosen[section_id] for section_id in sorted(chosen, key=order.get))
+
+@dataclass
+class SpecificationFeatures:
+    """Features detected in a specification by SpecificationFeatureScanner"""
+    technology_stack: List[str]
+    requirements: List[str]
+    project_type: str
+    complexity: str
+    word_count: int
+    counts: Dict[str, Dict[str, int]]  # group -> feature -> matches
+    positions: Dict[str, Dict[str, List[int]]]  # group -> feature -> character offsets
+
+class SpecificationFeatureScanner:
+    """
+    Detects technology, requirement, project type and complexity keywords
+    in one pass over the lowercased specification. A single compiled
+    lookahead over a character trie of all keywords finds every word start
+    where any keyword matches and captures the longest match. Shorter
+    keywords can only match prefixes of it, so the features for each
+    distinct captured text are worked out once. Results are memoised by
+    specification hash.
+    """
+    
+    # Each alternative matches at a word boundary and must end at one
+    FEATURE_GROUPS = {
+        "technology": {
+            "python": ["python", "fastapi", "django", "flask", "pydantic", "pytest", "numpy", "pandas"],
+            "javascript": ["javascript", "js", "node", "nodejs", "react", "vue", "angular", "express", r"next\.?js"],
+            "typescript": ["typescript", "ts", "tsx", "type.?script"],
+            "database": ["postgresql", "postgres", "mysql", "mongodb", "redis", "sqlite", "database", "db", "sql"],
+            "docker": ["docker", "container", "dockerfile", "compose", "kubernetes", "k8s"],
+            "cloud": ["aws", "azure", "gcp", "google cloud", "amazon", "cloud", "serverless", "lambda"],
+            "git": ["git", "github", "gitlab", "version control", "repository"],
+            "api": ["api", "rest", "restful", "graphql", "endpoint", "backend", "webhook"],
+            "frontend": ["frontend", "ui", "user interface", "webapp", "website", "react", "vue", "angular"],
+            "monitoring": ["monitor", "metrics", "prometheus", "grafana", "logs", "logging", "observability"],
+            "ci/cd": ["ci/cd", "continuous integration", "deployment", "pipeline", "github actions", "jenkins"],
+            "security": ["security", "auth", "oauth", "jwt", "encryption", "ssl", "https", "firewall"],
+            "ai/ml": ["machine learning", "ml", "ai", "tensorflow", "pytorch", "model", "training"]
+        },
+        "requirement": {
+            "authentication": ["login", "auth", "authentication", "user", "account", "signin", "oauth", "jwt", "sso", "ldap"],
+            "database": ["store", "data", "persist", "database", "save", "crud", "query", "transaction"],
+            "api": ["api", "endpoint", "service", "backend", "server", "webhook", "integration"],
+            "frontend": ["ui", "interface", "frontend", "web", "dashboard", "app", "mobile", "responsive"],
+            "realtime": ["realtime", "real-time", "websocket", "live", "push", "streaming", "event"],
+            "security": ["secure", "security", "encrypt", "ssl", "https", "protection", "firewall", "vpn"],
+            "scalability": ["scale", "scalable", "performance", "load", "concurrent", "optimize", "cache"],
+            "deployment": ["deploy", "deployment", "production", "hosting", "cloud", "release", "ci/cd"],
+            "monitoring": ["monitor", "log", "metric", "alert", "observability", "tracking", "analytics"],
+            "documentation": ["document", "documentation", "docs", "readme", "guide", "tutorial", "api docs"],
+            "collaboration": ["team", "collaborate", "share", "multi-user", "workflow", "permission"],
+            "backup": ["backup", "restore", "disaster recovery", "redundancy", "failover"],
+            "integration": ["integrate", "integration", "connect", "sync", "import", "export", "webhook"]
+        },
+        # Dict order matters: the first project type found wins
+        "project_type": {
+            "web_application": ["web app", "website", "webapp", "web application", "full-stack", "spa", "pwa"],
+            "api_service": ["api", "service", "microservice", "backend", "rest api", "graphql", "grpc"],
+            "cli_tool": ["cli", "command line", "terminal", "console", "script", "automation tool"],
+            "data_pipeline": ["pipeline", "etl", "data processing", "analytics", "stream", "batch processing"],
+            "ml_system": ["machine learning", "ml", "ai", "model", "neural", "prediction", "training"],
+            "mobile_app": ["mobile", "ios", "android", "app", "react native", "flutter", "swift"],
+            "desktop_app": ["desktop", "gui", "tkinter", "qt", "electron", "native", "windows app", "mac app"],
+            "library": ["library", "package", "sdk", "framework", "module", "npm package", "pip package"],
+            "automation": ["automation", "bot", "scraper", "workflow", "task automation", "rpa"],
+            "game": ["game", "gaming", "unity", "unreal", "gamedev", "3d", "2d game"],
+            "iot": ["iot", "embedded", "arduino", "raspberry pi", "sensor", "device"],
+            "blockchain": ["blockchain", "smart contract", "dapp", "web3", "crypto", "defi"]
+        },
+        "complexity": {
+            "microservice": ["microservice"],
+            "distributed": ["distributed"],
+            "scalable": ["scalable"],
+            "high_performance": ["high.?performance"],
+            "real_time": ["real.?time"],
+            "concurrent": ["concurrent"],
+            "load_balancing": ["load.?balanc"],
+            "cache": ["cache"],
+            "queue": ["queue"]
+        }
+    }
+    
+    WORD = re.compile(r"\S+")
+    
+    def __init__(self, max_cached: int = 8):
+        self.max_cached = max_cached
+        self._cache: Dict[str, SpecificationFeatures] = {}
+        self._index: Dict[str, List[Tuple[str, str, "re.Pattern"]]] = defaultdict(list)
+        
+        all_alternatives = set()
+        for group, features in self.FEATURE_GROUPS.items():
+            for feature, alternatives in features.items():
+                for alternative in alternatives:
+                    if not re.match(r"\w\w", alternative):
+                        raise ValueError(f"Keyword {alternative!r} must start with two literal word characters")
+                    self._index[alternative[:2]].append((group, feature, re.compile(rf"(?:{alternative})\b")))
+                    all_alternatives.add(alternative)
+        
+        # Zero-width, so overlapping keywords ("web app" and "web") are all visited
+        self._hits = re.compile(r"\b(?=(%s)\b)" % self._trie_pattern(all_alternatives))
+        self._keyword_features: Dict[str, List[Tuple[str, str]]] = {}
+    
+    @staticmethod
+    def _trie_pattern(alternatives: Set[str]) -> str:
+        """Merge keyword regexes on their literal prefixes so each position fails fast"""
+        root: Dict[str, Any] = {}
+        for alternative in alternatives:
+            head = re.match(r"[^\\.?*+()\[\]|{}^$]*", alternative).group()
+            node = root
+            for char in head:
+                node = node.setdefault(char, {})
+            node.setdefault("", set()).add(alternative[len(head):])
+        
+        def render(node: Dict[str, Any]) -> str:
+            options = [re.escape(char) + render(child) for char, child in sorted(node.items()) if char]
+            options += sorted(node.get("", ()), key=len, reverse=True)
+            return options[0] if len(options) == 1 else "(?:" + "|".join(options) + ")"
+        
+        return render(root)
+    
+    def scan(self, specification: str) -> SpecificationFeatures:
+        """Return the features of a specification, scanning it at most once"""
+        spec_hash = hashlib.sha256(specification.encode("utf-8", errors="replace")).hexdigest()
+        features = self._cache.get(spec_hash)
+        if features is None:
+            features = self._scan(specification)
+            if len(self._cache) >= self.max_cached:
+                self._cache.pop(next(iter(self._cache)))
+            self._cache[spec_hash] = features
+        return features
+    
+    def _features_for(self, keyword: str) -> List[Tuple[str, str]]:
+        """(group, feature) pairs with an alternative matching at the start of a captured keyword"""
+        features = self._keyword_features.get(keyword)
+        if features is None:
+            features = []
+            for group, feature, pattern in self._index[keyword[:2]]:
+                if (group, feature) not in features and pattern.match(keyword):
+                    features.append((group, feature))
+            self._keyword_features[keyword] = features
+        return features
+    
+    def _scan(self, specification: str) -> SpecificationFeatures:
+        text = specification.lower()
+        positions: Dict[str, Dict[str, List[int]]] = {group: defaultdict(list) for group in self.FEATURE_GROUPS}
+        
+        for hit in self._hits.finditer(text):
+            for group, feature in self._features_for(hit.group(1)):
+                positions[group][feature].append(hit.start())
+        
+        def detected(group: str) -> List[str]:
+            return [feature for feature in self.FEATURE_GROUPS[group] if positions[group].get(feature)]
+        
+        project_types = detected("project_type")
+        word_count = sum(1 for _ in self.WORD.finditer(specification))
+        complex_count = len(detected("complexity"))
+        
+        if word_count > 2000 or complex_count > 3:
+            complexity = "high"
+        elif word_count > 500 or complex_count > 1:
+            complexity = "medium"
+        else:
+            complexity = "low"
+        
+        return SpecificationFeatures(
+            technology_stack=detected("technology"),
+            requirements=detected("requirement"),
+            project_type=project_types[0] if project_types else "general",
+            complexity=complexity,
+            word_count=word_count,
+            counts={group: {feature: len(hits) for feature, hits in features.items()}
+                    for group, features in positions.items()},
+            positions={group: dict(features) for group, features in positions.items()}
+        )
+
+class MCPScoringMatrix:
+    """
+    The server registry compiled once into incidence matrices so every
+    server is scored with a few matrix-vector products: server × tech
+    mapping key, mapping key × technology, server × requirement and
+    server × project type. Uses numpy when available.
+    """
+    
+    COMPLEXITY_BONUS = {"high": 0.15, "medium": 0.1, "low": 0.05}
+    
+    def __init__(self, registry: Dict[str, Dict[str, Any]]):
+        self.server_names = list(registry)
+        servers = [registry[name] for name in self.server_names]
+        packages = [info.get("package", "") for info in servers]
+        self.packages = packages
+        self.short_names = [package.split("/")[-1].replace("server-", "") for package in packages]
+        
+        mapping_keys = list(MCP_TECH_MAPPINGS)
+        self.technologies = sorted({tech for techs in MCP_TECH_MAPPINGS.values() for tech in techs if tech != "*"})
+        self.requirements = list(MCP_REQUIREMENT_MAPPINGS)
+        self.project_types = list(MCP_PROJECT_TYPE_CATEGORIES)
+        
+        server_keys = [[float(key in package.lower()) for key in mapping_keys] for package in packages]
+        key_techs = [[float(tech in MCP_TECH_MAPPINGS[key]) for tech in self.technologies] for key in mapping_keys]
+        wildcard = [float("*" in MCP_TECH_MAPPINGS[key]) for key in mapping_keys]
+        server_requirements = [[float(self._serves_requirement(info, keywords))
+                                for keywords in MCP_REQUIREMENT_MAPPINGS.values()] for info in servers]
+        server_types = [[float(info.get("category", "") in categories)
+                         for categories in MCP_PROJECT_TYPE_CATEGORIES.values()] for info in servers]
+        priority = [info["priority"] / 50.0 for info in servers]
+        core = [float(info["category"] == "core") for info in servers]
+        
+        convert = np.array if NUMPY_AVAILABLE else (lambda values: values)
+        self.server_keys = convert(server_keys)
+        self.key_techs = convert(key_techs)
+        self.wildcard = convert(wildcard)
+        self.server_requirements = convert(server_requirements)
+        self.server_types = convert(server_types)
+        self.priority = convert(priority)
+        self.core = convert(core)
+    
+    @staticmethod
+    def _serves_requirement(server_info: Dict[str, Any], keywords: List[str]) -> bool:
+        """Whether any keyword appears in a server's use cases or tools"""
+        names = [name.lower() for name in server_info.get("use_cases", []) + server_info.get("tools", [])]
+        return any(keyword in name for keyword in keywords for name in names)
+    
+    @staticmethod
+    def _matvec(matrix, vector):
+        if NUMPY_AVAILABLE:
+            return matrix @ np.array(vector, dtype=float)
+        return [sum(a * b for a, b in zip(row, vector)) for row in matrix]
+    
+    def score(self, tech_stack: List[str], requirements: List[str], project_type: str, complexity: str,
+              installed: Set[str], success_rates: Dict[str, float]) -> Dict[str, float]:
+        """Confidence in [0, 1] for every registry server"""
+        tech_vector = [float(tech in tech_stack) for tech in self.technologies]
+        requirement_vector = [float(requirements.count(req)) for req in self.requirements]
+        
+        # A mapping key counts once if any of its technologies is in the stack
+        key_hits = [min(1.0, hit + wild) for hit, wild in zip(self._matvec(self.key_techs, tech_vector), self.wildcard)]
+        tech_matches = self._matvec(self.server_keys, key_hits)
+        requirement_matches = self._matvec(self.server_requirements, requirement_vector)
+        
+        if project_type in MCP_PROJECT_TYPE_CATEGORIES:
+            type_matches = self._matvec(self.server_types, [float(t == project_type) for t in self.project_types])
+        else:
+            type_matches = self.core
+        
+        tech_weight = 0.3 / len(tech_stack) if tech_stack else 0.0
+        requirement_weight = 0.3 / len(requirements) if requirements else 0.0
+        complexity_bonus = self.COMPLEXITY_BONUS.get(complexity, 0.05)
+        installed_vector = [0.05 * (name in installed) for name in self.short_names]
+        rates = [success_rates.get(package, 0.8) for package in self.packages]
+        
+        if NUMPY_AVAILABLE:
+            confidence = (self.priority + tech_matches * tech_weight + requirement_matches * requirement_weight
+                          + 0.2 * type_matches + complexity_bonus * self.core + np.array(installed_vector))
+            confidence = np.minimum(confidence * np.array(rates), 1.0)
+            return dict(zip(self.server_names, confidence.tolist()))
+        
+        return {
+            name: min((self.priority[i] + tech_matches[i] * tech_weight + requirement_matches[i] * requirement_weight
+                       + 0.2 * type_matches[i] + complexity_bonus * self.core[i] + installed_vector[i]) * rates[i], 1.0)
+            for i, name in enumerate(self.server_names)
+        }
+
 class MCPRecommendationEngine:
     """
     Enhanced MCP server recommendation engine with better analysis.
     """
     
-    def __init__(self):
+    def __init__(self, inventory: Optional[MCPInventory] = None):
         self.registry = MCP_SERVER_REGISTRY
         self.usage_patterns = defaultdict(int)
         self.success_rates = defaultdict(float)
         self.installed_servers: Set[str] = set()  # New in v2.3
+        self.inventory = inventory or MCPInventory(self.registry)
+        self.feature_scanner = SpecificationFeatureScanner()
+        self.scoring = MCPScoringMatrix(self.registry)
     
     async def analyze_project_needs(self, specification: str, project_context: Dict[str, Any]) -> List[MCPRecommendation]:
         """
@@ -1048,10 +2797,11 @@ class MCPRecommendationEngine:
         recommendations = []
         
         # Extract key information from specification
-        tech_stack = await self._extract_technology_stack(specification)
-        requirements = await self._extract_requirements(specification)
-        project_type = await self._determine_project_type(specification)
-        complexity = await self._assess_complexity(specification)  # New in v2.3
+        features = self.feature_scanner.scan(specification)
+        tech_stack = features.technology_stack
+        requirements = features.requirements
+        project_type = features.project_type
+        complexity = features.complexity  # New in v2.3
         
         # Update context with extracted information
         project_context.update({
@@ -1064,11 +2814,14 @@ class MCPRecommendationEngine:
         # Check installed servers
         await self._check_installed_servers()
         
+        # Score every server at once
+        scores = self.scoring.score(
+            tech_stack, requirements, project_type, complexity, self.installed_servers, self.success_rates
+        )
+        
         # Generate recommendations for each server
         for server_name, server_info in self.registry.items():
-            confidence = self._calculate_confidence(
-                server_info, tech_stack, requirements, project_type, complexity
-            )
+            confidence = scores[server_name]
             
             if confidence > 0.3:  # Threshold for recommendations
                 recommendations.append(MCPRecommendation(
@@ -1088,262 +2841,7 @@ class MCPRecommendationEngine:
     
     async def _check_installed_servers(self):
         """Check which MCP servers are already installed"""
-        self.installed_servers.clear()
-        
-        for server_name, server_info in self.registry.items():
-            try:
-                # Check if package is installed
-                check_cmd = ["npm", "list", "-g", server_info['package'], "--depth=0"]
-                result = await asyncio.create_subprocess_exec(
-                    *check_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, _ = await result.communicate()
-                
-                if result.returncode == 0:
-                    self.installed_servers.add(server_name)
-            except:
-                pass
-    
-    async def _assess_complexity(self, specification: str) -> str:
-        """Assess project complexity from specification"""
-        spec_lower = specification.lower()
-        word_count = len(specification.split())
-        
-        # Complexity indicators
-        complex_patterns = [
-            r'\bmicroservice\b', r'\bdistributed\b', r'\bscalable\b',
-            r'\bhigh.?performance\b', r'\breal.?time\b', r'\bconcurrent\b',
-            r'\bload.?balanc\b', r'\bcache\b', r'\bqueue\b'
-        ]
-        
-        complex_count = sum(1 for pattern in complex_patterns 
-                          if re.search(pattern, spec_lower))
-        
-        if word_count > 2000 or complex_count > 3:
-            return "high"
-        elif word_count > 500 or complex_count > 1:
-            return "medium"
-        else:
-            return "low"
-    
-    async def _extract_technology_stack(self, specification: str) -> List[str]:
-        """Enhanced technology extraction with better patterns"""
-        tech_patterns = {
-            "python": r"\b(python|fastapi|django|flask|pydantic|pytest|numpy|pandas)\b",
-            "javascript": r"\b(javascript|js|node|nodejs|react|vue|angular|express|next\.?js)\b",
-            "typescript": r"\b(typescript|ts|tsx|type.?script)\b",
-            "database": r"\b(postgresql|postgres|mysql|mongodb|redis|sqlite|database|db|sql)\b",
-            "docker": r"\b(docker|container|dockerfile|compose|kubernetes|k8s)\b",
-            "cloud": r"\b(aws|azure|gcp|google cloud|amazon|cloud|serverless|lambda)\b",
-            "git": r"\b(git|github|gitlab|version control|repository)\b",
-            "api": r"\b(api|rest|restful|graphql|endpoint|backend|webhook)\b",
-            "frontend": r"\b(frontend|ui|user interface|webapp|website|react|vue|angular)\b",
-            "monitoring": r"\b(monitor|metrics|prometheus|grafana|logs|logging|observability)\b",
-            "ci/cd": r"\b(ci/cd|continuous integration|deployment|pipeline|github actions|jenkins)\b",
-            "security": r"\b(security|auth|oauth|jwt|encryption|ssl|https|firewall)\b",
-            "ai/ml": r"\b(machine learning|ml|ai|tensorflow|pytorch|model|training)\b"
-        }
-        
-        detected_tech = []
-        spec_lower = specification.lower()
-        
-        for tech, pattern in tech_patterns.items():
-            if re.search(pattern, spec_lower, re.IGNORECASE):
-                detected_tech.append(tech)
-        
-        return detected_tech
-    
-    async def _extract_requirements(self, specification: str) -> List[str]:
-        """Enhanced requirement extraction with more patterns"""
-        requirement_patterns = {
-            "authentication": r"\b(login|auth|authentication|user|account|signin|oauth|jwt|sso|ldap)\b",
-            "database": r"\b(store|data|persist|database|save|crud|query|transaction)\b",
-            "api": r"\b(api|endpoint|service|backend|server|webhook|integration)\b",
-            "frontend": r"\b(ui|interface|frontend|web|dashboard|app|mobile|responsive)\b",
-            "realtime": r"\b(realtime|real-time|websocket|live|push|streaming|event)\b",
-            "security": r"\b(secure|security|encrypt|ssl|https|protection|firewall|vpn)\b",
-            "scalability": r"\b(scale|scalable|performance|load|concurrent|optimize|cache)\b",
-            "deployment": r"\b(deploy|deployment|production|hosting|cloud|release|ci/cd)\b",
-            "monitoring": r"\b(monitor|log|metric|alert|observability|tracking|analytics)\b",
-            "documentation": r"\b(document|documentation|docs|readme|guide|tutorial|api docs)\b",
-            "collaboration": r"\b(team|collaborate|share|multi-user|workflow|permission)\b",
-            "backup": r"\b(backup|restore|disaster recovery|redundancy|failover)\b",
-            "integration": r"\b(integrate|integration|connect|sync|import|export|webhook)\b"
-        }
-        
-        detected_requirements = []
-        spec_lower = specification.lower()
-        
-        for req, pattern in requirement_patterns.items():
-            if re.search(pattern, spec_lower, re.IGNORECASE):
-                detected_requirements.append(req)
-        
-        return detected_requirements
-    
-    async def _determine_project_type(self, specification: str) -> str:
-        """Enhanced project type detection with more categories"""
-        type_patterns = {
-            "web_application": r"\b(web app|website|webapp|web application|full-stack|spa|pwa)\b",
-            "api_service": r"\b(api|service|microservice|backend|rest api|graphql|grpc)\b",
-            "cli_tool": r"\b(cli|command line|terminal|console|script|automation tool)\b",
-            "data_pipeline": r"\b(pipeline|etl|data processing|analytics|stream|batch processing)\b",
-            "ml_system": r"\b(machine learning|ml|ai|model|neural|prediction|training)\b",
-            "mobile_app": r"\b(mobile|ios|android|app|react native|flutter|swift)\b",
-            "desktop_app": r"\b(desktop|gui|tkinter|qt|electron|native|windows app|mac app)\b",
-            "library": r"\b(library|package|sdk|framework|module|npm package|pip package)\b",
-            "automation": r"\b(automation|bot|scraper|workflow|task automation|rpa)\b",
-            "game": r"\b(game|gaming|unity|unreal|gamedev|3d|2d game)\b",
-            "iot": r"\b(iot|embedded|arduino|raspberry pi|sensor|device)\b",
-            "blockchain": r"\b(blockchain|smart contract|dapp|web3|crypto|defi)\b"
-        }
-        
-        spec_lower = specification.lower()
-        
-        # Check each pattern and return the first match
-        for project_type, pattern in type_patterns.items():
-            if re.search(pattern, spec_lower, re.IGNORECASE):
-                return project_type
-        
-        return "general"
-    
-    def _calculate_confidence(self, server_info: Dict, tech_stack: List[str], 
-                             requirements: List[str], project_type: str, 
-                             complexity: str) -> float:
-        """
-        Enhanced confidence calculation with complexity factor.
-        """
-        confidence = 0.0
-        
-        # Base confidence from server priority (normalized to 0-0.2)
-        confidence += server_info["priority"] / 50.0
-        
-        # Technology stack matching (0-0.3)
-        tech_matches = self._count_tech_matches(server_info, tech_stack)
-        if tech_stack:
-            confidence += (tech_matches / len(tech_stack)) * 0.3
-        
-        # Requirement matching (0-0.3)
-        req_matches = self._count_requirement_matches(server_info, requirements)
-        if requirements:
-            confidence += (req_matches / len(requirements)) * 0.3
-        
-        # Project type matching (0-0.2)
-        if self._matches_project_type(server_info, project_type):
-            confidence += 0.2
-        
-        # Complexity bonus for core servers
-        if server_info["category"] == "core":
-            if complexity == "high":
-                confidence += 0.15
-            elif complexity == "medium":
-                confidence += 0.1
-            else:
-                confidence += 0.05
-        
-        # Boost for already installed servers
-        if server_info.get("package", "").split("/")[-1].replace("server-", "") in self.installed_servers:
-            confidence += 0.05
-        
-        # Apply historical success rate if available
-        success_rate = self.success_rates.get(server_info.get("package", ""), 0.8)
-        confidence *= success_rate
-        
-        return min(confidence, 1.0)
-    
-    def _count_tech_matches(self, server_info: Dict, tech_stack: List[str]) -> int:
-        """Enhanced technology matching with better mappings"""
-        matches = 0
-        server_name = server_info.get("package", "").lower()
-        
-        # Enhanced technology mappings
-        tech_mappings = {
-            "postgres": ["database", "postgresql", "sql"],
-            "sqlite": ["database", "sqlite", "sql"],
-            "mongodb": ["database", "mongodb", "nosql"],
-            "redis": ["database", "redis", "cache"],
-            "git": ["git", "version control"],
-            "github": ["git", "github", "ci/cd"],
-            "web": ["api", "frontend", "web", "testing"],
-            "filesystem": ["*"],  # Matches all projects
-            "memory": ["*"],  # Matches all projects
-            "sequential-thinking": ["*"],  # Matches all projects
-            "context7": ["*"]  # Matches all projects for documentation
-        }
-        
-        # Check server name against mappings
-        for server_key, tech_list in tech_mappings.items():
-            if server_key in server_name:
-                for tech in tech_list:
-                    if tech == "*" or tech in tech_stack:
-                        matches += 1
-                        break
-        
-        return matches
-    
-    def _count_requirement_matches(self, server_info: Dict, requirements: List[str]) -> int:
-        """Enhanced requirement matching with better patterns"""
-        matches = 0
-        use_cases = server_info.get("use_cases", [])
-        tools = server_info.get("tools", [])
-        
-        # Enhanced requirement to use case/tool mappings
-        requirement_mappings = {
-            "database": ["database", "data", "storage", "query", "schema"],
-            "api": ["api", "service", "endpoint", "integration"],
-            "authentication": ["auth", "security", "user", "permission"],
-            "testing": ["test", "validation", "quality", "automation"],
-            "deployment": ["deploy", "release", "production", "ci_cd"],
-            "monitoring": ["monitor", "log", "metric", "observability", "tracking"],
-            "collaboration": ["team", "share", "collaborate", "workflow"],
-            "documentation": ["doc", "guide", "help", "reference"],
-            "realtime": ["realtime", "live", "push", "websocket", "streaming"],
-            "scalability": ["scale", "performance", "optimize", "concurrent"],
-            "security": ["security", "encrypt", "protect", "firewall"],
-            "backup": ["backup", "restore", "recovery"],
-            "integration": ["integrate", "connect", "sync", "webhook"]
-        }
-        
-        for req in requirements:
-            if req in requirement_mappings:
-                keywords = requirement_mappings[req]
-                # Check if any keyword matches use cases or tools
-                for keyword in keywords:
-                    if any(keyword in use_case.lower() for use_case in use_cases):
-                        matches += 1
-                        break
-                    if any(keyword in tool.lower() for tool in tools):
-                        matches += 1
-                        break
-        
-        return matches
-    
-    def _matches_project_type(self, server_info: Dict, project_type: str) -> bool:
-        """Enhanced project type matching with better categories"""
-        category = server_info.get("category", "")
-        
-        # Enhanced project type to category mappings
-        type_mappings = {
-            "web_application": ["core", "development", "database", "external", "documentation"],
-            "api_service": ["core", "development", "database", "external", "documentation"],
-            "cli_tool": ["core", "development", "documentation"],
-            "data_pipeline": ["database", "core", "external"],
-            "ml_system": ["database", "core", "external", "documentation"],
-            "mobile_app": ["development", "external", "database"],
-            "desktop_app": ["development", "core", "database"],
-            "library": ["core", "development", "documentation"],
-            "automation": ["external", "communication", "core"],
-            "game": ["core", "development"],
-            "iot": ["core", "external", "database"],
-            "blockchain": ["core", "database", "external"],
-            "general": ["core", "documentation"]  # Core servers match all project types
-        }
-        
-        if project_type in type_mappings:
-            return category in type_mappings[project_type]
-        
-        return category == "core"
+        self.installed_servers = await self.inventory.get_installed()
     
     def _generate_reasons(self, server_info: Dict, tech_stack: List[str], 
                          requirements: List[str], complexity: str) -> List[str]:
@@ -2151,77 +3649,825 @@ NEXT.JS SPECIFIC:
                         priority=85
                     ))
 
+class ResearchCache:
+    """
+    Content-addressed on-disk cache for research results.
+    Entries expire after a TTL and the directory is kept under a size bound
+    by evicting the least recently used entries.
+    """
+    
+    def __init__(self, cache_dir: Path, ttl_seconds: float, max_bytes: int):
+        self.cache_dir = Path(cache_dir)
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.evictions = 0
+        self.expired = 0
+    
+    @staticmethod
+    def make_key(prompt: str, model: str, temperature: float) -> str:
+        """Hash the rendered prompt together with the sampling configuration"""
+        digest = hashlib.sha256()
+        for part in (model, f"{temperature:.4f}", prompt):
+            digest.update(part.encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+    
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a cached entry, or None on miss or expiry"""
+        path = self._entry_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self.misses += 1
+            return None
+        
+        if time.time() - entry.get("created_at", 0) > self.ttl_seconds:
+            self.expired += 1
+            self.misses += 1
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            return None
+        
+        # Touch the entry so eviction sees it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        
+        self.hits += 1
+        return entry
+    
+    def put(self, key: str, results: Dict[str, Any], raw_text: str, model: str, temperature: float):
+        """Store parsed results and raw response text"""
+        path = self._entry_path(key)
+        entry = {
+            "key": key,
+            "created_at": time.time(),
+            "model": model,
+            "temperature": temperature,
+            "results": results,
+            "raw_text": raw_text
+        }
+        
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # Write atomically
+            temp_file = path.with_suffix('.tmp')
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, default=str)
+            temp_file.replace(path)
+            
+            self.writes += 1
+            self._evict()
+        except OSError as e:
+            console.print(f"[yellow]Cache write failed in {self.cache_dir}: {e}[/yellow]")
+    
+    def _evict(self):
+        """Evict least recently used entries until the cache fits its size bound"""
+        entries = []
+        total_bytes = 0
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total_bytes += stat.st_size
+        
+        if total_bytes <= self.max_bytes:
+            return
+        
+        for _, size, path in sorted(entries):
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total_bytes -= size
+            self.evictions += 1
+            if total_bytes <= self.max_bytes:
+                break
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss counters for analytics"""
+        lookups = self.hits + self.misses
+        return {
+            "directory": str(self.cache_dir),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 3) if lookups else 0.0,
+            "writes": self.writes,
+            "evictions": self.evictions,
+            "expired": self.expired
+        }
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate for budgeting (about four characters per token)"""
+    return len(text) // 4 + 1
+
+def fit_lines(text: str, max_tokens: int) -> str:
+    """Keep whole leading lines of text within max_tokens"""
+    kept = []
+    used = 0
+    for line in text.splitlines():
+        used += estimate_tokens(line)
+        if used > max_tokens:
+            kept.append("...")
+            break
+        kept.append(line)
+    return "\n".join(kept)
+
+def compact_json(data: Any) -> str:
+    """Serialize without whitespace for prompt payloads"""
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False, default=str)
+
+def _longest_list(data: Any) -> Optional[list]:
+    longest = None
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            stack.extend(node.values())
+        elif isinstance(node, list):
+            if node and (longest is None or len(node) > len(longest)):
+                longest = node
+            stack.extend(node)
+    return longest
+
+def _truncate_strings(data: Any, max_chars: int) -> Any:
+    if isinstance(data, str):
+        return data if len(data) <= max_chars else data[:max_chars] + "…"
+    if isinstance(data, dict):
+        return {key: _truncate_strings(value, max_chars) for key, value in data.items()}
+    if isinstance(data, list):
+        return [_truncate_strings(item, max_chars) for item in data]
+    return data
+
+def fit_to_token_budget(data: Any, budget: int) -> Any:
+    """Trim a JSON-like payload until its compact form fits the token budget.
+    Drops items from the longest lists first, then shortens long strings."""
+    data = json.loads(compact_json(data))
+    while estimate_tokens(compact_json(data)) > budget:
+        longest = _longest_list(data)
+        if not longest or len(longest) <= 1:
+            break
+        longest.pop()
+    
+    max_chars = 2000
+    while estimate_tokens(compact_json(data)) > budget and max_chars >= 50:
+        data = _truncate_strings(data, max_chars)
+        max_chars //= 2
+    return data
+
+def estimate_request_tokens(params: Dict[str, Any]) -> int:
+    """Estimate input tokens of Messages API parameters"""
+    parts = []
+    system = params.get("system")
+    if isinstance(system, str):
+        parts.append(system)
+    elif system:
+        parts.extend(block.get("text", "") for block in system)
+    for message in params.get("messages", []):
+        content = message.get("content")
+        if isinstance(content, str):
+            parts.append(content)
+        elif content:
+            parts.extend(block.get("text", "") for block in content if isinstance(block, dict))
+    return estimate_tokens("\n".join(parts))
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at a per-minute rate.
+    """
+    
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+    
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def time_until(self, amount: float) -> float:
+        """Seconds until amount can be consumed"""
+        self._refill()
+        # Requests larger than the bucket go through once it is full
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+    
+    def consume(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+    
+    def adjust(self, amount: float):
+        """Return (or charge) tokens once the real usage is known"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+class APIRateLimiter:
+    """
+    Shared RPM/TPM budget and retry policy for Anthropic API calls.
+    Callers wait their turn in FIFO order; retryable failures back off with
+    jitter and a 429 pauses every caller until its Retry-After has elapsed.
+    """
+    
+    def __init__(self, requests_per_minute: int = API_REQUESTS_PER_MINUTE,
+                 tokens_per_minute: int = API_TOKENS_PER_MINUTE,
+                 max_retries: int = MAX_RETRIES,
+                 base_delay: float = RETRY_DELAY,
+                 max_delay: float = API_MAX_RETRY_DELAY):
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute > 0 else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = asyncio.Lock()
+        self._paused_until = 0.0
+        
+        # Metrics
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+        self.total_queue_wait = 0.0
+        self.max_queue_wait = 0.0
+    
+    async def acquire(self, estimated_tokens: int = 0) -> float:
+        """Wait for request and token budget; returns the time spent queued"""
+        start = time.monotonic()
+        
+        async with self._lock:
+            while True:
+                delay = self._paused_until - time.monotonic()
+                if self.request_bucket:
+                    delay = max(delay, self.request_bucket.time_until(1))
+                if self.token_bucket:
+                    delay = max(delay, self.token_bucket.time_until(estimated_tokens))
+                
+                if delay <= 0:
+                    break
+                await asyncio.sleep(delay)
+            
+            if self.request_bucket:
+                self.request_bucket.consume(1)
+            if self.token_bucket:
+                self.token_bucket.consume(estimated_tokens)
+        
+        waited = time.monotonic() - start
+        self.requests += 1
+        self.total_queue_wait += waited
+        self.max_queue_wait = max(self.max_queue_wait, waited)
+        return waited
+    
+    async def call(self, func: Callable[..., Any], *args, estimated_tokens: int = 0, **kwargs) -> Any:
+        """Call an async API function within budget, retrying transient failures"""
+        attempt = 0
+        while True:
+            await self.acquire(estimated_tokens)
+            try:
+                response = await func(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.max_retries or not self._is_retryable(e):
+                    self.failures += 1
+                    raise
+                
+                delay = self._retry_delay(e, attempt)
+                if getattr(e, 'status_code', None) == 429:
+                    self.rate_limited += 1
+                    self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                
+                self.retries += 1
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            
+            self._reconcile(estimated_tokens, getattr(response, 'usage', None))
+            return response
+    
+    def _reconcile(self, estimated_tokens: int, usage: Optional[Any]):
+        """Correct the token budget with the input tokens actually billed"""
+        if not self.token_bucket or not usage:
+            return
+        actual = (getattr(usage, 'input_tokens', 0) or 0) + (getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+        self.token_bucket.adjust(estimated_tokens - actual)
+    
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if getattr(error, 'status_code', None) in RETRYABLE_STATUS_CODES:
+            return True
+        # Connection and timeout errors from the SDK carry no status code
+        if type(error).__name__ in ("APIConnectionError", "APITimeoutError"):
+            return True
+        return isinstance(error, (ConnectionError, asyncio.TimeoutError))
+    
+    def _retry_delay(self, error: Exception, attempt: int) -> float:
+        """Honour Retry-After when present, otherwise jittered exponential backoff"""
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        retry_after = headers.get("retry-after")
+        if retry_after:
+            try:
+                return min(self.max_delay, float(retry_after)) + random.uniform(0, 1)
+            except ValueError:
+                pass
+        
+        backoff = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(backoff / 2, backoff)
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get limiter metrics for analytics"""
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+            "total_queue_wait": round(self.total_queue_wait, 2),
+            "avg_queue_wait": round(self.total_queue_wait / self.requests, 3) if self.requests else 0.0,
+            "max_queue_wait": round(self.max_queue_wait, 2)
+        }
+
+_api_rate_limiter: Optional[APIRateLimiter] = None
+
+def get_api_rate_limiter() -> APIRateLimiter:
+    """Get the process-wide API rate limiter"""
+    global _api_rate_limiter
+    if _api_rate_limiter is None:
+        _api_rate_limiter = APIRateLimiter()
+    return _api_rate_limiter
+
+def configure_api_rate_limiter(requests_per_minute: int, tokens_per_minute: int) -> APIRateLimiter:
+    """Replace the process-wide API rate limiter with new budgets"""
+    global _api_rate_limiter
+    _api_rate_limiter = APIRateLimiter(requests_per_minute, tokens_per_minute)
+    return _api_rate_limiter
+
+def extract_message_text(message: Any) -> str:
+    """Concatenate the text blocks of a Messages API response"""
+    content = ""
+    if getattr(message, 'content', None):
+        for block in message.content:
+            if hasattr(block, 'text'):
+                content += block.text
+    return content
+
+class IncrementalJSONFieldParser:
+    """
+    Incremental decoder for a streamed JSON object.
+    Emits each top-level field as soon as its value closes, ignoring any
+    prose or code fence before the opening brace.
+    """
+    
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.member_start = 0
+        self.complete = False
+        self.fields: Dict[str, Any] = {}
+    
+    def feed(self, text: str) -> List[Tuple[str, Any]]:
+        """Consume a chunk of text and return fields completed by it"""
+        self.buffer += text
+        emitted = []
+        
+        while self.pos < len(self.buffer) and not self.complete:
+            ch = self.buffer[self.pos]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif self.depth == 0:
+                if ch == '{':
+                    self.depth = 1
+                    self.member_start = self.pos + 1
+            elif ch == '"':
+                self.in_string = True
+            elif ch in '{[':
+                self.depth += 1
+            elif ch in '}]':
+                self.depth -= 1
+                if self.depth == 0:
+                    self._emit_member(self.pos, emitted)
+                    self.complete = True
+            elif ch == ',' and self.depth == 1:
+                self._emit_member(self.pos, emitted)
+                self.member_start = self.pos + 1
+            self.pos += 1
+        
+        return emitted
+    
+    def _emit_member(self, end: int, emitted: List[Tuple[str, Any]]):
+        member = self.buffer[self.member_start:end].strip()
+        if not member:
+            return
+        try:
+            decoded = json.loads("{" + member + "}")
+        except json.JSONDecodeError:
+            return
+        for key, value in decoded.items():
+            self.fields[key] = value
+            emitted.append((key, value))
+
+class ResearchBatchClient(abc.ABC):
+    """
+    Interface for running research requests as a single message batch.
+    Requests use the Message Batches shape: {"custom_id": ..., "params": ...}.
+    """
+    
+    def __init__(self, poll_interval: float = RESEARCH_BATCH_POLL_INTERVAL,
+                 deadline: float = RESEARCH_BATCH_DEADLINE):
+        self.poll_interval = poll_interval
+        self.deadline = deadline
+    
+    @abc.abstractmethod
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """Submit requests and return the batch id"""
+    
+    @abc.abstractmethod
+    async def poll(self, batch_id: str) -> Dict[str, Any]:
+        """Return {"ended": bool, "completed": int, "total": int} for a batch"""
+    
+    @abc.abstractmethod
+    async def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        """Return {custom_id: {"text", "usage"}} or {custom_id: {"error"}} for an ended batch"""
+    
+    async def cancel(self, batch_id: str):
+        """Stop an unfinished batch (best effort)"""
+
+class AnthropicBatchClient(ResearchBatchClient):
+    """
+    Research batches backed by the Anthropic Message Batches API.
+    """
+    
+    def __init__(self, anthropic_client: AsyncAnthropic, poll_interval: float = RESEARCH_BATCH_POLL_INTERVAL,
+                 deadline: float = RESEARCH_BATCH_DEADLINE):
+        super().__init__(poll_interval, deadline)
+        self.anthropic = anthropic_client
+    
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch = await self.anthropic.messages.batches.create(requests=requests)
+        return batch.id
+    
+    async def poll(self, batch_id: str) -> Dict[str, Any]:
+        batch = await self.anthropic.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        total = counts.processing + counts.succeeded + counts.errored + counts.canceled + counts.expired
+        return {
+            "ended": batch.processing_status == "ended",
+            "completed": total - counts.processing,
+            "total": total
+        }
+    
+    async def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        async for entry in await self.anthropic.messages.batches.results(batch_id):
+            if entry.result.type == "succeeded":
+                message = entry.result.message
+                results[entry.custom_id] = {
+                    "text": extract_message_text(message),
+                    "usage": message.usage
+                }
+            elif entry.result.type == "expired":
+                results[entry.custom_id] = {"error": "expired", "expired": True}
+            else:
+                error = getattr(getattr(entry.result, 'error', None), 'error', None)
+                results[entry.custom_id] = {
+                    "error": getattr(error, 'message', None) or entry.result.type
+                }
+        return results
+    
+    async def cancel(self, batch_id: str):
+        await self.anthropic.messages.batches.cancel(batch_id)
+
+class FileBatchClient(ResearchBatchClient):
+    """
+    Local stand-in for the Message Batches API.
+    Each batch is a directory holding requests.jsonl; the batch ends once a
+    results.jsonl in the Message Batches results format appears next to it.
+    An optional responder callable answers requests immediately.
+    """
+    
+    def __init__(self, batch_dir: Path, responder: Optional[Callable[[Dict[str, Any]], str]] = None,
+                 poll_interval: float = 1.0, deadline: float = RESEARCH_BATCH_DEADLINE):
+        super().__init__(poll_interval, deadline)
+        self.batch_dir = Path(batch_dir)
+        self.responder = responder
+    
+    async def submit(self, requests: List[Dict[str, Any]]) -> str:
+        batch_id = f"msgbatch_{uuid.uuid4().hex[:24]}"
+        batch_path = self.batch_dir / batch_id
+        batch_path.mkdir(parents=True, exist_ok=True)
+        
+        with open(batch_path / "requests.jsonl", 'w', encoding='utf-8') as f:
+            for request in requests:
+                f.write(json.dumps(request) + "\n")
+        
+        if self.responder:
+            with open(batch_path / "results.jsonl", 'w', encoding='utf-8') as f:
+                for request in requests:
+                    text = self.responder(request["params"])
+                    f.write(json.dumps({
+                        "custom_id": request["custom_id"],
+                        "result": {
+                            "type": "succeeded",
+                            "message": {"content": [{"type": "text", "text": text}]}
+                        }
+                    }) + "\n")
+        
+        return batch_id
+    
+    async def poll(self, batch_id: str) -> Dict[str, Any]:
+        batch_path = self.batch_dir / batch_id
+        with open(batch_path / "requests.jsonl", 'r', encoding='utf-8') as f:
+            total = sum(1 for line in f if line.strip())
+        ended = (batch_path / "results.jsonl").exists()
+        return {"ended": ended, "completed": total if ended else 0, "total": total}
+    
+    async def results(self, batch_id: str) -> Dict[str, Dict[str, Any]]:
+        results = {}
+        with open(self.batch_dir / batch_id / "results.jsonl", 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                result = entry.get("result", {})
+                if result.get("type") == "succeeded":
+                    message = result.get("message", {})
+                    usage = message.get("usage")
+                    results[entry["custom_id"]] = {
+                        "text": "".join(block.get("text", "") for block in message.get("content", [])),
+                        "usage": SimpleNamespace(**usage) if usage else None
+                    }
+                else:
+                    results[entry["custom_id"]] = {"error": result.get("type", "unknown")}
+        return results
+
 class ResearchAgent:
     """
     Enhanced research agent using Anthropic SDK for knowledge-based analysis.
     """
     
-    def __init__(self, name: str, specialty: str, anthropic_client: Optional[AsyncAnthropic] = None):
+    def __init__(self, name: str, specialty: str, anthropic_client: Optional[AsyncAnthropic] = None,
+                 cache: Optional[ResearchCache] = None, cost_tracker: Optional[CostTracker] = None,
+                 stream_responses: bool = True):
         self.name = name
         self.specialty = specialty
         self.anthropic = anthropic_client
+        self.cache = cache
+        self.cost_tracker = cost_tracker
+        self.stream_responses = stream_responses
         self.research_model = DEFAULT_RESEARCH_MODEL
+        self.research_temperature = 0.1  # Lower temperature for factual research
     
     async def research(self, query: ResearchQuery, context: Dict[str, Any]) -> Dict[str, Any]:
         """Conduct knowledge-based research using Anthropic SDK"""
+        results = await self.research_queries([query], context)
+        return results[query.id]
+    
+    async def research_queries(self, queries: List[ResearchQuery], context: Dict[str, Any],
+                               partial: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Dict[str, Any]]:
+        """Answer several queries in one call, returning results keyed by query id.
+        When streaming, completed fields are recorded in partial as they arrive."""
         if not self.anthropic:
-            return {"error": "Anthropic client not available", "agent": self.name}
+            return {query.id: {"error": "Anthropic client not available", "agent": self.name} for query in queries}
         
-        research_prompt = self._create_research_prompt(query, context)
+        # Serve identical prompts from the research cache
+        results = {}
+        cache_keys = {}
+        pending = []
+        for query in queries:
+            cache_key, cached = self.lookup_cache(query, context)
+            if cached:
+                results[query.id] = cached
+            else:
+                cache_keys[query.id] = cache_key
+                pending.append(query)
+        
+        if not pending:
+            return results
         
         try:
             # Use Anthropic SDK for knowledge-based research
-            response = await self.anthropic.messages.create(
-                model=self.research_model,
-                max_tokens=4096,
-                temperature=0.1,  # Lower temperature for factual research
-                messages=[{
-                    "role": "user",
-                    "content": research_prompt
-                }]
-            )
-            
-            # Extract content from response
-            content = ""
-            if response.content:
-                for block in response.content:
-                    if hasattr(block, 'text'):
-                        content += block.text
-            
-            # Parse and enhance results
-            results = self._parse_research_results(content)
-            
-            # Add confidence score based on response quality
-            results["confidence"] = self._calculate_confidence(results)
-            results["agent"] = self.name
-            results["specialty"] = self.specialty
+            params = self.build_request_params(pending, context)
+            if self.stream_responses:
+                pending_ids = {query.id for query in pending}
+                
+                def record_field(key: str, value: Any):
+                    if partial is None:
+                        return
+                    if len(pending) == 1:
+                        partial.setdefault(pending[0].id, {})[key] = value
+                    elif key in pending_ids and isinstance(value, dict):
+                        partial[key] = value
+                
+                response = await get_api_rate_limiter().call(
+                    self._stream_message, params, record_field,
+                    estimated_tokens=estimate_request_tokens(params)
+                )
+            else:
+                response = await get_api_rate_limiter().call(
+                    self.anthropic.messages.create, estimated_tokens=estimate_request_tokens(params), **params
+                )
             
-            return results
+            results.update(self.process_response(
+                extract_message_text(response), pending, getattr(response, 'usage', None), cache_keys
+            ))
             
         except Exception as e:
-            return {
-                "error": str(e), 
-                "agent": self.name,
-                "specialty": self.specialty
-            }
+            for query in pending:
+                results[query.id] = {
+                    "error": str(e), 
+                    "agent": self.name,
+                    "specialty": self.specialty
+                }
+            return results
+        
+        # Ask again one at a time for any section the merged answer dropped
+        missing = [query for query in pending if query.id not in results]
+        if len(pending) > 1:
+            for query in missing:
+                results.update(await self.research_queries([query], context))
+        
+        return results
+    
+    async def _stream_message(self, params: Dict[str, Any], on_field: Callable[[str, Any], None]) -> Any:
+        """Stream a response, reporting top-level JSON fields as they complete"""
+        parser = IncrementalJSONFieldParser()
+        async with self.anthropic.messages.stream(**params) as stream:
+            async for text in stream.text_stream:
+                for key, value in parser.feed(text):
+                    on_field(key, value)
+            return await stream.get_final_message()
+    
+    def salvage_partial(self, partial: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Turn fields streamed before a timeout into (uncached) partial results"""
+        results = {}
+        for query_id, fields in partial.items():
+            if fields:
+                result = self._finalize_results(self._normalize_results(dict(fields)))
+                result["partial"] = True
+                results[query_id] = result
+        return results
+    
+    def build_request_params(self, queries: List[ResearchQuery], context: Dict[str, Any]) -> Dict[str, Any]:
+        """Build Messages API parameters for one or more research queries"""
+        if len(queries) == 1:
+            prompt_prefix, prompt_suffix = self._create_research_prompt_parts(queries[0], context)
+        else:
+            prompt_prefix, prompt_suffix = self._create_multi_research_prompt_parts(queries, context)
+        
+        # The shared prefix goes in the system prompt behind a cache marker
+        # so every agent reuses it; the API ignores markers on short prefixes
+        system_block = {"type": "text", "text": prompt_prefix}
+        if estimate_tokens(prompt_prefix) >= PROMPT_CACHE_MIN_TOKENS:
+            system_block["cache_control"] = {"type": "ephemeral"}
+        
+        return {
+            "model": self.research_model,
+            "max_tokens": min(RESEARCH_MAX_TOKENS_PER_QUERY * len(queries), RESEARCH_MAX_OUTPUT_TOKENS),
+            "temperature": self.research_temperature,
+            "system": [system_block],
+            "messages": [{
+                "role": "user",
+                "content": prompt_suffix
+            }]
+        }
+    
+    def lookup_cache(self, query: ResearchQuery, context: Dict[str, Any]) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return the cache key and any cached results for a query"""
+        if not self.cache:
+            return None, None
+        
+        cache_key = self.cache.make_key(
+            self._create_research_prompt(query, context), self.research_model, self.research_temperature
+        )
+        cached = self.cache.get(cache_key)
+        if not cached:
+            return cache_key, None
+        
+        results = self._finalize_results(dict(cached["results"]))
+        results["cached"] = True
+        return cache_key, results
+    
+    def process_response(self, content: str, queries: List[ResearchQuery], usage: Optional[Any] = None,
+                         cache_keys: Optional[Dict[str, Optional[str]]] = None,
+                         batch: bool = False) -> Dict[str, Dict[str, Any]]:
+        """Record usage, then parse, split and cache a research response"""
+        if self.cost_tracker:
+            self.cost_tracker.add_usage(usage, self.research_model, "research", batch=batch)
+        
+        # Parse and enhance results
+        if len(queries) == 1:
+            sections = {queries[0].id: self._parse_research_results(content)}
+        else:
+            sections = self._parse_multi_research_results(content, queries)
+        
+        results = {}
+        for query_id, section in sections.items():
+            cache_key = (cache_keys or {}).get(query_id)
+            # Responses that only parsed through the text fallback are not cached, so a rerun asks again
+            if cache_key and section.get("parsing_method") != "fallback":
+                raw_text = content if len(queries) == 1 else json.dumps(section)
+                self.cache.put(cache_key, section, raw_text, self.research_model, self.research_temperature)
+            results[query_id] = self._finalize_results(section)
+        
+        return results
+    
+    def with_model(self, model: str) -> 'ResearchAgent':
+        """Copy of this agent that researches with a different model"""
+        clone = copy.copy(self)
+        clone.research_model = model
+        return clone
+    
+    def _finalize_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Attach confidence and agent metadata to parsed results"""
+        # Add confidence score based on response quality
+        results["confidence"] = self._calculate_confidence(results)
+        results["agent"] = self.name
+        results["specialty"] = self.specialty
+        return results
+    
+    def _create_research_prompt(self, query: ResearchQuery, context: Dict[str, Any]) -> str:
+        """Create enhanced research prompt focusing on specific areas"""
+        prefix, suffix = self._create_research_prompt_parts(query, context)
+        return f"{prefix}\n\n{suffix}"
+    
+    def _create_research_prompt_parts(self, query: ResearchQuery, context: Dict[str, Any]) -> Tuple[str, str]:
+        """Split the research prompt into a prefix shared by all agents and a per-call suffix"""
+        focus_areas_str = self._format_focus_areas(query)
+        
+        suffix = f"""You are a {self.specialty} research specialist.
+
+RESEARCH QUERY: {query.query}
+{focus_areas_str}
+
+Provide comprehensive, expert-level analysis based on current industry standards."""
+        
+        return self._create_research_prefix(context), suffix
+    
+    def _create_multi_research_prompt_parts(self, queries: List[ResearchQuery],
+                                            context: Dict[str, Any]) -> Tuple[str, str]:
+        """Create a prompt answering several queries with one section per query id"""
+        query_blocks = []
+        for query in queries:
+            query_blocks.append(f"""QUERY ID: {query.id}
+RESEARCH QUERY: {query.query}{self._format_focus_areas(query)}""")
+        
+        query_ids = ", ".join(f'"{query.id}"' for query in queries)
+        suffix = f"""You are a {self.specialty} research specialist.
+
+Answer each of the following research queries from the perspective of your specialty.
+
+{chr(10).join(query_blocks)}
+
+Respond with a single JSON object whose keys are the query ids ({query_ids}).
+Each value must be a complete answer for that query in the response format above.
+
+Provide comprehensive, expert-level analysis based on current industry standards."""
+        
+        return self._create_research_prefix(context), suffix
     
-    def _create_research_prompt(self, query: ResearchQuery, context: Dict[str, Any]) -> str:
-        """Create enhanced research prompt focusing on specific areas"""
-        focus_areas_str = ""
-        if query.focus_areas:
-            focus_areas_str = f"\nFOCUS AREAS:\n" + "\n".join(f"- {area}" for area in query.focus_areas)
+    @staticmethod
+    def _format_focus_areas(query: ResearchQuery) -> str:
+        if not query.focus_areas:
+            return ""
+        return f"\nFOCUS AREAS:\n" + "\n".join(f"- {area}" for area in query.focus_areas)
+    
+    @staticmethod
+    def _create_research_prefix(context: Dict[str, Any]) -> str:
+        """Create the stable prompt prefix: role, project context, specification, instructions and schema"""
+        specification = fit_lines(context.get('specification', '').strip(), RESEARCH_PREFIX_SPEC_TOKENS)
+        spec_block = f"""
+PROJECT SPECIFICATION (excerpt):
+{specification}
+""" if specification else ""
         
-        return f"""You are a {self.specialty} research specialist providing expert analysis for a software project.
-
-RESEARCH QUERY: {query.query}
+        return f"""You are a research specialist providing expert analysis for a software project.
 
 PROJECT CONTEXT:
 - Project Type: {context.get('project_type', 'Unknown')}
 - Technology Stack: {', '.join(context.get('technology_stack', []))}
 - Requirements: {', '.join(context.get('requirements', []))}
 - Complexity: {context.get('complexity', 'medium')}
-{focus_areas_str}
-
+{spec_block}
 RESEARCH INSTRUCTIONS:
 1. Provide current best practices and patterns (as of 2024-2025)
 2. Include specific implementation details and code examples
@@ -2230,6 +4476,7 @@ RESEARCH INSTRUCTIONS:
 5. Provide concrete, actionable recommendations
 6. Include version numbers and tool recommendations
 7. Address the specific focus areas if provided
+8. Ground recommendations in the specification: prefer the technologies and constraints it names
 
 Structure your response as JSON with the following format:
 {{
@@ -2244,9 +4491,7 @@ Structure your response as JSON with the following format:
     "common_pitfalls": ["Common mistakes to avoid"],
     "resources": ["Key documentation or learning resources"],
     "confidence_level": "High/Medium/Low"
-}}
-
-Provide comprehensive, expert-level analysis based on current industry standards."""
+}}"""
     
     def _parse_research_results(self, content: str) -> Dict[str, Any]:
         """Parse research results with enhanced error handling"""
@@ -2254,29 +4499,48 @@ Provide comprehensive, expert-level analysis based on current industry standards
             # Try to extract JSON from response
             json_match = re.search(r'\{[\s\S]*\}', content)
             if json_match:
-                results = json.loads(json_match.group())
-                
-                # Validate and enhance results
-                required_keys = ["summary", "recommendations", "best_practices"]
-                for key in required_keys:
-                    if key not in results:
-                        results[key] = []
-                
-                # Ensure all lists are actually lists
-                list_keys = ["key_insights", "recommendations", "best_practices", 
-                           "implementation_patterns", "security_considerations",
-                           "performance_tips", "common_pitfalls", "resources"]
-                for key in list_keys:
-                    if key in results and not isinstance(results[key], list):
-                        results[key] = [results[key]] if results[key] else []
-                
-                return results
+                return self._normalize_results(json.loads(json_match.group()))
             else:
                 # Fallback parsing for non-JSON responses
                 return self._fallback_parse(content)
         except json.JSONDecodeError:
             return self._fallback_parse(content)
     
+    def _parse_multi_research_results(self, content: str, queries: List[ResearchQuery]) -> Dict[str, Dict[str, Any]]:
+        """Split a merged response into per-query results; missing sections are omitted"""
+        json_match = re.search(r'\{[\s\S]*\}', content)
+        if not json_match:
+            return {}
+        
+        try:
+            payload = json.loads(json_match.group())
+        except json.JSONDecodeError:
+            return {}
+        
+        sections = {}
+        for query in queries:
+            section = payload.get(query.id)
+            if isinstance(section, dict):
+                sections[query.id] = self._normalize_results(section)
+        return sections
+    
+    def _normalize_results(self, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Validate parsed research results"""
+        required_keys = ["summary", "recommendations", "best_practices"]
+        for key in required_keys:
+            if key not in results:
+                results[key] = []
+        
+        # Ensure all lists are actually lists
+        list_keys = ["key_insights", "recommendations", "best_practices", 
+                   "implementation_patterns", "security_considerations",
+                   "performance_tips", "common_pitfalls", "resources"]
+        for key in list_keys:
+            if key in results and not isinstance(results[key], list):
+                results[key] = [results[key]] if results[key] else []
+        
+        return results
+    
     def _fallback_parse(self, content: str) -> Dict[str, Any]:
         """Fallback parsing when JSON extraction fails"""
         # Extract key sections using patterns
@@ -2348,17 +4612,157 @@ Provide comprehensive, expert-level analysis based on current industry standards
         # Cap at 1.0
         return min(confidence, 1.0)
 
+class NearDuplicateCollapser:
+    """
+    Collapses paraphrased findings using MinHash signatures over word shingles.
+    Banded LSH proposes candidate pairs in roughly linear time; pairs whose
+    estimated Jaccard similarity reaches the threshold are merged with
+    union-find. Uses NumPy when available and identical pure-Python hashing
+    otherwise, so results do not depend on the environment.
+    """
+    
+    PRIME = 4294967291  # Largest prime below 2**32
+    
+    def __init__(self, threshold: float = RESEARCH_DEDUP_THRESHOLD, num_perm: int = 64,
+                 shingle_size: int = 2, seed: int = 1):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self.coeff_a = [rng.randrange(1, self.PRIME) for _ in range(num_perm)]
+        self.coeff_b = [rng.randrange(0, self.PRIME) for _ in range(num_perm)]
+        self.bands, self.rows = self._choose_bands(threshold, num_perm)
+    
+    @staticmethod
+    def _choose_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+        """Pick bands x rows whose LSH threshold (1/b)^(1/r) is closest to the target"""
+        best = (num_perm, 1)
+        best_error = float("inf")
+        for rows in range(1, num_perm + 1):
+            if num_perm % rows:
+                continue
+            bands = num_perm // rows
+            error = abs((1.0 / bands) ** (1.0 / rows) - threshold)
+            if error < best_error:
+                best, best_error = (bands, rows), error
+        return best
+    
+    def _shingle_hashes(self, text: str) -> List[int]:
+        words = re.findall(r'[a-z0-9]+', text.lower())
+        if len(words) < self.shingle_size:
+            shingles = [" ".join(words)] if words else []
+        else:
+            shingles = [" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)]
+        return sorted({zlib.crc32(shingle.encode("utf-8")) % self.PRIME for shingle in shingles})
+    
+    def _signatures(self, shingle_sets: List[List[int]]) -> List[Tuple[int, ...]]:
+        """MinHash signature per item: min over shingles of (a*x + b) mod p"""
+        if NUMPY_AVAILABLE:
+            lengths = np.array([len(hashes) for hashes in shingle_sets], dtype=np.int64)
+            flat = np.fromiter((h for hashes in shingle_sets for h in hashes), dtype=np.uint64, count=int(lengths.sum()))
+            a = np.array(self.coeff_a, dtype=np.uint64)[:, None]
+            b = np.array(self.coeff_b, dtype=np.uint64)[:, None]
+            # Products stay below 2**64 because every operand is below 2**32
+            hashed = (a * flat[None, :] + b) % np.uint64(self.PRIME)
+            offsets = np.concatenate(([0], np.cumsum(lengths)[:-1]))
+            minima = np.minimum.reduceat(hashed, offsets, axis=1)
+            return [tuple(int(v) for v in column) for column in minima.T]
+        
+        return [
+            tuple(min((a * h + b) % self.PRIME for h in hashes) for a, b in zip(self.coeff_a, self.coeff_b))
+            for hashes in shingle_sets
+        ]
+    
+    def collapse(self, items: List[Any]) -> List[Tuple[Any, int]]:
+        """Return (representative, cluster size) pairs, largest clusters first"""
+        parent = list(range(len(items)))
+        
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+        
+        def union(i: int, j: int):
+            root_i, root_j = find(i), find(j)
+            if root_i != root_j:
+                # Keep the earliest item as the cluster representative
+                parent[max(root_i, root_j)] = min(root_i, root_j)
+        
+        # Exact duplicates and non-text items are grouped by their serialized form
+        exact: Dict[str, int] = {}
+        text_indices = []
+        shingle_sets = []
+        for index, item in enumerate(items):
+            marker = item.strip().lower() if isinstance(item, str) else compact_json(item)
+            if marker in exact:
+                union(exact[marker], index)
+                continue
+            exact[marker] = index
+            if isinstance(item, str):
+                hashes = self._shingle_hashes(item)
+                if hashes:
+                    text_indices.append(index)
+                    shingle_sets.append(hashes)
+        
+        if len(text_indices) > 1 and self.threshold < 1.0:
+            signatures = self._signatures(shingle_sets)
+            
+            # Banded LSH: items sharing any band bucket become candidates
+            candidates = set()
+            for band in range(self.bands):
+                buckets: Dict[Tuple[int, ...], List[int]] = defaultdict(list)
+                start = band * self.rows
+                for position, signature in enumerate(signatures):
+                    buckets[signature[start:start + self.rows]].append(position)
+                for members in buckets.values():
+                    for other in members[1:]:
+                        candidates.add((members[0], other))
+            
+            for i, j in candidates:
+                matches = sum(1 for x, y in zip(signatures[i], signatures[j]) if x == y)
+                if matches / self.num_perm >= self.threshold:
+                    union(text_indices[i], text_indices[j])
+        
+        sizes = Counter(find(index) for index in range(len(items)))
+        ranked = sorted(sizes.items(), key=lambda entry: (-entry[1], entry[0]))
+        return [(items[root], size) for root, size in ranked]
+
 class ResearchManager:
     """
     Enhanced research manager with better coordination and synthesis.
     """
     
-    def __init__(self, anthropic_client: Optional[AsyncAnthropic] = None):
+    def __init__(self, anthropic_client: Optional[AsyncAnthropic] = None,
+                 max_concurrency: int = RESEARCH_MAX_CONCURRENCY,
+                 agent_timeout: float = RESEARCH_AGENT_TIMEOUT,
+                 cache: Optional[ResearchCache] = None,
+                 cost_tracker: Optional[CostTracker] = None,
+                 batch_client: Optional[ResearchBatchClient] = None,
+                 stream_responses: bool = True,
+                 dedup_threshold: float = RESEARCH_DEDUP_THRESHOLD,
+                 coverage_confidence: float = RESEARCH_COVERAGE_CONFIDENCE,
+                 coverage_items: int = RESEARCH_COVERAGE_ITEMS,
+                 hedge_percentile: float = RESEARCH_HEDGE_PERCENTILE,
+                 hedge_model: str = RESEARCH_HEDGE_MODEL):
         self.anthropic = anthropic_client
+        self.cache = cache
+        self.cost_tracker = cost_tracker
+        self.batch_client = batch_client
+        self.stream_responses = stream_responses
+        self.deduplicator = NearDuplicateCollapser(dedup_threshold)
+        self.coverage_confidence = coverage_confidence
+        self.coverage_items = coverage_items
+        self.hedge_percentile = hedge_percentile
+        self.hedge_model = hedge_model
+        self.scheduler_stats = {"cancelled": 0, "hedged": 0, "hedge_wins": 0}
         self.agents = self._create_research_agents()
         self.active_queries: Dict[str, ResearchQuery] = {}
         self.research_history: List[Dict[str, Any]] = []
         self.synthesis_model = DEFAULT_ANALYZER_MODEL  # Use best model for synthesis
+        self.summary_model = SYNTHESIS_SUMMARY_MODEL  # Cheaper model for per-query summaries
+        self.max_concurrency = max(1, max_concurrency)
+        self.agent_timeout = agent_timeout
     
     def _create_research_agents(self) -> Dict[str, ResearchAgent]:
         """Create specialized research agents with enhanced capabilities"""
@@ -2366,84 +4770,80 @@ class ResearchManager:
             "technology": ResearchAgent(
                 "Technology Analyst", 
                 "technology stack analysis, framework selection, and tooling recommendations", 
-                self.anthropic
+                self.anthropic,
+                self.cache,
+                self.cost_tracker,
+                self.stream_responses
             ),
             "security": ResearchAgent(
                 "Security Specialist", 
                 "cybersecurity, authentication, authorization, and data protection", 
-                self.anthropic
+                self.anthropic,
+                self.cache,
+                self.cost_tracker,
+                self.stream_responses
             ),
             "performance": ResearchAgent(
                 "Performance Engineer", 
                 "performance optimization, scalability, caching, and resource management", 
-                self.anthropic
+                self.anthropic,
+                self.cache,
+                self.cost_tracker,
+                self.stream_responses
             ),
             "architecture": ResearchAgent(
                 "Solutions Architect", 
                 "system architecture, design patterns, microservices, and integration", 
-                self.anthropic
+                self.anthropic,
+                self.cache,
+                self.cost_tracker,
+                self.stream_responses
             ),
             "best_practices": ResearchAgent(
                 "Best Practices Advisor", 
                 "industry standards, coding conventions, and development workflows", 
-                self.anthropic
+                self.anthropic,
+                self.cache,
+                self.cost_tracker,
+                self.stream_responses
             ),
             "testing": ResearchAgent(
                 "Quality Assurance Expert",
                 "testing strategies, automation, CI/CD, and quality metrics",
-                self.anthropic
+                self.anthropic,
+                self.cache,
+                self.cost_tracker,
+                self.stream_responses
             ),
             "deployment": ResearchAgent(
                 "DevOps Specialist",
                 "deployment strategies, containerization, monitoring, and infrastructure",
-                self.anthropic
+                self.anthropic,
+                self.cache,
+                self.cost_tracker,
+                self.stream_responses
             )
         }
     
-    async def conduct_comprehensive_research(self, specification: str, 
-                                           project_context: Dict[str, Any]) -> Dict[str, Any]:
+    async def conduct_comprehensive_research(self, specification: str,
+                                           project_context: Dict[str, Any],
+                                           progress_callback: Optional[Callable[[int, int], Any]] = None) -> Dict[str, Any]:
         """Conduct enhanced multi-agent research with synthesis"""
-        if not self.anthropic:
+        if not self.anthropic and not self.batch_client:
             return {"error": "Research requires Anthropic API key"}
         
         research_queries = self._generate_research_queries(specification, project_context)
-        
-        # Execute research queries in parallel with progress tracking
-        research_tasks = []
         for query in research_queries:
             self.active_queries[query.id] = query
-            
-            # Assign agents based on query focus areas
-            assigned_agents = self._assign_agents_to_query(query)
-            
-            for agent_name in assigned_agents:
-                if agent_name in self.agents:
-                    task = self.agents[agent_name].research(query, project_context)
-                    research_tasks.append((agent_name, query.id, task))
         
-        # Wait for all research to complete with timeout
-        results = {}
-        completed = 0
-        total = len(research_tasks)
+        jobs = self._plan_research_jobs(research_queries)
         
-        for agent_name, query_id, task in research_tasks:
-            try:
-                # Add timeout to prevent hanging
-                result = await asyncio.wait_for(task, timeout=120.0)  # 2 minute timeout
-                
-                if query_id not in results:
-                    results[query_id] = {}
-                results[query_id][agent_name] = result
-                
-                completed += 1
-                # Update progress in active queries
-                if query_id in self.active_queries:
-                    self.active_queries[query_id].status = f"completed_{completed}/{total}"
-                    
-            except asyncio.TimeoutError:
-                console.print(f"[yellow]Research timeout for {agent_name}[/yellow]")
-            except Exception as e:
-                console.print(f"[red]Research failed for {agent_name}: {e}[/red]")
+        if self.batch_client:
+            # Submit everything as one message batch and wait for it
+            results = await self._run_research_batch(jobs, project_context, progress_callback)
+        else:
+            # Run all jobs concurrently, collecting results as they complete
+            results = await self._run_research_jobs(jobs, project_context, progress_callback)
         
         # Synthesize results with enhanced analysis
         synthesized_results = await self._enhanced_synthesis(results, project_context)
@@ -2465,6 +4865,187 @@ class ResearchManager:
         
         return synthesized_results
     
+    def _plan_research_jobs(self, research_queries: List[ResearchQuery]) -> List[ResearchJob]:
+        """Group the queries assigned to each agent into merged multi-query jobs"""
+        agent_queries: Dict[str, List[ResearchQuery]] = {}
+        for query in research_queries:
+            # Assign agents based on query focus areas
+            for agent_name in self._assign_agents_to_query(query):
+                if agent_name in self.agents:
+                    agent_queries.setdefault(agent_name, []).append(query)
+        
+        jobs = []
+        for agent_name, queries in agent_queries.items():
+            for start in range(0, len(queries), RESEARCH_MAX_QUERIES_PER_CALL):
+                jobs.append(ResearchJob(
+                    agent_name=agent_name,
+                    queries=queries[start:start + RESEARCH_MAX_QUERIES_PER_CALL]
+                ))
+        return jobs
+    
+    async def _run_research_jobs(self, jobs: List[ResearchJob], project_context: Dict[str, Any],
+                                 progress_callback: Optional[Callable[[int, int], Any]] = None
+                                 ) -> Dict[str, Dict[str, Any]]:
+        """Run research jobs through a bounded pool, collecting results as they complete.
+        Jobs whose queries are already covered are cancelled, and slow jobs are
+        hedged with a cheaper-model duplicate; whichever copy answers first wins."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        hedge_semaphore = asyncio.Semaphore(max(1, self.max_concurrency // 2))
+        tasks = {
+            asyncio.create_task(self._run_research_job(job, project_context, semaphore)): job
+            for job in jobs
+        }
+        copies = {job.job_id: [task] for task, job in tasks.items()}
+        
+        results: Dict[str, Dict[str, Any]] = {}
+        finished: Set[str] = set()
+        covered: Set[str] = set()
+        latencies: List[float] = []
+        completed = 0
+        total = len(tasks)
+        pending = set(tasks)
+        hedging = self.hedge_percentile > 0
+        
+        while pending:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=RESEARCH_SCHEDULER_TICK if hedging else None,
+                return_when=asyncio.FIRST_COMPLETED
+            )
+            
+            for task in done:
+                job = tasks[task]
+                if job.job_id in finished:
+                    continue
+                
+                outcome = {} if task.cancelled() else task.result()
+                siblings = [other for other in copies[job.job_id] if other is not task and not other.done()]
+                if not outcome and siblings:
+                    # Let the other copy of this job answer instead
+                    continue
+                for other in siblings:
+                    other.cancel()
+                
+                if task is not copies[job.job_id][0]:
+                    self.scheduler_stats["hedge_wins"] += 1
+                    for result in outcome.values():
+                        result["hedged_model"] = self.hedge_model
+                elif outcome and job.latency:
+                    latencies.append(job.latency / len(job.queries))
+                
+                for query_id, result in outcome.items():
+                    results.setdefault(query_id, {})[job.agent_name] = result
+                
+                finished.add(job.job_id)
+                completed += 1
+                # Update progress in active queries
+                for query_id in job.query_ids:
+                    if query_id in self.active_queries:
+                        self.active_queries[query_id].status = f"completed_{completed}/{total}"
+                
+                # Cancel jobs that could only add to queries which are already covered
+                if self.coverage_confidence > 0:
+                    covered.update(
+                        query_id for query_id in job.query_ids
+                        if query_id in results and self._is_query_covered(results[query_id])
+                    )
+                    for other_task, other_job in tasks.items():
+                        if (other_job.job_id not in finished and not other_task.done()
+                                and all(query_id in covered for query_id in other_job.query_ids)):
+                            for copy_task in copies[other_job.job_id]:
+                                copy_task.cancel()
+                            finished.add(other_job.job_id)
+                            completed += 1
+                            self.scheduler_stats["cancelled"] += 1
+                
+                if progress_callback:
+                    update = progress_callback(completed, total)
+                    if asyncio.iscoroutine(update):
+                        await update
+            
+            # Hedge running jobs that have exceeded the latency percentile
+            if hedging and len(latencies) >= RESEARCH_HEDGE_MIN_SAMPLES:
+                threshold = self._percentile(latencies, self.hedge_percentile)
+                now = time.monotonic()
+                for task in list(pending):
+                    job = tasks[task]
+                    if (job.job_id in finished or len(copies[job.job_id]) > 1 or job.started_at is None
+                            or now - job.started_at < threshold * len(job.queries)):
+                        continue
+                    
+                    hedge_job = ResearchJob(agent_name=job.agent_name, queries=job.queries)
+                    hedge_agent = self.agents[job.agent_name].with_model(self.hedge_model)
+                    hedge_task = asyncio.create_task(
+                        self._run_research_job(hedge_job, project_context, hedge_semaphore, hedge_agent)
+                    )
+                    tasks[hedge_task] = job
+                    copies[job.job_id].append(hedge_task)
+                    pending.add(hedge_task)
+                    self.scheduler_stats["hedged"] += 1
+        
+        if self.scheduler_stats["cancelled"] or self.scheduler_stats["hedged"]:
+            console.print(
+                f"[dim]Research scheduler: {self.scheduler_stats['cancelled']} jobs cancelled after coverage, "
+                f"{self.scheduler_stats['hedged']} hedged ({self.scheduler_stats['hedge_wins']} hedge wins)[/dim]"
+            )
+        
+        return results
+    
+    def _is_query_covered(self, agent_results: Dict[str, Dict[str, Any]]) -> bool:
+        """A query is covered once enough agents answered and combined confidence and distinct findings reach their targets"""
+        miss_probability = 1.0
+        answered = 0
+        findings = []
+        for result in agent_results.values():
+            if "error" in result:
+                continue
+            answered += 1
+            # Any complete answer rates itself 1.0, so a single agent must never settle a query
+            confidence = min(max(result.get("confidence", 0.0), 0.0), RESEARCH_AGENT_CONFIDENCE_CAP)
+            miss_probability *= 1.0 - confidence
+            for key in ("recommendations", "best_practices", "security_considerations"):
+                findings.extend(result.get(key, []))
+        
+        combined_confidence = 1.0 - miss_probability
+        return (answered >= RESEARCH_COVERAGE_MIN_AGENTS
+                and combined_confidence >= self.coverage_confidence
+                and len(self.deduplicator.collapse(findings)) >= self.coverage_items)
+    
+    @staticmethod
+    def _percentile(values: List[float], percentile: float) -> float:
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(percentile / 100.0 * (len(ordered) - 1))))
+        return ordered[index]
+    
+    async def _run_research_job(self, job: ResearchJob, project_context: Dict[str, Any],
+                                semaphore: asyncio.Semaphore,
+                                agent: Optional[ResearchAgent] = None) -> Dict[str, Dict[str, Any]]:
+        """Run one agent call inside the pool with its own timeout"""
+        agent = agent or self.agents[job.agent_name]
+        partial: Dict[str, Dict[str, Any]] = {}
+        
+        async with semaphore:
+            job.started_at = time.monotonic()
+            try:
+                # Merged calls produce one answer per query, so scale the timeout
+                return await asyncio.wait_for(
+                    agent.research_queries(job.queries, project_context, partial),
+                    timeout=self.agent_timeout * len(job.queries)
+                )
+            except asyncio.TimeoutError:
+                # Keep whatever fields finished streaming before the deadline
+                salvaged = agent.salvage_partial(partial)
+                if salvaged:
+                    console.print(f"[yellow]Research timeout for {job.agent_name}, keeping partial results[/yellow]")
+                    return salvaged
+                console.print(f"[yellow]Research timeout for {job.agent_name}[/yellow]")
+            except Exception as e:
+                console.print(f"[red]Research failed for {job.agent_name}: {e}[/red]")
+            finally:
+                job.finished_at = time.monotonic()
+        
+        return {}
+    
     def _assign_agents_to_query(self, query: ResearchQuery) -> List[str]:
         """Assign appropriate agents based on query focus areas"""
         # Default assignments based on query ID
@@ -2614,6 +5195,119 @@ class ResearchManager:
         
         return queries
     
+    async def _run_research_batch(self, jobs: List[ResearchJob], project_context: Dict[str, Any],
+                                  progress_callback: Optional[Callable[[int, int], Any]] = None
+                                  ) -> Dict[str, Dict[str, Any]]:
+        """Run research jobs as a single message batch"""
+        results: Dict[str, Dict[str, Any]] = {}
+        requests = []
+        pending = {}
+        
+        for job in jobs:
+            agent = self.agents[job.agent_name]
+            queries = []
+            cache_keys = {}
+            for query in job.queries:
+                cache_key, cached = agent.lookup_cache(query, project_context)
+                if cached:
+                    results.setdefault(query.id, {})[job.agent_name] = cached
+                else:
+                    cache_keys[query.id] = cache_key
+                    queries.append(query)
+            
+            if not queries:
+                continue
+            
+            # custom_id must match ^[a-zA-Z0-9_-]{1,64}$
+            custom_id = f"r{len(requests):03d}_{job.agent_name}"[:64]
+            requests.append({
+                "custom_id": custom_id,
+                "params": agent.build_request_params(queries, project_context)
+            })
+            pending[custom_id] = (job, queries, cache_keys)
+        
+        while requests:
+            batch_results = await self._execute_batch(requests, progress_callback)
+            fallback_jobs = []
+            dropped = []
+            
+            for custom_id, (job, queries, cache_keys) in pending.items():
+                entry = batch_results.get(custom_id, {"error": "missing from batch results"})
+                if entry.get("expired") and self.anthropic:
+                    fallback_jobs.append(ResearchJob(job.agent_name, queries))
+                    continue
+                if "error" in entry:
+                    console.print(f"[yellow]Batch research failed for {job.job_id}: {entry['error']}[/yellow]")
+                    continue
+                
+                agent_results = self.agents[job.agent_name].process_response(
+                    entry["text"], queries, entry.get("usage"), cache_keys, batch=True
+                )
+                for query in queries:
+                    if query.id in agent_results:
+                        results.setdefault(query.id, {})[job.agent_name] = agent_results[query.id]
+                    elif len(queries) > 1:
+                        console.print(f"[yellow]Batch research {job.agent_name} dropped {query.id}; asking again[/yellow]")
+                        dropped.append((job, query, cache_keys.get(query.id)))
+                    else:
+                        console.print(f"[yellow]Batch research {job.agent_name} returned no answer for {query.id}[/yellow]")
+            
+            if fallback_jobs:
+                console.print(f"[yellow]Research batch missed its deadline; running {len(fallback_jobs)} jobs directly[/yellow]")
+                direct_results = await self._run_research_jobs(fallback_jobs, project_context, progress_callback)
+                for query_id, agent_results in direct_results.items():
+                    results.setdefault(query_id, {}).update(agent_results)
+            
+            # Sections dropped from a merged answer go out again in a follow-up batch, one query per request
+            requests = []
+            pending = {}
+            for job, query, cache_key in dropped:
+                custom_id = f"r{len(requests):03d}_{job.agent_name}"[:64]
+                requests.append({
+                    "custom_id": custom_id,
+                    "params": self.agents[job.agent_name].build_request_params([query], project_context)
+                })
+                pending[custom_id] = (job, [query], {query.id: cache_key})
+        
+        for query_id in results:
+            if query_id in self.active_queries:
+                self.active_queries[query_id].status = "completed"
+        
+        return results
+    
+    async def _execute_batch(self, requests: List[Dict[str, Any]],
+                             progress_callback: Optional[Callable[[int, int], Any]] = None
+                             ) -> Dict[str, Dict[str, Any]]:
+        """Submit a message batch and poll until it ends; past the deadline every request is marked expired"""
+        batch_id = await self.batch_client.submit(requests)
+        console.print(f"[dim]Submitted research batch {batch_id} ({len(requests)} requests)[/dim]")
+        deadline = time.monotonic() + self.batch_client.deadline if self.batch_client.deadline > 0 else None
+        
+        while True:
+            status = await self.batch_client.poll(batch_id)
+            
+            if progress_callback:
+                update = progress_callback(status["completed"], status["total"] or len(requests))
+                if asyncio.iscoroutine(update):
+                    await update
+            
+            if status["ended"]:
+                break
+            if deadline is not None and time.monotonic() >= deadline:
+                console.print(f"[yellow]Research batch {batch_id} did not finish within "
+                              f"{self.batch_client.deadline:g}s; cancelling it[/yellow]")
+                try:
+                    await self.batch_client.cancel(batch_id)
+                except Exception as e:
+                    console.print(f"[yellow]Could not cancel batch {batch_id}: {e}[/yellow]")
+                return {
+                    request["custom_id"]: {"error": "batch deadline exceeded", "expired": True}
+                    for request in requests
+                }
+            await asyncio.sleep(self.batch_client.poll_interval)
+        
+        return await self.batch_client.results(batch_id)
+    
     async def _enhanced_synthesis(self, results: Dict[str, Dict[str, Any]], 
                                 project_context: Dict[str, Any]) -> Dict[str, Any]:
         """Enhanced synthesis with AI-powered integration"""
@@ -2621,29 +5315,37 @@ class ResearchManager:
         basic_synthesis = self._basic_synthesis(results)
         
         # Then use AI to create a coherent, prioritized synthesis
-        if self.anthropic:
-            synthesis_prompt = self._create_synthesis_prompt(basic_synthesis, project_context)
-            
+        if self.anthropic or self.batch_client:
             try:
-                response = await self.anthropic.messages.create(
-                    model=self.synthesis_model,
-                    max_tokens=8192,
-                    temperature=0.2,
-                    messages=[{
-                        "role": "user",
-                        "content": synthesis_prompt
-                    }]
-                )
+                # Level 1: condense each query's findings in parallel on a cheaper model
+                query_ids = [query_id for query_id in results if isinstance(basic_synthesis.get(query_id), dict)]
+                summary_calls = {
+                    f"summary_{index:02d}": self._create_query_summary_params(
+                        query_id, basic_synthesis[query_id], project_context
+                    )
+                    for index, query_id in enumerate(query_ids)
+                }
+                summaries = await self._run_synthesis_calls(summary_calls)
                 
-                # Extract content
-                content = ""
-                if response.content:
-                    for block in response.content:
-                        if hasattr(block, 'text'):
-                            content += block.text
+                query_summaries = {}
+                for custom_id, query_id in zip(summary_calls, query_ids):
+                    summary = summaries.get(custom_id)
+                    if not summary or "synthesis_error" in summary:
+                        # Fall back to the trimmed raw findings for this query
+                        summary = fit_to_token_budget(
+                            self._dedupe_findings(basic_synthesis[query_id]), SYNTHESIS_SUMMARY_MAX_TOKENS
+                        )
+                    query_summaries[query_id] = summary
+                
+                # Level 2: one small merge call over the summaries
+                merged = await self._run_synthesis_calls({
+                    "synthesis": self._create_synthesis_params(query_summaries, project_context)
+                })
+                if "synthesis" not in merged:
+                    raise RuntimeError("merge call returned no result")
                 
-                # Parse synthesized results
-                final_synthesis = self._parse_synthesis(content)
+                final_synthesis = merged["synthesis"]
+                final_synthesis["query_summaries"] = query_summaries
                 
                 # Merge with basic synthesis
                 final_synthesis.update(basic_synthesis)
@@ -2656,6 +5358,129 @@ class ResearchManager:
         
         return basic_synthesis
     
+    async def _run_synthesis_calls(self, calls: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Run synthesis requests in parallel (or as one batch); failed calls are omitted"""
+        parsed: Dict[str, Dict[str, Any]] = {}
+        cache_keys = {}
+        pending = {}
+        
+        # Identical inputs produce identical prompts, so serve them from the research cache
+        for custom_id, params in calls.items():
+            if self.cache:
+                cache_keys[custom_id] = self.cache.make_key(
+                    params["messages"][0]["content"], params["model"], params["temperature"]
+                )
+                cached = self.cache.get(cache_keys[custom_id])
+                if cached:
+                    parsed[custom_id] = dict(cached["results"])
+                    continue
+            pending[custom_id] = params
+        
+        if not pending:
+            return parsed
+        
+        responses: Dict[str, Tuple[str, Any, bool]] = {}  # custom_id -> (text, usage, batch)
+        direct = pending
+        if self.batch_client:
+            batch_results = await self._execute_batch([
+                {"custom_id": custom_id, "params": params} for custom_id, params in pending.items()
+            ])
+            direct = {}
+            for custom_id, entry in batch_results.items():
+                if "text" in entry:
+                    responses[custom_id] = (entry["text"], entry.get("usage"), True)
+                elif entry.get("expired") and self.anthropic:
+                    direct[custom_id] = pending[custom_id]
+                else:
+                    console.print(f"[yellow]Batch synthesis {custom_id} failed: {entry.get('error')}[/yellow]")
+        
+        if direct:
+            limiter = get_api_rate_limiter()
+            outcomes = await asyncio.gather(*[
+                limiter.call(self.anthropic.messages.create, estimated_tokens=estimate_request_tokens(params), **params)
+                for params in direct.values()
+            ], return_exceptions=True)
+            for custom_id, outcome in zip(direct, outcomes):
+                if isinstance(outcome, Exception):
+                    console.print(f"[yellow]Synthesis call {custom_id} failed: {outcome}[/yellow]")
+                else:
+                    responses[custom_id] = (extract_message_text(outcome), getattr(outcome, 'usage', None), False)
+        
+        for custom_id, (content, usage, batch) in responses.items():
+            params = pending[custom_id]
+            if self.cost_tracker:
+                self.cost_tracker.add_usage(usage, params["model"], "research_synthesis", batch=batch)
+            
+            # Parse synthesized results
+            parsed[custom_id] = self._parse_synthesis(content)
+            if custom_id in cache_keys and "synthesis_error" not in parsed[custom_id]:
+                self.cache.put(cache_keys[custom_id], parsed[custom_id], content,
+                               params["model"], params["temperature"])
+        
+        return parsed
+    
+    @staticmethod
+    def _dedupe_findings(findings: Dict[str, Any]) -> Dict[str, Any]:
+        """Drop near-identical strings (case and punctuation) from finding lists"""
+        deduped = {}
+        for key, value in findings.items():
+            if isinstance(value, list):
+                seen = set()
+                unique = []
+                for item in value:
+                    marker = re.sub(r'\W+', ' ', item.lower()).strip() if isinstance(item, str) else compact_json(item)
+                    if marker and marker not in seen:
+                        seen.add(marker)
+                        unique.append(item)
+                deduped[key] = unique
+            elif value or value == 0:
+                deduped[key] = value
+        return deduped
+    
+    def _create_query_summary_params(self, query_id: str, findings: Dict[str, Any],
+                                     project_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a budgeted per-query summary request"""
+        template = f"""You are condensing research findings on one topic for a software project.
+
+PROJECT: {project_context.get('project_type')}; stack: {', '.join(project_context.get('technology_stack', []))}
+TOPIC: {query_id}
+
+FINDINGS (compact JSON, merged across research agents):
+{{payload}}
+
+Return compact JSON only:
+{{"summary":"1-2 sentences","top_recommendations":["at most 5, most important first"],"decisions":["key technical decisions"],"security":["must-haves"],"tools":{{"tool":"version"}},"risks":["main risks"]}}"""
+        
+        payload_budget = SYNTHESIS_SUMMARY_INPUT_BUDGET - estimate_tokens(template)
+        payload = fit_to_token_budget(self._dedupe_findings(findings), payload_budget)
+        
+        return {
+            "model": self.summary_model,
+            "max_tokens": SYNTHESIS_SUMMARY_MAX_TOKENS,
+            "temperature": 0.2,
+            "messages": [{
+                "role": "user",
+                "content": template.replace("{payload}", compact_json(payload))
+            }]
+        }
+    
+    def _create_synthesis_params(self, query_summaries: Dict[str, Any],
+                                 project_context: Dict[str, Any]) -> Dict[str, Any]:
+        """Create the budgeted final merge request"""
+        template = self._create_synthesis_prompt("{payload}", project_context)
+        payload_budget = SYNTHESIS_MERGE_INPUT_BUDGET - estimate_tokens(template)
+        payload = fit_to_token_budget(query_summaries, payload_budget)
+        
+        return {
+            "model": self.synthesis_model,
+            "max_tokens": SYNTHESIS_MERGE_MAX_TOKENS,
+            "temperature": 0.2,
+            "messages": [{
+                "role": "user",
+                "content": self._create_synthesis_prompt(compact_json(payload), project_context)
+            }]
+        }
+    
     def _basic_synthesis(self, results: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
         """Basic synthesis of research results"""
         synthesized = {
@@ -2707,17 +5532,14 @@ class ResearchManager:
             if agent_count > 0:
                 query_synthesis["confidence"] = total_confidence / agent_count
             
-            # Remove duplicates and limit items
+            # Collapse paraphrases, rank by how many agents agreed, and limit items
+            consensus = {}
             for key in ["recommendations", "best_practices", "security", "patterns"]:
                 if key in query_synthesis:
-                    # Remove duplicates while preserving order
-                    seen = set()
-                    unique_items = []
-                    for item in query_synthesis[key]:
-                        if item not in seen:
-                            seen.add(item)
-                            unique_items.append(item)
-                    query_synthesis[key] = unique_items[:10]  # Limit to top 10
+                    clusters = self.deduplicator.collapse(query_synthesis[key])[:10]  # Limit to top 10
+                    query_synthesis[key] = [item for item, _ in clusters]
+                    consensus[key] = [size for _, size in clusters]
+            query_synthesis["consensus"] = consensus
             
             synthesized[query_id] = query_synthesis
         
@@ -2729,9 +5551,9 @@ class ResearchManager:
         
         return synthesized
     
-    def _create_synthesis_prompt(self, basic_synthesis: Dict[str, Any], 
+    def _create_synthesis_prompt(self, findings: str, 
                                project_context: Dict[str, Any]) -> str:
-        """Create prompt for AI-powered synthesis"""
+        """Create prompt for AI-powered synthesis from compact per-topic summaries"""
         return f"""You are synthesizing research findings for a software project. Create a coherent, prioritized action plan.
 
 PROJECT CONTEXT:
@@ -2740,8 +5562,8 @@ PROJECT CONTEXT:
 - Requirements: {', '.join(project_context.get('requirements', []))}
 - Complexity: {project_context.get('complexity')}
 
-RESEARCH FINDINGS:
-{json.dumps(basic_synthesis, indent=2)}
+RESEARCH FINDINGS (per-topic summaries, compact JSON):
+{findings}
 
 Create a synthesized response with:
 1. Top 10 prioritized recommendations
@@ -3188,19 +6010,32 @@ class EnhancedToolManager:
         self.disabled_tools.discard(tool_name)
 
 
+def session_result_metrics(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Cost and token usage from a Claude Code result message"""
+    usage = result.get("usage") or {}
+    return {
+        "cost_usd": float(result.get("total_cost_usd", result.get("cost_usd")) or 0.0),
+        "input_tokens": usage.get("input_tokens", 0) + usage.get("cache_creation_input_tokens", 0),
+        "cache_read_tokens": usage.get("cache_read_input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "num_turns": result.get("num_turns")
+    }
+
 class StreamingMessageHandler:
     """
     Enhanced streaming message handler with better parsing and cost tracking.
     """
     
     def __init__(self, phase: Phase, console: Console, logger: logging.Logger,
-                 build_stats: BuildStats, cost_tracker: CostTracker, args: argparse.Namespace):
+                 build_stats: BuildStats, cost_tracker: CostTracker, args: argparse.Namespace,
+                 watchdog: Optional[ProcessWatchdog] = None):
         self.phase = phase
         self.console = console
         self.logger = logger
         self.build_stats = build_stats
         self.cost_tracker = cost_tracker  # New in v2.3
         self.args = args
+        self.watchdog = watchdog
         
         # Message state
         self.current_message = ""
@@ -3321,6 +6156,8 @@ class StreamingMessageHandler:
             line = await process.stdout.readline()
             if not line:
                 break
+            if self.watchdog:
+                self.watchdog.touch()
             
             decoded = line.decode('utf-8', errors='replace')
             output_buffer.append(decoded)
@@ -3620,7 +6457,28 @@ class ClaudeCodeBuilder:
         self.mcp_server_configs: Dict[str, Dict] = {}
         self.custom_instructions = CustomInstructionManager()
         self.research_manager: Optional[ResearchManager] = None
-        self.mcp_recommender = MCPRecommendationEngine()
+        self.spec_index: Optional[SpecificationIndex] = None
+        self.spec_retriever: Optional[SpecSectionRetriever] = None
+        self.mcp_daemon: Optional[MCPServerDaemon] = None
+        self.plan_graph: Optional[PhasePlanGraph] = None
+        self._parallel_phases = False
+        self._phase_workdirs: Dict[str, Path] = {}
+        self._worktree_root: Optional[Path] = None
+        self._merge_lock = asyncio.Lock()
+        self._direct_mcp_config: Optional[str] = None
+        self.mcp_inventory = MCPInventory(
+            cache_dir=BUILDER_CACHE_DIR / "mcp",
+            force_refresh=args.refresh_mcp
+        )
+        # Phase plans share the research cache settings, --no-research-cache included
+        self.plan_cache: Optional[ResearchCache] = None
+        if not args.no_research_cache:
+            self.plan_cache = ResearchCache(
+                BUILDER_CACHE_DIR / "plans",
+                ttl_seconds=args.research_cache_ttl * 3600,
+                max_bytes=int(args.research_cache_max_mb * 1024 * 1024)
+            )
+        self.mcp_recommender = MCPRecommendationEngine(self.mcp_inventory)
         self.tool_manager: Optional[EnhancedToolManager] = None
         self.start_time = datetime.now()
         self._shutdown_requested = False
@@ -3628,8 +6486,40 @@ class ClaudeCodeBuilder:
         
         # Initialize Anthropic client for analysis and research
         if ANTHROPIC_SDK_AVAILABLE and self.args.api_key:
-            self.anthropic = AsyncAnthropic(api_key=self.args.api_key)
-            self.research_manager = ResearchManager(self.anthropic)
+            # Retries are handled by the shared API rate limiter
+            configure_api_rate_limiter(self.args.api_rpm, self.args.api_tpm)
+            self.anthropic = AsyncAnthropic(api_key=self.args.api_key, max_retries=0)
+            research_cache = None
+            if not self.args.no_research_cache:
+                research_cache = ResearchCache(
+                    self.args.research_cache_dir,
+                    ttl_seconds=self.args.research_cache_ttl * 3600,
+                    max_bytes=int(self.args.research_cache_max_mb * 1024 * 1024)
+                )
+            batch_client = None
+            if self.args.research_batch:
+                if self.args.research_batch_dir:
+                    batch_client = FileBatchClient(self.args.research_batch_dir,
+                                                   poll_interval=self.args.research_batch_poll,
+                                                   deadline=self.args.research_batch_deadline)
+                else:
+                    batch_client = AnthropicBatchClient(self.anthropic,
+                                                        poll_interval=self.args.research_batch_poll,
+                                                        deadline=self.args.research_batch_deadline)
+            self.research_manager = ResearchManager(
+                self.anthropic,
+                max_concurrency=self.args.research_concurrency,
+                agent_timeout=self.args.research_timeout,
+                cache=research_cache,
+                cost_tracker=self.cost_tracker,
+                batch_client=batch_client,
+                stream_responses=not self.args.no_research_stream,
+                dedup_threshold=self.args.research_dedup_threshold,
+                coverage_confidence=self.args.research_coverage_confidence,
+                coverage_items=self.args.research_coverage_items,
+                hedge_percentile=self.args.research_hedge_percentile,
+                hedge_model=self.args.research_hedge_model
+            )
         else:
             self.anthropic = None
             if self.args.enable_research:
@@ -3717,6 +6607,10 @@ class ClaudeCodeBuilder:
             spec_content = await self._load_specification()
             self._spec_content = spec_content  # Store for later use
             
+            if self.args.plan_only:
+                await self._show_plan_only(spec_content)
+                return
+            
             # Create output directory
             self._create_output_directory()
             
@@ -3745,6 +6639,9 @@ class ClaudeCodeBuilder:
             else:
                 await self._setup_mcp_configuration()
             
+            if self.args.mcp_daemon:
+                await self._start_mcp_daemon()
+            
             # Conduct research phase if enabled
             research_results = None
             if self.args.enable_research and self.research_manager:
@@ -3806,6 +6703,21 @@ class ClaudeCodeBuilder:
         finally:
             await self._cleanup()
     
+    async def _show_plan_only(self, spec_content: str):
+        """Analyze the specification and show the execution plan without writing the output directory"""
+        # Research and plans still go through the shared caches, so the real build reuses them
+        research_results = None
+        if self.args.enable_research and self.research_manager:
+            research_results = await self._conduct_research_phase(spec_content)
+        
+        if research_results:
+            phases = await self._enhanced_project_analysis(spec_content, research_results)
+        else:
+            phases = await self._analyze_project(spec_content)
+        
+        self.console.print("\n[bold]EXECUTION PLAN[/bold] [dim](--plan-only)[/dim]\n")
+        self._show_plan_schedule(phases, self._estimate_phase_plan(phases))
+    
     def _show_banner(self):
         """Display enhanced startup banner"""
         banner_text = Text.from_markup(
@@ -4051,9 +6963,13 @@ class ClaudeCodeBuilder:
         """Restore cost tracking from checkpoint"""
         self.cost_tracker.total_input_tokens = costs.get('total_input_tokens', 0)
         self.cost_tracker.total_output_tokens = costs.get('total_output_tokens', 0)
+        self.cost_tracker.total_cache_write_tokens = costs.get('total_cache_write_tokens', 0)
+        self.cost_tracker.total_cache_read_tokens = costs.get('total_cache_read_tokens', 0)
         self.cost_tracker.total_cost = costs.get('total_cost', 0.0)
         self.cost_tracker.claude_code_cost = costs.get('claude_code_cost', 0.0)
         self.cost_tracker.research_cost = costs.get('research_cost', 0.0)
+        self.cost_tracker.batch_cost = costs.get('batch_cost', 0.0)
+        self.cost_tracker.model_costs.update(costs.get('model_costs', {}))
         self.cost_tracker.phase_costs = costs.get('phase_costs', {})
         self.cost_tracker.phase_tokens = costs.get('phase_tokens', {})
         
@@ -4097,6 +7013,7 @@ class ClaudeCodeBuilder:
             raise ValueError("Specification file is empty")
         
         # Load file content
+        encoding = 'utf-8'
         try:
             if aiofiles:
                 async with aiofiles.open(self.args.spec_file, 'r', encoding='utf-8') as f:
@@ -4105,8 +7022,6 @@ class ClaudeCodeBuilder:
                 with open(self.args.spec_file, 'r', encoding='utf-8') as f:
                     content = f.read()
             
-            # Store specification content for use in prompts
-            self.specification_content = content
         except UnicodeDecodeError:
             # Try different encodings
             for encoding in ['latin-1', 'cp1252']:
@@ -4130,6 +7045,12 @@ class ClaudeCodeBuilder:
         
         self.logger.info(f"Loaded specification ({len(content)} characters)")
         
+        # Store specification content for use in prompts
+        self.specification_content = content
+        self.spec_index = SpecificationIndex(self.args.spec_file, encoding=encoding)
+        self.spec_retriever = SpecSectionRetriever(self.spec_index)
+        self.logger.debug(f"Indexed {len(self.spec_index.sections) - 1} specification sections")
+        
         # Show preview if verbose
         if self.args.verbose:
             lines = content.splitlines()
@@ -4468,6 +7389,11 @@ credentials/
             
             # Create MCP configuration
             mcp_config = self._create_mcp_config(discovered_servers)
+            if self.args.mcp_warmup:
+                await self._warm_up_mcp_servers(mcp_config)
+                discovered_servers = {name: info for name, info in discovered_servers.items()
+                                      if name in mcp_config["mcpServers"]}
+                self.available_mcp_servers = set(discovered_servers.keys())
             
             # Write configuration
             mcp_config_path = self.args.output_dir / ".mcp.json"
@@ -4490,6 +7416,10 @@ credentials/
         
         # Create MCP configuration
         mcp_config = self._create_mcp_config(mcp_servers)
+        if self.args.mcp_warmup:
+            await self._warm_up_mcp_servers(mcp_config)
+            mcp_servers = {name: info for name, info in mcp_servers.items() if name in mcp_config["mcpServers"]}
+            self.available_mcp_servers = set(mcp_servers.keys())
         
         # Write MCP configuration
         mcp_config_path = self.args.output_dir / ".mcp.json"
@@ -4508,43 +7438,16 @@ credentials/
         """Discover all available MCP servers with enhanced detection"""
         servers = {}
         
+        # Global npm packages and node-resolvable packages, scanned once per build
+        installed_servers = await self.mcp_inventory.get_installed()
+        if self.mcp_inventory.from_cache:
+            self.logger.debug("MCP inventory loaded from cache")
+        else:
+            self.logger.debug(f"MCP inventory scanned in {self.mcp_inventory.scan_seconds:.2f}s")
+        
         # Check each server from registry
         for server_name, server_info in MCP_SERVER_REGISTRY.items():
-            # Multiple methods to check if server is installed
-            installed = False
-            
-            # Method 1: Check with npm list
-            check_cmd = ["npm", "list", "-g", server_info['package'], "--depth=0"]
-            try:
-                result = await asyncio.create_subprocess_exec(
-                    *check_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE
-                )
-                stdout, _ = await result.communicate()
-                
-                if result.returncode == 0:
-                    installed = True
-            except:
-                pass
-            
-            # Method 2: Try to resolve with node
-            if not installed:
-                check_cmd = ["node", "-e", f"require.resolve('{server_info['package']}')"]
-                try:
-                    result = await asyncio.create_subprocess_exec(
-                        *check_cmd,
-                        stdout=asyncio.subprocess.PIPE,
-                        stderr=asyncio.subprocess.PIPE
-                    )
-                    stdout, stderr = await result.communicate()
-                    
-                    if result.returncode == 0:
-                        installed = True
-                except:
-                    pass
-            
-            if installed:
+            if server_name in installed_servers:
                 servers[server_name] = {
                     "command": server_info["command"],
                     "args": server_info["args"].copy(),
@@ -4622,6 +7525,58 @@ credentials/
             }
         }
     
+    async def _warm_up_mcp_servers(self, mcp_config: Dict[str, Any]):
+        """Pre-start configured servers and drop the ones that fail or start slowly"""
+        servers = mcp_config["mcpServers"]
+        if not servers:
+            return
+        
+        warmer = MCPServerWarmer(
+            startup_timeout=self.args.mcp_warmup_timeout,
+            max_warm_start=self.args.mcp_max_warm_start
+        )
+        healthy = await warmer.warm(servers)
+        
+        for name, result in warmer.results.items():
+            self.build_stats.mcp_start_times[name] = result
+            if result["healthy"]:
+                self.logger.debug(f"MCP server {name}: cold {result['cold_start']:.1f}s, "
+                                  f"warm {result['warm_start']:.1f}s")
+            else:
+                self.console.print(f"[yellow]⚠ Dropping MCP server {name}: {result['error']}[/yellow]")
+        
+        mcp_config["mcpServers"] = healthy
+        mcp_config["metadata"]["total_servers"] = len(healthy)
+        mcp_config["metadata"]["server_names"] = list(healthy.keys())
+    
+    async def _start_mcp_daemon(self):
+        """Run configured MCP servers once for the build and point .mcp.json at proxies"""
+        mcp_config_path = self.args.output_dir / ".mcp.json"
+        self._direct_mcp_config = mcp_config_path.read_text()
+        mcp_config = json.loads(self._direct_mcp_config)
+        if not mcp_config.get("mcpServers"):
+            return
+        
+        self.mcp_daemon = MCPServerDaemon(mcp_config["mcpServers"], startup_timeout=self.args.mcp_warmup_timeout)
+        with Status("Starting MCP server daemon...", spinner="dots", console=self.console):
+            mcp_config["mcpServers"] = await self.mcp_daemon.start()
+        
+        for name, error in self.mcp_daemon.failed.items():
+            self.console.print(f"[yellow]⚠ MCP server {name} not shared across phases: {error}[/yellow]")
+        
+        with open(mcp_config_path, 'w') as f:
+            json.dump(mcp_config, f, indent=2)
+        
+        self.console.print(f"[green]✓ Sharing {len(self.mcp_daemon.channels)} MCP servers across phases[/green]")
+    
+    async def _stop_mcp_daemon(self):
+        """Stop shared MCP servers and restore the directly launched .mcp.json"""
+        if not self.mcp_daemon:
+            return
+        await self.mcp_daemon.stop()
+        if self._direct_mcp_config is not None:
+            (self.args.output_dir / ".mcp.json").write_text(self._direct_mcp_config)
+    
     def _display_mcp_servers(self, servers: Dict[str, Dict]):
         """Display discovered MCP servers with enhanced information"""
         table = Table(
@@ -4737,10 +7692,19 @@ credentials/
         
         self.console.print(f"\n[yellow]Auto-installing {len(to_install)} recommended MCP servers...[/yellow]")
         
-        for rec in to_install:
+        semaphore = asyncio.Semaphore(max(1, self.args.mcp_install_concurrency))
+        installed = await asyncio.gather(*[self._install_mcp_server(rec, semaphore) for rec in to_install])
+        
+        if any(installed):
+            self.mcp_inventory.invalidate()
+    
+    async def _install_mcp_server(self, rec: MCPRecommendation, semaphore: asyncio.Semaphore) -> bool:
+        """Install one MCP server package, recording its duration"""
+        async with semaphore:
+            start = time.monotonic()
             try:
                 # Install the server
-                install_cmd = rec.install_command.split()
+                install_cmd = self._mcp_install_command(rec)
                 result = await asyncio.create_subprocess_exec(
                     *install_cmd,
                     stdout=asyncio.subprocess.PIPE,
@@ -4748,17 +7712,54 @@ credentials/
                 )
                 
                 stdout, stderr = await result.communicate()
+                self.build_stats.mcp_install_durations[rec.server_name] = time.monotonic() - start
                 
                 if result.returncode == 0:
                     self.console.print(f"[green]✓ Installed {rec.server_name}[/green]")
                     # Update available servers
                     self.available_mcp_servers.add(rec.server_name)
+                    return True
                 else:
                     self.console.print(f"[red]✗ Failed to install {rec.server_name}[/red]")
                     if stderr:
                         self.logger.debug(f"Installation error: {stderr.decode()}")
             except Exception as e:
                 self.console.print(f"[red]✗ Error installing {rec.server_name}: {e}[/red]")
+        
+        return False
+    
+    def _mcp_install_command(self, rec: MCPRecommendation) -> List[str]:
+        """Build the npm command, preferring a local tarball or npm cache when configured"""
+        install_cmd = rec.install_command.split()
+        offline_cache = self.args.mcp_offline_cache
+        if not offline_cache:
+            return install_cmd
+        
+        package = MCP_SERVER_REGISTRY.get(rec.server_name, {}).get("package", install_cmd[-1])
+        
+        # npm pack names @scope/name as scope-name-<version>.tgz
+        tarball_prefix = package.lstrip("@").replace("/", "-")
+        tarballs = sorted(
+            (path for path in offline_cache.glob(f"{tarball_prefix}-*.tgz")
+             if re.fullmatch(rf"{re.escape(tarball_prefix)}-\d[\w.+-]*\.tgz", path.name)),
+            key=lambda path: self._semver_key(path.name[len(tarball_prefix) + 1:-len(".tgz")])
+        )
+        if tarballs:
+            return ["npm", "install", "-g", str(tarballs[-1].absolute()), "--offline"]
+        
+        # Otherwise treat the directory as a pre-seeded npm cache
+        return install_cmd + ["--offline", "--cache", str(offline_cache.absolute())]
+    
+    @staticmethod
+    def _semver_key(version: str) -> Tuple:
+        """Sort key for npm versions: numeric release parts, prereleases before the release"""
+        release, _, prerelease = version.split("+", 1)[0].partition("-")
+        release_key = tuple(int(part) for part in re.findall(r"\d+", release))
+        if not prerelease:
+            return release_key, (1,)
+        return release_key, (0,) + tuple(
+            (0, int(part), "") if part.isdigit() else (1, 0, part) for part in prerelease.split(".")
+        )
     
     def _create_mcp_usage_guide(self):
         """Create MCP usage guide in the project"""
@@ -4862,12 +7863,14 @@ status = await mcp__git__status()
             
             # Update progress callback
             async def update_progress(completed: int, total: int):
-                progress.update(research_task, completed=int((completed/total) * 100))
+                progress.update(
+                    research_task,
+                    completed=int((completed/total) * 100),
+                    description=f"Conducting research... ({completed}/{total} agent calls)"
+                )
             
-            # Set callback (if research manager supports it)
-            # For now, just run the research
             research_results = await self.research_manager.conduct_comprehensive_research(
-                spec_content, project_context
+                spec_content, project_context, progress_callback=update_progress
             )
             
             progress.update(research_task, completed=100)
@@ -4877,11 +7880,16 @@ status = await mcp__git__status()
         if research_tokens_used > 0:
             self.logger.info(f"Research phase used {research_tokens_used} tokens")
         
+        if self.research_manager.cache:
+            cache_stats = self.research_manager.cache.get_stats()
+            self.logger.info(f"Research cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+        
         # Display research summary
         self._display_research_summary(research_results)
         
         # Save research results
-        await self._save_research_results(research_results)
+        if not self.args.plan_only:
+            await self._save_research_results(research_results)
         
         return research_results
     
@@ -4892,11 +7900,12 @@ status = await mcp__git__status()
             "specification": spec_content
         }
         
-        # Use MCP recommender's analysis functions
-        tech_stack = await self.mcp_recommender._extract_technology_stack(spec_content)
-        requirements = await self.mcp_recommender._extract_requirements(spec_content)
-        project_type = await self.mcp_recommender._determine_project_type(spec_content)
-        complexity = await self.mcp_recommender._assess_complexity(spec_content)
+        # Shares the memoised scan with MCP recommendations
+        features = self.mcp_recommender.feature_scanner.scan(spec_content)
+        tech_stack = features.technology_stack
+        requirements = features.requirements
+        project_type = features.project_type
+        complexity = features.complexity
         
         context.update({
             "technology_stack": tech_stack,
@@ -5071,11 +8080,13 @@ status = await mcp__git__status()
         analysis_prompt = self._create_analysis_prompt(spec_content)
         
         # Add research findings to prompt if available
+        research_section = ""
         if research_results:
-            analysis_prompt += self._format_research_for_analysis(research_results)
+            research_section = self._format_research_for_analysis(research_results)
+            analysis_prompt += research_section
         
         # Execute analysis
-        phases = await self._execute_analysis(analysis_prompt)
+        phases = await self._execute_analysis(analysis_prompt, self._plan_cache_key(spec_content, research_section))
         
         # Enhance phases with research insights
         if research_results:
@@ -5095,7 +8106,7 @@ status = await mcp__git__status()
         
         # Execute analysis
         with Status("Analyzing project structure...", spinner="dots2", console=self.console):
-            phases = await self._execute_analysis(analysis_prompt)
+            phases = await self._execute_analysis(analysis_prompt, self._plan_cache_key(spec_content, ""))
         
         # Optimize phases
         phases = self._optimize_phases(phases)
@@ -5221,12 +8232,30 @@ IMPORTANT:
         
         return research_section
     
-    async def _execute_analysis(self, prompt: str) -> List[Phase]:
+    def _plan_cache_key(self, spec_content: str, research_section: str) -> str:
+        """Key a phase plan on everything that shapes it"""
+        parts = {
+            "specification": hashlib.sha256(spec_content.encode()).hexdigest(),
+            "research": hashlib.sha256(research_section.encode()).hexdigest(),
+            "min_phases": self.args.min_phases,
+            "min_tasks_per_phase": self.args.min_tasks_per_phase
+        }
+        return ResearchCache.make_key(compact_json(parts), self.args.model_analyzer, 0.3)
+    
+    async def _execute_analysis(self, prompt: str, plan_key: Optional[str] = None) -> List[Phase]:
         """Execute project analysis using AI"""
+        if self.anthropic and plan_key and self.plan_cache and not self.args.replan:
+            cached = self.plan_cache.get(plan_key)
+            if cached:
+                self.console.print("[green]✓ Reusing cached phase plan (use --replan to regenerate)[/green]")
+                return [Phase(**phase_data) for phase_data in cached["results"]["phases"]]
+        
         if self.anthropic:
             try:
                 # Use Anthropic SDK for analysis
-                message = await self.anthropic.messages.create(
+                message = await get_api_rate_limiter().call(
+                    self.anthropic.messages.create,
+                    estimated_tokens=estimate_tokens(prompt),
                     model=self.args.model_analyzer,
                     max_tokens=8192,
                     temperature=0.3,
@@ -5248,7 +8277,21 @@ IMPORTANT:
                     self.cost_tracker.add_usage(message.usage, self.args.model_analyzer, "analysis")
                 
                 # Parse phases
-                return self._parse_phases_from_output(content)
+                try:
+                    phases = self._parse_phase_plan(content)
+                except Exception as e:
+                    self.logger.error(f"Failed to parse phases: {e}")
+                    return self._create_enhanced_default_phases()
+                
+                # Only plans the model actually produced are worth reusing
+                if plan_key and self.plan_cache:
+                    plan = [
+                        {"id": phase.id, "name": phase.name, "description": phase.description,
+                         "tasks": phase.tasks, "dependencies": phase.dependencies}
+                        for phase in phases
+                    ]
+                    self.plan_cache.put(plan_key, {"phases": plan}, content, self.args.model_analyzer, 0.3)
+                return phases
                 
             except Exception as e:
                 self.logger.error(f"Analysis failed: {e}")
@@ -5259,60 +8302,55 @@ IMPORTANT:
             self.logger.warning("Using enhanced default phases (no API key provided)")
             return self._create_enhanced_default_phases()
     
-    def _parse_phases_from_output(self, output: str) -> List[Phase]:
-        """Parse phases from analysis output with validation"""
-        try:
-            # Extract JSON from output
-            json_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', output)
-            if not json_match:
-                json_match = re.search(r'(\{[\s\S]*"phases"[\s\S]*\})', output)
-            
-            if not json_match:
-                raise ValueError("No valid JSON found in output")
-            
-            data = json.loads(json_match.group(1))
-            
-            if "phases" not in data:
-                raise ValueError("JSON does not contain 'phases' key")
-            
-            phases = []
-            phase_ids = set()
-            
-            for phase_data in data["phases"]:
-                # Validate required fields
-                if not all(key in phase_data for key in ["id", "name", "description", "tasks"]):
-                    self.logger.warning(f"Skipping invalid phase: {phase_data}")
-                    continue
-                
-                # Ensure unique IDs
-                phase_id = phase_data["id"]
-                if phase_id in phase_ids:
-                    phase_id = f"{phase_id}_{len(phases)}"
-                phase_ids.add(phase_id)
-                
-                phase = Phase(
-                    id=phase_id,
-                    name=phase_data["name"],
-                    description=phase_data["description"],
-                    tasks=phase_data["tasks"],
-                    dependencies=phase_data.get("dependencies", [])
-                )
-                phases.append(phase)
-            
-            # Validate dependencies
-            for phase in phases:
-                phase.dependencies = [d for d in phase.dependencies if d in phase_ids]
-            
-            # Ensure minimum phases
-            if len(phases) < self.args.min_phases:
-                self.logger.warning(f"Only {len(phases)} phases found, adding default phases")
-                phases.extend(self._create_enhanced_default_phases()[len(phases):])
-            
-            return phases
+    def _parse_phase_plan(self, output: str) -> List[Phase]:
+        """Parse phases from analysis output, raising if no usable plan is found"""
+        # Extract JSON from output
+        json_match = re.search(r'```json\s*(\{[\s\S]*?\})\s*```', output)
+        if not json_match:
+            json_match = re.search(r'(\{[\s\S]*"phases"[\s\S]*\})', output)
+        
+        if not json_match:
+            raise ValueError("No valid JSON found in output")
+        
+        data = json.loads(json_match.group(1))
+        
+        if "phases" not in data:
+            raise ValueError("JSON does not contain 'phases' key")
+        
+        phases = []
+        phase_ids = set()
+        
+        for phase_data in data["phases"]:
+            # Validate required fields
+            if not all(key in phase_data for key in ["id", "name", "description", "tasks"]):
+                self.logger.warning(f"Skipping invalid phase: {phase_data}")
+                continue
             
-        except Exception as e:
-            self.logger.error(f"Failed to parse phases: {e}")
-            return self._create_enhanced_default_phases()
+            # Ensure unique IDs
+            phase_id = phase_data["id"]
+            if phase_id in phase_ids:
+                phase_id = f"{phase_id}_{len(phases)}"
+            phase_ids.add(phase_id)
+            
+            phase = Phase(
+                id=phase_id,
+                name=phase_data["name"],
+                description=phase_data["description"],
+                tasks=phase_data["tasks"],
+                dependencies=phase_data.get("dependencies", [])
+            )
+            phases.append(phase)
+        
+        # Validate dependencies
+        for phase in phases:
+            phase.dependencies = [d for d in phase.dependencies if d in phase_ids]
+        
+        # Ensure minimum phases
+        if len(phases) < self.args.min_phases:
+            self.logger.warning(f"Only {len(phases)} phases found, adding default phases")
+            phases.extend(self._create_enhanced_default_phases()[len(phases):])
+        
+        return phases
     
     def _create_enhanced_default_phases(self) -> List[Phase]:
         """Create enhanced default phases with better coverage"""
@@ -5600,36 +8638,96 @@ IMPORTANT:
     
     def _optimize_phases(self, phases: List[Phase]) -> List[Phase]:
         """Optimize phase ordering and dependencies"""
-        # Ensure phases are properly ordered by dependencies
-        optimized = []
-        phase_dict = {p.id: p for p in phases}
-        processed = set()
+        self.plan_graph = PhasePlanGraph(phases)
+        
+        for original, phase_id in self.plan_graph.renamed_ids:
+            self.logger.warning(f"Renamed duplicate phase id {original} to {phase_id}")
+        for dep, phase_id in self.plan_graph.missing_edges:
+            self.logger.warning(f"Dropped unknown dependency {dep} of phase {phase_id}")
+        for dep, phase_id in self.plan_graph.broken_edges:
+            self.logger.warning(f"Broke dependency cycle by removing {phase_id} -> {dep}")
+            self.console.print(f"[yellow]⚠ Circular dependency: {phase_id} no longer waits for {dep}[/yellow]")
+        
+        return self.plan_graph.order
+    
+    def _load_phase_history(self) -> Dict[str, List[float]]:
+        """Durations of successful phases from recent builds, keyed by phase id and name"""
+        history: Dict[str, List[float]] = defaultdict(list)
+        analytics_dir = self.args.output_dir / ".analytics"
+        for stats_file in sorted(analytics_dir.glob("build_stats_*.json"))[-PHASE_HISTORY_BUILDS:]:
+            try:
+                with open(stats_file) as f:
+                    performance = json.load(f).get("phase_performance") or {}
+            except (OSError, ValueError) as e:
+                self.logger.debug(f"Skipping phase history {stats_file.name}: {e}")
+                continue
+            for phase_id, record in performance.items():
+                if record.get("success") and record.get("duration"):
+                    history[phase_id].append(float(record["duration"]))
+                    history[f"name:{record.get('name', '')}"].append(float(record["duration"]))
+        return history
+    
+    def _phase_duration_estimates(self, phases: List[Phase]) -> Dict[str, float]:
+        """Expected seconds per phase from this build, earlier builds, or task counts"""
+        history = self._load_phase_history()
+        complexity_multiplier = {"low": 0.8, "medium": 1.0, "high": 1.5}.get(
+            getattr(self, '_complexity', 'medium'), 1.0
+        )
+        
+        estimates = {}
+        for phase in phases:
+            samples = history.get(phase.id) or history.get(f"name:{phase.name}")
+            if phase.id in self.build_stats.phase_durations:
+                estimates[phase.id] = self.build_stats.phase_durations[phase.id]
+            elif samples:
+                estimates[phase.id] = statistics.median(samples)
+            else:
+                estimates[phase.id] = max(len(phase.tasks), 1) * PHASE_SECONDS_PER_TASK * complexity_multiplier
+        return estimates
+    
+    def _estimate_phase_plan(self, phases: List[Phase]) -> PhasePlanEstimate:
+        """Schedule estimate for the plan at the configured phase parallelism"""
+        if self.plan_graph is None or len(self.plan_graph.order) != len(phases):
+            self.plan_graph = PhasePlanGraph(phases)
+        return self.plan_graph.estimate(
+            self._phase_duration_estimates(phases),
+            max_parallel=self.args.max_parallel_phases
+        )
+    
+    def _show_plan_schedule(self, phases: List[Phase], estimate: PhasePlanEstimate):
+        """Show per-phase start times and the critical path"""
+        critical = set(estimate.critical_path)
+        schedule_table = Table(
+            title="[bold]Phase Schedule[/bold]",
+            box=box.ROUNDED,
+            header_style="bold cyan"
+        )
+        schedule_table.add_column("Phase", style="cyan", width=30)
+        schedule_table.add_column("Estimate", justify="right", width=10)
+        schedule_table.add_column("Earliest Start", justify="right", width=14)
+        schedule_table.add_column("Critical", justify="center", width=8)
         
-        def can_process(phase: Phase) -> bool:
-            """Check if all dependencies are processed"""
-            return all(dep in processed for dep in phase.dependencies)
+        for phase in phases:
+            schedule_table.add_row(
+                phase.name[:30],
+                f"{estimate.durations[phase.id] / 60:.1f}m",
+                f"+{estimate.earliest_start[phase.id] / 60:.1f}m",
+                "[red]●[/red]" if phase.id in critical else ""
+            )
         
-        # Process phases in dependency order
-        while len(optimized) < len(phases):
-            made_progress = False
-            
-            for phase in phases:
-                if phase.id not in processed and can_process(phase):
-                    optimized.append(phase)
-                    processed.add(phase.id)
-                    made_progress = True
-            
-            if not made_progress:
-                # Add remaining phases (might have circular dependencies)
-                for phase in phases:
-                    if phase.id not in processed:
-                        # Clear invalid dependencies
-                        phase.dependencies = [d for d in phase.dependencies if d in processed]
-                        optimized.append(phase)
-                        processed.add(phase.id)
-                break
+        self.console.print(schedule_table)
         
-        return optimized
+        path_names = " → ".join(self.plan_graph.get(phase_id).name for phase_id in estimate.critical_path)
+        self.console.print(f"[bold]Critical Path:[/bold] {path_names or 'None'}")
+        self.console.print(
+            f"[bold]Expected Makespan:[/bold] {estimate.makespan / 60:.0f} minutes "
+            f"with {estimate.max_parallel} phase(s) at a time "
+            f"[dim](serial {estimate.serial_seconds / 60:.0f}m, "
+            f"critical path {estimate.critical_path_seconds / 60:.0f}m)[/dim]"
+        )
+        if self.plan_graph.broken_edges:
+            broken = ", ".join(f"{phase_id} -> {dep}" for dep, phase_id in self.plan_graph.broken_edges)
+            self.console.print(f"[yellow]Broken cycle edges:[/yellow] {broken}")
     
     async def _initialize_memory(self, spec_content: str, phases: List[Phase],
                                research_results: Optional[Dict[str, Any]]):
@@ -5895,15 +8993,13 @@ OBSERVABILITY:
         
         self.console.print(overview_table)
         
+        # Schedule from recorded phase durations
+        plan_estimate = self._estimate_phase_plan(phases)
+        self._show_plan_schedule(phases, plan_estimate)
+        
         # Enhanced statistics
         stats_content = []
-        
-        # Time estimation with complexity factor
-        complexity_multiplier = {"low": 0.8, "medium": 1.0, "high": 1.5}.get(
-            getattr(self, '_complexity', 'medium'), 1.0
-        )
-        avg_seconds_per_task = 25 * complexity_multiplier
-        estimated_time = (total_tasks * avg_seconds_per_task) / 60
+        estimated_time = plan_estimate.makespan / 60
         
         stats_content.append(f"[bold]Total Phases:[/bold] {len(phases)}")
         stats_content.append(f"[bold]Total Tasks:[/bold] {total_tasks}")
@@ -6047,114 +9143,338 @@ OBSERVABILITY:
                 total=len(phases_to_execute)
             )
             
-            for i, phase in enumerate(phases):
-                # Check for shutdown
-                if self._shutdown_requested:
-                    self.logger.warning("Shutdown requested, stopping execution")
-                    self.console.print("\n[yellow]Build interrupted, saving state...[/yellow]")
-                    await self._store_memory("interrupted")
-                    break
-                
-                # Skip completed phases
-                if phase.completed and resume:
-                    continue
-                
-                # Check dependencies
-                if not self._check_dependencies(phase, phases):
-                    if self.args.continue_on_error:
-                        self.console.print(f"[yellow]⚠ Skipping {phase.name} - dependencies not met[/yellow]")
-                        phase.status = BuildStatus.SKIPPED
-                        phase.add_message("Skipped due to unmet dependencies", "warning")
-                        progress.advance(overall_task)
+            if self._use_parallel_phases():
+                await self._execute_phases_parallel(phases, phases_to_execute, progress, overall_task)
+            else:
+                for phase in phases_to_execute:
+                    # Check for shutdown
+                    if self._shutdown_requested:
+                        self.logger.warning("Shutdown requested, stopping execution")
+                        self.console.print("\n[yellow]Build interrupted, saving state...[/yellow]")
+                        await self._store_memory("interrupted")
+                        break
+                    
+                    # Check dependencies
+                    if not self._dependencies_ready(phase, phases, progress, overall_task):
                         continue
-                    else:
-                        raise RuntimeError(f"Dependencies not met for {phase.name}")
-                
-                # Execute phase
-                phase_num = phases.index(phase) + 1
-                total_phases = len(phases)
-                
-                # Show phase header
-                self.console.rule(
-                    f"[bold cyan]Phase {phase_num}/{total_phases}: {phase.name}[/bold cyan]",
-                    style="cyan"
-                )
+                    
+                    await self._run_phase(phase, phases, progress, overall_task)
+            
+            progress.update(overall_task, completed=len(phases_to_execute))
+    
+    def _dependencies_ready(self, phase: Phase, phases: List[Phase], progress: Progress, overall_task: TaskID) -> bool:
+        """Check dependencies, skipping the phase or raising when they are not met"""
+        if self._check_dependencies(phase, phases):
+            return True
+        if not self.args.continue_on_error:
+            raise RuntimeError(f"Dependencies not met for {phase.name}")
+        
+        self.console.print(f"[yellow]⚠ Skipping {phase.name} - dependencies not met[/yellow]")
+        phase.status = BuildStatus.SKIPPED
+        phase.add_message("Skipped due to unmet dependencies", "warning")
+        progress.advance(overall_task)
+        return False
+    
+    async def _run_phase(self, phase: Phase, phases: List[Phase], progress: Progress,
+                         overall_task: Optional[TaskID]):
+        """Execute one phase with checkpointing, commit, summary and retries"""
+        phase_num = phases.index(phase) + 1
+        total_phases = len(phases)
+        
+        # Show phase header
+        self.console.rule(
+            f"[bold cyan]Phase {phase_num}/{total_phases}: {phase.name}[/bold cyan]",
+            style="cyan"
+        )
+        
+        phase_task = progress.add_task(
+            f"[cyan]Executing {phase.name}",
+            total=100
+        )
+        
+        # Update build stats
+        phase_start = datetime.now()
+        
+        try:
+            # Execute the phase
+            await self._execute_phase(phase, progress, phase_task)
+            await self._finish_phase(phase, phase_start)
+        
+        except Exception as e:
+            self.logger.error(f"Phase failed: {phase.name}", exc_info=True)
+            # Work that ran but could not be committed is not retried by executing again
+            executed = phase.completed and phase.success
+            phase.error = str(e)
+            phase.status = BuildStatus.FAILED
+            phase.success = False
+            self.memory.log_error(str(e), phase.id, {"phase": phase.name})
+            
+            # Retry logic
+            if phase.retry_count < self.args.max_retries and not executed:
+                self.console.print(f"[yellow]⚠ Phase failed, retrying ({phase.retry_count + 1}/{self.args.max_retries})...[/yellow]")
+                phase.retry_count += 1
+                phase.status = BuildStatus.RETRYING
+                self.build_stats.retries_performed += 1
                 
-                phase_task = progress.add_task(
-                    f"[cyan]Executing {phase.name}",
-                    total=100
-                )
+                # Wait before retry
+                await asyncio.sleep(RETRY_DELAY * phase.retry_count)
                 
+                # Clear error and retry
+                phase.error = None
                 try:
-                    # Update build stats
-                    phase_start = datetime.now()
-                    
-                    # Execute the phase
                     await self._execute_phase(phase, progress, phase_task)
-                    
-                    # Track phase duration
-                    phase_duration = (datetime.now() - phase_start).total_seconds()
-                    self.build_stats.phase_durations[phase.id] = phase_duration
-                    
-                    # Store memory checkpoint
-                    await self._store_memory(f"completed_{phase.id}")
-                    
-                    # Store phase context
-                    if phase.context:
-                        self.memory.store_phase_context(phase.id, phase.context)
-                    
-                    # Commit changes if git enabled
-                    if self.args.git_init:
-                        self._commit_phase_changes(phase)
-                    
-                    # Show phase summary
-                    self._show_phase_summary(phase)
-                    
-                except Exception as e:
-                    self.logger.error(f"Phase failed: {phase.name}", exc_info=True)
-                    phase.error = str(e)
+                    await self._finish_phase(phase, phase_start)
+                except Exception as retry_error:
+                    phase.error = str(retry_error)
                     phase.status = BuildStatus.FAILED
-                    self.memory.log_error(str(e), phase.id, {"phase": phase.name})
-                    
-                    # Retry logic
-                    if phase.retry_count < self.args.max_retries:
-                        self.console.print(f"[yellow]⚠ Phase failed, retrying ({phase.retry_count + 1}/{self.args.max_retries})...[/yellow]")
-                        phase.retry_count += 1
-                        phase.status = BuildStatus.RETRYING
-                        self.build_stats.retries_performed += 1
-                        
-                        # Wait before retry
-                        await asyncio.sleep(RETRY_DELAY * phase.retry_count)
-                        
-                        # Clear error and retry
-                        phase.error = None
-                        try:
-                            await self._execute_phase(phase, progress, phase_task)
-                        except Exception as retry_error:
-                            phase.error = str(retry_error)
-                            phase.status = BuildStatus.FAILED
+            
+            if phase.status == BuildStatus.FAILED:
+                if not self.args.continue_on_error:
+                    progress.stop()
+                    raise
+                
+                self.console.print(f"[red]✗ Failed: {phase.name}[/red]")
+                self.console.print(f"[dim]Error: {str(e)}[/dim]")
+        
+        finally:
+            progress.update(phase_task, completed=100)
+            if overall_task is not None:
+                progress.advance(overall_task)
+    
+    async def _finish_phase(self, phase: Phase, phase_start: datetime):
+        """Record, checkpoint, commit and summarize a phase that executed successfully"""
+        # Track phase duration
+        phase_duration = (datetime.now() - phase_start).total_seconds()
+        self.build_stats.phase_durations[phase.id] = phase_duration
+        
+        # Store memory checkpoint
+        await self._store_memory(f"completed_{phase.id}")
+        
+        # Store phase context
+        if phase.context:
+            self.memory.store_phase_context(phase.id, phase.context)
+        
+        # Commit changes if git enabled (parallel phases always commit to merge back)
+        if self.args.git_init or self._parallel_phases:
+            if not self._commit_phase_changes(phase) and self._parallel_phases:
+                raise RuntimeError(f"Could not commit {phase.name} in its worktree; it cannot be merged")
+        
+        # Show phase summary
+        self._show_phase_summary(phase)
+    
+    def _use_parallel_phases(self) -> bool:
+        """Whether phases can run concurrently in git worktrees"""
+        if self.args.max_parallel_phases <= 1:
+            return False
+        if not (self.args.output_dir / ".git").exists():
+            self.console.print("[yellow]⚠ --max-parallel-phases needs a git repository (use --git-init); running phases serially[/yellow]")
+            return False
+        return True
+    
+    async def _execute_phases_parallel(self, phases: List[Phase], phases_to_execute: List[Phase],
+                                       progress: Progress, overall_task: TaskID):
+        """Run every phase whose dependencies are merged, up to --max-parallel-phases at once"""
+        if not self._prepare_phase_worktrees():
+            self.console.print("[yellow]⚠ Could not prepare git worktrees; running phases serially[/yellow]")
+            for phase in phases_to_execute:
+                if self._dependencies_ready(phase, phases, progress, overall_task):
+                    await self._run_phase(phase, phases, progress, overall_task)
+            return
+        
+        self._parallel_phases = True
+        plan_ids = {phase.id for phase in phases}
+        finished = {phase.id for phase in phases if phase not in phases_to_execute}
+        pending = list(phases_to_execute)
+        running: Dict[asyncio.Task, Phase] = {}
+        
+        try:
+            while pending or running:
+                if self._shutdown_requested:
+                    if not running:
+                        self.logger.warning("Shutdown requested, stopping execution")
+                        await self._store_memory("interrupted")
+                        break
+                    pending.clear()
+                
+                for phase in list(pending):
+                    if len(running) >= self.args.max_parallel_phases:
+                        break
+                    if any(dep in plan_ids and dep not in finished for dep in phase.dependencies):
+                        continue
                     
-                    if phase.status == BuildStatus.FAILED:
-                        if not self.args.continue_on_error:
-                            progress.stop()
-                            raise
-                        
-                        self.console.print(f"[red]✗ Failed: {phase.name}[/red]")
-                        self.console.print(f"[dim]Error: {str(e)}[/dim]")
+                    pending.remove(phase)
+                    if not self._dependencies_ready(phase, phases, progress, overall_task):
+                        finished.add(phase.id)
+                        continue
+                    running[asyncio.create_task(self._run_phase_in_worktree(phase, phases, progress, overall_task))] = phase
                 
-                finally:
-                    progress.update(phase_task, completed=100)
-                    progress.advance(overall_task)
+                if not running:
+                    if pending:
+                        # Only cyclic dependencies are left: skip or fail like the serial path
+                        phase = pending.pop(0)
+                        self._dependencies_ready(phase, phases, progress, overall_task)
+                        finished.add(phase.id)
+                    continue
+                
+                done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    phase = running.pop(task)
+                    task.result()
+                    finished.add(phase.id)
+        finally:
+            for task in running:
+                task.cancel()
+            await asyncio.gather(*running, return_exceptions=True)
+            self._parallel_phases = False
+            self._cleanup_phase_worktrees()
+    
+    def _merged_path(self, path: str, worktree: Path) -> str:
+        """Map an absolute path inside a phase worktree to the output directory"""
+        if not os.path.isabs(path) or os.path.commonpath([path, str(worktree)]) != str(worktree):
+            return path
+        return str(self.args.output_dir.absolute() / os.path.relpath(path, worktree))
+    
+    async def _run_phase_in_worktree(self, phase: Phase, phases: List[Phase], progress: Progress,
+                                     overall_task: TaskID):
+        """Run a phase on its own branch and merge it back, re-running serially on conflict"""
+        worktree = self._create_phase_worktree(phase)
+        self._phase_workdirs[phase.id] = worktree
+        try:
+            await self._run_phase(phase, phases, progress, overall_task)
+        finally:
+            del self._phase_workdirs[phase.id]
+        
+        if not phase.completed:
+            return
+        
+        if self._git("status", "--porcelain", cwd=worktree).stdout.strip():
+            # The phase commit failed; merging would lose its work
+            phase.success = False
+            phase.status = BuildStatus.FAILED
+            phase.error = f"Uncommitted changes left in {worktree} (branch {self._phase_branch(phase)})"
+            self.console.print(f"[red]✗ {phase.name} could not be committed; its worktree is kept at {worktree}[/red]")
+            if not self.args.continue_on_error:
+                raise RuntimeError(phase.error)
+            return
+        
+        async with self._merge_lock:
+            if self._merge_phase_branch(phase):
+                # Report files at their merged location
+                phase.files_created = [self._merged_path(path, worktree) for path in phase.files_created]
+                return
             
-            progress.update(overall_task, completed=len(phases_to_execute))
+            self.console.print(f"[yellow]⚠ Merge conflict for {phase.name}, re-running it on the main branch[/yellow]")
+            self.build_stats.retries_performed += 1
+            phase.completed = False
+            phase.success = False
+            phase.status = BuildStatus.PENDING
+            phase.error = None
+            phase.files_created = []
+            if phase.id in self.memory.completed_phases:
+                self.memory.completed_phases.remove(phase.id)
+            await self._run_phase(phase, phases, progress, None)
+    
+    def _git(self, *args: str, cwd: Optional[Path] = None) -> subprocess.CompletedProcess:
+        return subprocess.run(["git", *args], cwd=cwd or self.args.output_dir, capture_output=True, text=True)
+    
+    def _prepare_phase_worktrees(self) -> bool:
+        """Commit the current tree so every worktree starts from it"""
+        if self._git("rev-parse", "--is-inside-work-tree").returncode != 0:
+            return False
+        if self._git("status", "--porcelain").stdout.strip() or self._git("rev-parse", "--verify", "HEAD").returncode != 0:
+            self._git("add", "-A")
+            if self._git("commit", "--allow-empty", "-m", "Prepare parallel phase execution").returncode != 0:
+                return False
+        self._worktree_root = Path(tempfile.mkdtemp(prefix=f"ccb-{self.args.output_dir.name}-"))
+        return True
+    
+    @staticmethod
+    def _phase_branch(phase: Phase) -> str:
+        return "ccb/" + re.sub(r"[^A-Za-z0-9._-]", "_", phase.id)
+    
+    def _create_phase_worktree(self, phase: Phase) -> Path:
+        worktree = (self._worktree_root / re.sub(r"[^A-Za-z0-9._-]", "_", phase.id)).resolve()
+        if worktree.exists():
+            self._git("worktree", "remove", "--force", str(worktree))
+        result = self._git("worktree", "add", "-B", self._phase_branch(phase), str(worktree), "HEAD")
+        if result.returncode != 0:
+            raise RuntimeError(f"Could not create worktree for {phase.name}: {result.stderr.strip()}")
+        return worktree
+    
+    def _merge_phase_branch(self, phase: Phase) -> bool:
+        """Merge a phase branch into the main tree, aborting on conflict"""
+        result = self._git("merge", "--no-ff", "-m", f"Merge phase {phase.id}: {phase.name}", self._phase_branch(phase))
+        if result.returncode == 0:
+            return True
+        self.logger.warning(f"Merge of {phase.id} failed: {result.stdout.strip()} {result.stderr.strip()}")
+        self._git("merge", "--abort")
+        return False
+    
+    def _cleanup_phase_worktrees(self):
+        if not self._worktree_root:
+            return
+        kept = []
+        for worktree in self._worktree_root.iterdir():
+            if not worktree.is_dir():
+                continue
+            if self._git("status", "--porcelain", cwd=worktree).stdout.strip():
+                # Uncommitted phase work: leave it for recovery
+                kept.append(worktree)
+                continue
+            self._git("worktree", "remove", "--force", str(worktree))
+        self._git("worktree", "prune")
+        if kept:
+            self.console.print(f"[yellow]⚠ Kept {len(kept)} worktree(s) with uncommitted changes: "
+                               f"{', '.join(str(w) for w in kept)}[/yellow]")
+        else:
+            shutil.rmtree(self._worktree_root, ignore_errors=True)
+        
+        # Merged branches are no longer needed; unmerged ones are kept for inspection
+        branches = self._git("branch", "--format=%(refname:short)", "--merged").stdout.split()
+        for branch in branches:
+            if branch.startswith("ccb/"):
+                self._git("branch", "-d", branch)
+        self._worktree_root = None
+    
+    def _phase_workdir(self, phase: Phase) -> Path:
+        """Directory a phase runs in: its worktree when parallel, else the output directory"""
+        return self._phase_workdirs.get(phase.id, self.args.output_dir)
+    
+    def _phase_mcp_config(self, phase: Phase) -> Path:
+        """MCP config for a phase, with workspace paths pointed at its worktree"""
+        mcp_config_path = (self.args.output_dir / ".mcp.json").resolve()
+        worktree = self._phase_workdirs.get(phase.id)
+        if not worktree or not mcp_config_path.exists():
+            return mcp_config_path
+        
+        workspace = str(self.args.output_dir.absolute())
+        mcp_config = json.loads(mcp_config_path.read_text())
+        direct = json.loads(self._direct_mcp_config)["mcpServers"] if self._direct_mcp_config else {}
+        for name, entry in mcp_config.get("mcpServers", {}).items():
+            # Shared daemon servers bound to the main tree are started directly for the worktree
+            source = direct.get(name, entry)
+            if workspace in json.dumps(source):
+                mcp_config["mcpServers"][name] = json.loads(json.dumps(source).replace(
+                    json.dumps(workspace)[1:-1], json.dumps(str(worktree))[1:-1]
+                ))
+        
+        phase_config_path = self._worktree_root / f"{worktree.name}.mcp.json"
+        with open(phase_config_path, 'w') as f:
+            json.dump(mcp_config, f, indent=2)
+        return phase_config_path
     
     def _check_dependencies(self, phase: Phase, all_phases: List[Phase]) -> bool:
         """Enhanced dependency checking with validation"""
         if not phase.dependencies:
             return True
         
+        if self.plan_graph and len(self.plan_graph.index) == len(all_phases):
+            phase_index = self.plan_graph.index
+        else:
+            phase_index = {p.id: p for p in all_phases}
+        
         for dep_id in phase.dependencies:
-            dep_phase = next((p for p in all_phases if p.id == dep_id), None)
+            dep_phase = phase_index.get(dep_id)
             if not dep_phase:
                 self.logger.error(f"Dependency {dep_id} not found for phase {phase.id}")
                 return False
@@ -6173,6 +9493,7 @@ OBSERVABILITY:
         """Execute a single phase with enhanced context management"""
         phase.start_time = datetime.now()
         phase.status = BuildStatus.RUNNING
+        phase.timeout_reason = None
         self.memory.current_phase = phase.id
         
         # Enhanced logging for phase execution
@@ -6211,8 +9532,13 @@ OBSERVABILITY:
         progress.update(task_id, description=f"[cyan]Executing {phase.name}...")
         
         try:
-            # Execute Claude Code
-            await self._execute_claude_code(prompt, phase, progress, task_id)
+            # Execute Claude Code: resume the failed session on retry, otherwise split
+            # into concurrent task groups when possible
+            resume_session = self._resumable_session(phase)
+            if resume_session:
+                await self._resume_claude_code(prompt, phase, progress, task_id, resume_session)
+            elif not (self.args.parallel_tasks > 1 and await self._execute_task_groups(phase, progress, task_id)):
+                await self._execute_claude_code(prompt, phase, progress, task_id)
             
             # Validate phase completion
             if phase.validate():
@@ -6252,7 +9578,151 @@ OBSERVABILITY:
             if phase.duration:
                 self.logger.info(f"Phase duration: {phase.duration.total_seconds():.1f}s")
     
-    async def _create_phase_prompt(self, phase: Phase) -> str:
+    def _resumable_session(self, phase: Phase) -> Optional[str]:
+        """Session to continue when retrying a phase"""
+        if phase.retry_count == 0 or self.args.fresh_retries:
+            return None
+        return phase.session_id
+    
+    async def _resume_claude_code(self, prompt: str, phase: Phase, progress: Progress, task_id: TaskID,
+                                  session_id: str):
+        """Continue the failed session, falling back to a fresh one if it cannot be resumed"""
+        self.console.print(f"[cyan]Resuming session {session_id[:8]}... for {phase.name}[/cyan]")
+        try:
+            await self._execute_claude_code(
+                self._create_continuation_prompt(phase), phase, progress, task_id, resume_session=session_id
+            )
+            return
+        except Exception as e:
+            if phase.attempts and phase.attempts[-1].get("session_id"):
+                raise  # The session resumed and then failed like any attempt
+            self.console.print(f"[yellow]⚠ Could not resume session {session_id[:8]}..., starting a fresh session[/yellow]")
+            phase.add_message(f"Resume of session {session_id} failed: {e}", "warning")
+        
+        phase.error = None
+        phase.session_id = None
+        await self._execute_claude_code(prompt, phase, progress, task_id)
+    
+    def _create_continuation_prompt(self, phase: Phase) -> str:
+        """Short prompt that picks up a failed phase inside its own session"""
+        problems = [m for m in phase.messages if "[ERROR]" in m or "[WARNING]" in m][-5:]
+        failed_checks = [
+            name for name, passed in phase.validation_results.items() if not passed and name != "completed"
+        ]
+        
+        lines = [
+            f"CONTINUE PHASE {phase.id}: {phase.name} (retry {phase.retry_count} of {self.args.max_retries})",
+            "",
+            "The previous attempt in this session stopped before the phase was complete."
+        ]
+        if phase.timeout_reason:
+            lines.append(f"It was stopped by the builder: {phase.timeout_reason}.")
+        if failed_checks:
+            lines.append(f"Failed completion checks: {', '.join(failed_checks)}")
+        if problems:
+            lines.append("Recent problems:")
+            lines.extend(f"  {message}" for message in problems)
+        lines.extend([
+            "",
+            "Tasks of this phase, numbered as before:",
+            *(f"{i}. {task}" for i, task in enumerate(phase.tasks, 1)),
+            "",
+            "Check what already exists in the working directory, finish the remaining tasks without "
+            "redoing completed work, and end with a summary of what was done in this phase."
+        ])
+        return "\n".join(lines)
+    
+    async def _execute_task_groups(self, phase: Phase, progress: Progress, task_id: TaskID) -> bool:
+        """Run disjoint task groups in concurrent sessions, then integrate them; False if the phase does not split"""
+        workdir = self._phase_workdir(phase)
+        partitioner = TaskGroupPartitioner(self.memory.created_files, workdir)
+        groups = partitioner.partition(phase.tasks, self.args.parallel_tasks)
+        if len(groups) < 2:
+            self.logger.info(f"Tasks of {phase.name} share their files; running one session")
+            return False
+        
+        self.build_stats.phase_task_groups[phase.id] = len(groups)
+        self.console.print(f"[cyan]Running {len(groups)} task groups of {phase.name} concurrently[/cyan]")
+        phase.add_message(f"Split into {len(groups)} concurrent task groups", "info")
+        
+        lease_dir = Path(tempfile.mkdtemp(prefix="ccb-leases-"))
+        leases = PathLeaseTable(lease_dir / "leases.json", workdir)
+        
+        async def run_group(number: int, members: List[int], prefixes: List[str]):
+            owner = f"group-{number}"
+            leases.grant(owner, prefixes)
+            prompt = await self._create_phase_prompt(phase, [phase.tasks[i] for i in members])
+            prompt += self._task_group_instructions(number, len(groups), prefixes)
+            await self._execute_claude_code(prompt, phase, progress, task_id, lease=(leases, owner))
+        
+        try:
+            results = await asyncio.gather(
+                *[run_group(number, members, prefixes) for number, (members, prefixes) in enumerate(groups, 1)],
+                return_exceptions=True
+            )
+            table = leases.snapshot()
+        finally:
+            shutil.rmtree(lease_dir, ignore_errors=True)
+        
+        for result in results:
+            if isinstance(result, (asyncio.CancelledError, KeyboardInterrupt)):
+                raise result
+        failures = {
+            number: str(result) or type(result).__name__
+            for number, result in enumerate(results, 1)
+            if isinstance(result, BaseException)
+        }
+        if phase.error:
+            # A group stopped early; the integration session finishes its work
+            phase.add_message(f"Task group error before integration: {phase.error}", "warning")
+            phase.error = None
+        
+        self.logger.info(f"Integrating {len(groups)} task groups of {phase.name} ({len(failures)} failed)")
+        progress.update(task_id, description=f"[cyan]Integrating {phase.name}...", completed=0)
+        prompt = await self._create_phase_prompt(phase)
+        prompt += self._integration_instructions(groups, table, failures)
+        await self._execute_claude_code(prompt, phase, progress, task_id)
+        return True
+    
+    def _task_group_instructions(self, number: int, total: int, prefixes: List[str]) -> str:
+        """Prompt section for one concurrent task group"""
+        owned = ", ".join(prefixes) if prefixes else "none yet; files you create first become yours"
+        return f"""
+
+PARALLEL TASK GROUP {number} OF {total}:
+- Other sessions are completing the remaining tasks of this phase at the same time
+- Complete only the tasks listed above; an integration session runs after all groups finish
+- Files owned by this group: {owned}
+- Writes to files owned by another group are rejected. Do not work around a rejection; list what you needed in your final summary
+- Do not create git commits; the builder commits the phase after integration"""
+    
+    def _integration_instructions(self, groups: List[Tuple[List[int], List[str]]],
+                                  table: Dict[str, Any], failures: Dict[int, str]) -> str:
+        """Prompt section for the session that stitches task groups together"""
+        lines = ["", "", "INTEGRATION SESSION:",
+                 f"The tasks above were split into {len(groups)} groups that ran concurrently:"]
+        for number, (members, _) in enumerate(groups, 1):
+            owner = f"group-{number}"
+            files = sorted(p for p, h in table["leases"].items() if h == owner)
+            status = f"FAILED: {failures[number][:200]}" if number in failures else "finished"
+            lines.append(f"- Group {number} (tasks {', '.join(str(i + 1) for i in members)}), {status}")
+            if files:
+                shown = ", ".join(files[:20])
+                lines.append(f"  Files: {shown}{f' and {len(files) - 20} more' if len(files) > 20 else ''}")
+        
+        if table["denied"]:
+            lines.append("Rejected writes:")
+            for owner, path, holder in table["denied"][:20]:
+                lines.append(f"- {owner} needed {path} (owned by {holder})")
+        
+        lines.append(
+            "Stitch the groups together: reconcile imports, shared configuration, entry points and "
+            "registrations across their files, finish whatever a failed group or rejected write left undone, "
+            "and verify every task above is complete. Keep work that is already complete."
+        )
+        return "\n".join(lines)
+    
+    async def _create_phase_prompt(self, phase: Phase, tasks: Optional[List[str]] = None) -> str:
         """Create enhanced phase prompt with better context integration"""
         # Get accumulated context from all previous phases
         accumulated_context = self.memory.get_accumulated_context(phase.id)
@@ -6301,10 +9771,18 @@ PROJECT SPECIFICATION:
 This specification must be implemented exactly as described above.
 """
             else:
-                # Summary for subsequent phases
+                # Sections relevant to this phase, with the outline, within the token budget
+                outline = fit_lines(self.spec_index.outline(max_level=2), self.args.spec_context_tokens // 4)
+                query = " ".join([phase.name, phase.description, *(phase.tasks if tasks is None else tasks)])
+                relevant = self.spec_retriever.context(
+                    query, max(self.args.spec_context_tokens - estimate_tokens(outline), 0)
+                )
                 spec_section = f"""
-PROJECT SPECIFICATION SUMMARY:
-{self.specification_content[:2000]}
+RELEVANT SPECIFICATION SECTIONS:
+{relevant}
+
+SPECIFICATION OUTLINE ({self.args.spec_file.absolute()}):
+{outline}
 ... [See phase 1 for full specification]
 ================================================================================
 """
@@ -6332,7 +9810,7 @@ CURRENT PHASE:
 - Retry Attempt: {phase.retry_count + 1}
 
 DETAILED TASKS TO COMPLETE:
-{chr(10).join(f"{i+1}. {task}" for i, task in enumerate(phase.tasks))}
+{chr(10).join(f"{i+1}. {task}" for i, task in enumerate(phase.tasks if tasks is None else tasks))}
 
 {context}
 
@@ -6529,10 +10007,26 @@ Retry: {phase.retry_count}
         
         self.logger.debug(f"Saved prompt to: {prompt_file}")
     
-    async def _execute_claude_code(self, prompt: str, phase: Phase, progress: Progress, task_id: TaskID):
+    async def _execute_claude_code(self, prompt: str, phase: Phase, progress: Progress, task_id: TaskID,
+                                   lease: Optional[Tuple[PathLeaseTable, str]] = None,
+                                   resume_session: Optional[str] = None):
         """Execute Claude Code with enhanced error handling and cost tracking"""
         # Build command
         cmd = self._build_claude_command(phase)
+        if lease:
+            cmd.extend(["--settings", str(lease[0].settings_path)])
+        if resume_session:
+            cmd.extend(["--resume", resume_session])
+        
+        attempt = {
+            "attempt": phase.retry_count + 1,
+            "mode": "resume" if resume_session else "fresh",
+            "group": lease[1] if lease else None,
+            "prompt_tokens": estimate_tokens(prompt),
+            "outcome": "error"
+        }
+        attempt_start = time.monotonic()
+        result_data: Dict[str, Any] = {}
         
         # Write prompt to temp file
         with tempfile.NamedTemporaryFile(mode='w', suffix='.txt', delete=False, encoding='utf-8') as f:
@@ -6547,23 +10041,36 @@ Retry: {phase.retry_count}
             # Create subprocess with enhanced environment
             env = os.environ.copy()
             env['CLAUDE_CODE_BUILDER'] = 'v2.3.0'
+            if lease:
+                env.update(lease[0].environment(lease[1]))
             
             # Read prompt content for stdin
             with open(prompt_file, 'r', encoding='utf-8') as f:
                 prompt_content = f.read()
             
+            # Own process group so the watchdog can stop MCP servers and tools with it
             process = await asyncio.create_subprocess_exec(
                 *cmd,
                 stdin=asyncio.subprocess.PIPE,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE,
-                cwd=self.args.output_dir,
-                env=env
+                cwd=self._phase_workdir(phase),
+                env=env,
+                start_new_session=True
             )
             
             self.logger.info(f"Process started (PID: {process.pid})")
             phase.add_message(f"Claude Code process started (PID: {process.pid})", "info")
             
+            # Idle output is only meaningful when events are streamed
+            watchdog = ProcessWatchdog(
+                process,
+                wall_timeout=self.args.phase_timeout,
+                idle_timeout=self.args.phase_idle_timeout if self.args.stream_output else 0,
+                stop_requested=lambda: self._shutdown_requested
+            )
+            watchdog_task = asyncio.create_task(watchdog.run())
+            
             # Handle streaming output
             if self.args.stream_output:
                 handler = StreamingMessageHandler(
@@ -6572,7 +10079,8 @@ Retry: {phase.retry_count}
                     logger=self.logger,
                     build_stats=self.build_stats,
                     cost_tracker=self.cost_tracker,
-                    args=self.args
+                    args=self.args,
+                    watchdog=watchdog
                 )
                 
                 # Update progress during streaming
@@ -6614,15 +10122,27 @@ Retry: {phase.retry_count}
                 for line in output.splitlines():
                     try:
                         data = json.loads(line.strip())
-                        if data.get("type") == "result" and "cost_usd" in data:
-                            self.cost_tracker.add_claude_code_cost(
-                                data["cost_usd"],
-                                {"phase": phase.name}
-                            )
+                        if data.get("type") == "result":
+                            result_data = data
+                            if "cost_usd" in data:
+                                self.cost_tracker.add_claude_code_cost(
+                                    data["cost_usd"],
+                                    {"phase": phase.name, "session_id": data.get("session_id")}
+                                )
                             break
                     except:
                         continue
             
+            if watchdog.reason or watchdog.stopped:
+                await watchdog_task
+            if watchdog.stopped:
+                raise RuntimeError(f"Claude Code stopped for phase {phase.name}: shutdown requested")
+            if watchdog.reason:
+                phase.timeout_reason = watchdog.reason
+                self.build_stats.phase_timeouts[phase.id if not lease else f"{phase.id}/{lease[1]}"] = watchdog.reason
+                self._save_partial_output(phase, output, stderr if 'stderr' in locals() else b"")
+                raise asyncio.TimeoutError(watchdog.reason)
+            
             if return_code != 0:
                 stderr_output = stderr.decode('utf-8', errors='replace') if 'stderr' in locals() else ""
                 error_msg = f"Claude Code failed (exit code {return_code})"
@@ -6639,21 +10159,58 @@ Retry: {phase.retry_count}
             
             self.logger.info(f"Phase execution completed successfully")
             phase.add_message("Claude Code execution completed", "success")
+            attempt["outcome"] = "success"
             
         except asyncio.TimeoutError:
-            error_msg = f"Claude Code execution timed out for phase {phase.name}"
+            error_msg = f"Claude Code execution timed out for phase {phase.name} ({phase.timeout_reason})"
             phase.add_message(error_msg, "error")
             raise RuntimeError(error_msg)
         except Exception as e:
             phase.add_message(f"Execution failed: {str(e)}", "error")
             raise
         finally:
+            if 'watchdog_task' in locals():
+                watchdog_task.cancel()
+                if watchdog.reason:
+                    attempt["outcome"] = "timeout"
+            if 'process' in locals() and process.returncode is None:
+                # Cancelled or failed while streaming: do not leave the session running
+                await terminate_process_group(process, grace=0)
+            
+            # Record the attempt and the session a retry can resume
+            if 'handler' in locals():
+                result_data = handler.usage or result_data
+                attempt["session_id"] = handler.session_id or result_data.get("session_id")
+            else:
+                attempt["session_id"] = result_data.get("session_id")
+            attempt.update(session_result_metrics(result_data))
+            attempt["duration_seconds"] = round(time.monotonic() - attempt_start, 1)
+            phase.attempts.append(attempt)
+            if attempt["session_id"] and not lease:
+                phase.session_id = attempt["session_id"]
             if os.path.exists(prompt_file):
                 os.unlink(prompt_file)
             
             # Ensure progress is updated
             progress.update(task_id, completed=100)
     
+    def _save_partial_output(self, phase: Phase, output: str, stderr: bytes):
+        """Keep what a timed-out session streamed for diagnosis"""
+        log_path = self.args.output_dir / ".logs" / f"{phase.id}_timeout_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        try:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(log_path, 'w', encoding='utf-8') as f:
+                f.write(f"# {phase.name}: {phase.timeout_reason}\n")
+                f.write(output)
+                if stderr:
+                    f.write("\n# stderr\n")
+                    f.write(stderr.decode('utf-8', errors='replace'))
+        except OSError as e:
+            self.logger.warning(f"Could not save partial output of {phase.name}: {e}")
+            return
+        self.logger.warning(f"Phase {phase.name} timed out ({phase.timeout_reason}); partial output in {log_path}")
+        phase.add_message(f"Timed out ({phase.timeout_reason}); partial output saved to {log_path.name}", "error")
+    
     def _build_claude_command(self, phase: Phase) -> List[str]:
         """Build enhanced Claude Code command"""
         cmd = ["claude"]
@@ -6677,7 +10234,7 @@ Retry: {phase.retry_count}
         cmd.extend(["--model", self.args.model_executor])
         
         # MCP configuration - use absolute path
-        mcp_config_path = (self.args.output_dir / ".mcp.json").resolve()
+        mcp_config_path = self._phase_mcp_config(phase)
         if mcp_config_path.exists():
             cmd.extend(["--mcp-config", str(mcp_config_path)])
         
@@ -6720,9 +10277,6 @@ Retry: {phase.retry_count}
             max_turns = int(max_turns * 1.5)
         cmd.extend(["--max-turns", str(max_turns)])
         
-        # Add timeout if supported
-        # cmd.extend(["--timeout", str(self.args.phase_timeout)])
-        
         # Log the final command
         self.logger.info(f"Claude Code command: {' '.join(cmd)}")
         
@@ -6768,6 +10322,11 @@ Retry: {phase.retry_count}
         # Retries
         if phase.retry_count > 0:
             summary_parts.append(f"🔄 Retries: {phase.retry_count}")
+            attempt_costs = ", ".join(
+                f"{a['mode']} ${a.get('cost_usd', 0.0):.4f}" for a in phase.attempts if not a.get("group")
+            )
+            if attempt_costs:
+                summary_parts.append(f"   Attempts: {attempt_costs}")
         
         # Cost (if available)
         phase_cost = self.cost_tracker.phase_costs.get(phase.name, 0.0)
@@ -6784,13 +10343,13 @@ Retry: {phase.retry_count}
         
         self.console.print(summary_panel)
     
-    def _commit_phase_changes(self, phase: Phase):
-        """Commit changes with enhanced information"""
+    def _commit_phase_changes(self, phase: Phase) -> bool:
+        """Commit changes with enhanced information, returning False if the commit failed"""
         try:
             # Check if there are changes to commit
             status_result = subprocess.run(
                 ["git", "status", "--porcelain"],
-                cwd=self.args.output_dir,
+                cwd=self._phase_workdir(phase),
                 check=True,
                 capture_output=True,
                 text=True
@@ -6798,12 +10357,12 @@ Retry: {phase.retry_count}
             
             if not status_result.stdout.strip():
                 self.logger.debug(f"No changes to commit for phase {phase.id}")
-                return
+                return True
             
             # Add all changes
             subprocess.run(
                 ["git", "add", "-A"],
-                cwd=self.args.output_dir,
+                cwd=self._phase_workdir(phase),
                 check=True,
                 capture_output=True
             )
@@ -6845,21 +10404,24 @@ Retry: {phase.retry_count}
             # Commit
             subprocess.run(
                 ["git", "commit", "-m", commit_msg],
-                cwd=self.args.output_dir,
+                cwd=self._phase_workdir(phase),
                 check=True,
                 capture_output=True
             )
             
             self.logger.debug(f"Committed changes for phase {phase.id}")
+            return True
             
         except subprocess.CalledProcessError as e:
             # Check if there were no changes
-            if "nothing to commit" in e.stdout.decode('utf-8', errors='ignore'):
+            if "nothing to commit" in (e.stdout or b"").decode('utf-8', errors='ignore'):
                 self.logger.debug(f"No changes to commit for phase {phase.id}")
-            else:
-                self.logger.warning(f"Failed to commit changes: {e}")
+                return True
+            stderr = (e.stderr or b"").decode('utf-8', errors='ignore').strip()
+            self.logger.warning(f"Failed to commit changes: {e} {stderr}")
         except Exception as e:
             self.logger.warning(f"Failed to commit changes: {e}")
+        return False
     
     async def _store_memory(self, checkpoint_name: str):
         """Store enhanced project memory checkpoint"""
@@ -7070,6 +10632,11 @@ Build ID: {self.memory.build_id if self.memory else 'unknown'}
                 "costs": self.cost_tracker.get_summary(),
                 "cost_breakdown": self.cost_tracker.get_model_breakdown(),
                 "tool_performance": self.tool_manager.get_tool_statistics() if self.tool_manager else None,
+                "research_cache": self._get_research_cache_stats(),
+                "plan_cache": self.plan_cache.get_stats() if self.plan_cache else None,
+                "research_scheduler": self.research_manager.scheduler_stats if self.research_manager else None,
+                "api_rate_limiter": get_api_rate_limiter().get_stats(),
+                "mcp_daemon": self.mcp_daemon.get_stats() if self.mcp_daemon else None,
                 "phase_performance": {
                     phase.id: {
                         "name": phase.name,
@@ -7077,7 +10644,9 @@ Build ID: {self.memory.build_id if self.memory else 'unknown'}
                         "success": phase.success,
                         "files_created": len(phase.files_created),
                         "tool_calls": len(phase.tool_calls),
-                        "retries": phase.retry_count
+                        "retries": phase.retry_count,
+                        "timeout_reason": phase.timeout_reason,
+                        "attempts": phase.attempts
                     }
                     for phase in (self.memory.phases if self.memory else [])
                 }
@@ -7092,6 +10661,12 @@ Build ID: {self.memory.build_id if self.memory else 'unknown'}
         
         self.logger.info("Generated build analytics")
     
+    def _get_research_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """Get research cache statistics if caching is active"""
+        if self.research_manager and self.research_manager.cache:
+            return self.research_manager.cache.get_stats()
+        return None
+    
     def _create_analytics_report(self) -> str:
         """Create human-readable analytics report"""
         report = f"""# Build Analytics Report
@@ -7118,6 +10693,7 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
 - **Total Cost**: ${self.cost_tracker.total_cost:.2f}
 - **Claude Code Execution**: ${self.cost_tracker.claude_code_cost:.2f}
 - **Research Phase**: ${self.cost_tracker.research_cost:.2f}
+- **Batch Requests**: ${self.cost_tracker.batch_cost:.2f}
 - **Analysis & Other**: ${self.cost_tracker.total_cost - self.cost_tracker.claude_code_cost - self.cost_tracker.research_cost:.2f}
 
 ### Cost by Model
@@ -7126,6 +10702,30 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
         for breakdown in self.cost_tracker.get_model_breakdown():
             if "model" in breakdown:
                 report += f"- **{breakdown['model']}**: ${breakdown.get('cost', 0):.2f}\n"
+                if breakdown.get("cache_read_tokens"):
+                    report += (f"  - Prompt cache: {breakdown['cache_read_tokens']:,} read, "
+                               f"{breakdown['cache_write_tokens']:,} written, "
+                               f"${breakdown['cache_savings']:.2f} saved\n")
+        
+        cache_stats = self._get_research_cache_stats()
+        if cache_stats:
+            report += f"""
+### Research Cache
+- **Hits**: {cache_stats['hits']}
+- **Misses**: {cache_stats['misses']}
+- **Hit Rate**: {cache_stats['hit_rate']:.1%}
+- **Evictions**: {cache_stats['evictions']}
+"""
+        
+        limiter_stats = get_api_rate_limiter().get_stats()
+        if limiter_stats["requests"]:
+            report += f"""
+### API Rate Limiting
+- **Requests**: {limiter_stats['requests']}
+- **Retries**: {limiter_stats['retries']} ({limiter_stats['rate_limited']} rate limited)
+- **Average Queue Wait**: {limiter_stats['avg_queue_wait']:.2f}s
+- **Max Queue Wait**: {limiter_stats['max_queue_wait']:.2f}s
+"""
         
         report += """
 ## Code Metrics
@@ -7164,6 +10764,42 @@ Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
             for server, count in sorted(mcp_usage.items(), key=lambda x: x[1], reverse=True):
                 report += f"- **{server}**: {count} calls\n"
         
+        # MCP server warm-up
+        if self.build_stats.mcp_start_times:
+            report += "\n### MCP Server Start Times\n"
+            for server, result in sorted(self.build_stats.mcp_start_times.items()):
+                if result["healthy"]:
+                    report += f"- **{server}**: cold {result['cold_start']:.1f}s, warm {result['warm_start']:.1f}s\n"
+                else:
+                    report += f"- **{server}**: dropped ({result['error']})\n"
+        
+        # MCP server installs
+        if self.build_stats.mcp_install_durations:
+            report += "\n### MCP Server Installs\n"
+            for server, duration in sorted(self.build_stats.mcp_install_durations.items(), key=lambda x: x[1], reverse=True):
+                report += f"- **{server}**: {duration:.1f}s\n"
+        
+        # Retried phases, with each attempt's cost and tokens against the first attempt
+        retried = [p for p in (self.memory.phases if self.memory else []) if p.retry_count > 0 and p.attempts]
+        if retried:
+            report += "\n### Phase Attempts\n"
+            for phase in retried:
+                first = phase.attempts[0]
+                first_tokens = first.get("input_tokens", 0) + first.get("output_tokens", 0)
+                for attempt in phase.attempts:
+                    tokens = attempt.get("input_tokens", 0) + attempt.get("output_tokens", 0)
+                    group = f" {attempt['group']}" if attempt.get("group") else ""
+                    report += (
+                        f"- **{phase.name}** #{attempt['attempt']} {attempt['mode']}{group} ({attempt['outcome']}): "
+                        f"${attempt.get('cost_usd', 0.0):.4f}, {tokens:,} tokens"
+                    )
+                    if attempt is not first:
+                        report += (
+                            f" (Δ ${attempt.get('cost_usd', 0.0) - first.get('cost_usd', 0.0):+.4f}, "
+                            f"{tokens - first_tokens:+,} tokens)"
+                        )
+                    report += "\n"
+        
         return report
     
     async def _create_deployment_guide(self):
@@ -8767,12 +12403,17 @@ Coverage: {stats['testing']['coverage']}""",
         self.logger.info("Performing cleanup...")
         
         try:
+            # Shared MCP servers must not outlive the build
+            await self._stop_mcp_daemon()
+            if self.spec_index:
+                self.spec_index.close()
+            
             # Final memory checkpoint
             if self.memory:
                 await self._store_memory("final")
             
             # Generate final analytics if not already done
-            if not (self.args.output_dir / ".analytics").exists():
+            if not self.args.plan_only and not (self.args.output_dir / ".analytics").exists():
                 await self._generate_build_analytics()
             
             # Log final statistics
@@ -8888,6 +12529,11 @@ Version 2.3.0 Features:
         default=MAX_RETRIES,
         help=f'Maximum retries for failed phases (default: {MAX_RETRIES})'
     )
+    exec_group.add_argument(
+        '--fresh-retries',
+        action='store_true',
+        help='Retry failed phases in a new Claude Code session instead of resuming the failed one'
+    )
     exec_group.add_argument(
         '--continue-on-error',
         action='store_true',
@@ -8906,6 +12552,112 @@ Version 2.3.0 Features:
         action='store_true',
         help='Enable comprehensive AI-powered research phase'
     )
+    enhanced_group.add_argument(
+        '--research-concurrency',
+        type=int,
+        default=RESEARCH_MAX_CONCURRENCY,
+        help=f'Maximum concurrent research agent calls (default: {RESEARCH_MAX_CONCURRENCY})'
+    )
+    enhanced_group.add_argument(
+        '--research-timeout',
+        type=float,
+        default=RESEARCH_AGENT_TIMEOUT,
+        help=f'Timeout per research agent call in seconds (default: {RESEARCH_AGENT_TIMEOUT:.0f})'
+    )
+    enhanced_group.add_argument(
+        '--api-rpm',
+        type=int,
+        default=API_REQUESTS_PER_MINUTE,
+        help=f'Anthropic API requests per minute budget, 0 for unlimited (default: {API_REQUESTS_PER_MINUTE})'
+    )
+    enhanced_group.add_argument(
+        '--api-tpm',
+        type=int,
+        default=API_TOKENS_PER_MINUTE,
+        help=f'Anthropic API input tokens per minute budget, 0 for unlimited (default: {API_TOKENS_PER_MINUTE})'
+    )
+    enhanced_group.add_argument(
+        '--research-coverage-confidence',
+        type=float,
+        default=RESEARCH_COVERAGE_CONFIDENCE,
+        help=f'Combined agent confidence (each agent counts at most {RESEARCH_AGENT_CONFIDENCE_CAP}) at which remaining agents '
+             f'for a query are cancelled, e.g. 0.95; 0 to disable (default: {RESEARCH_COVERAGE_CONFIDENCE})'
+    )
+    enhanced_group.add_argument(
+        '--research-coverage-items',
+        type=int,
+        default=RESEARCH_COVERAGE_ITEMS,
+        help=f'Distinct findings a query needs before it counts as covered (default: {RESEARCH_COVERAGE_ITEMS})'
+    )
+    enhanced_group.add_argument(
+        '--research-hedge-percentile',
+        type=float,
+        default=RESEARCH_HEDGE_PERCENTILE,
+        help=f'Hedge research calls slower than this latency percentile with a cheaper model, e.g. 90; 0 to disable '
+             f'(default: {RESEARCH_HEDGE_PERCENTILE:.0f})'
+    )
+    enhanced_group.add_argument(
+        '--research-hedge-model',
+        default=RESEARCH_HEDGE_MODEL,
+        help=f'Cheaper model used for hedged research calls (default: {RESEARCH_HEDGE_MODEL})'
+    )
+    enhanced_group.add_argument(
+        '--research-dedup-threshold',
+        type=float,
+        default=RESEARCH_DEDUP_THRESHOLD,
+        help=f'Similarity at which research findings are merged as paraphrases, 1.0 for exact only (default: {RESEARCH_DEDUP_THRESHOLD})'
+    )
+    enhanced_group.add_argument(
+        '--no-research-stream',
+        action='store_true',
+        help='Wait for complete research responses instead of streaming them'
+    )
+    enhanced_group.add_argument(
+        '--research-batch',
+        action='store_true',
+        help='Run research and synthesis through the Message Batches API (slower, half price)'
+    )
+    enhanced_group.add_argument(
+        '--research-batch-dir',
+        type=Path,
+        help='Serve research batches from a local directory instead of the API (with --research-batch)'
+    )
+    enhanced_group.add_argument(
+        '--research-batch-poll',
+        type=float,
+        default=RESEARCH_BATCH_POLL_INTERVAL,
+        help=f'Seconds between batch status checks (default: {RESEARCH_BATCH_POLL_INTERVAL:.0f})'
+    )
+    enhanced_group.add_argument(
+        '--research-batch-deadline',
+        type=float,
+        default=RESEARCH_BATCH_DEADLINE,
+        help=f'Seconds to wait for a batch before running its requests directly, 0 to wait for it to end '
+             f'(default: {RESEARCH_BATCH_DEADLINE:.0f})'
+    )
+    enhanced_group.add_argument(
+        '--research-cache-dir',
+        type=Path,
+        default=BUILDER_CACHE_DIR / "research",
+        help='Directory for cached research results (default: ~/.cache/claude-code-builder/research)'
+    )
+    enhanced_group.add_argument(
+        '--research-cache-ttl',
+        type=float,
+        default=RESEARCH_CACHE_TTL_HOURS,
+        help=f'Hours before cached research expires (default: {RESEARCH_CACHE_TTL_HOURS})'
+    )
+    enhanced_group.add_argument(
+        '--research-cache-max-mb',
+        type=float,
+        default=RESEARCH_CACHE_MAX_MB,
+        help=f'Maximum research cache size in MB before LRU eviction (default: {RESEARCH_CACHE_MAX_MB:.0f})'
+    )
+    enhanced_group.add_argument(
+        '--no-research-cache',
+        action='store_true',
+        help='Disable the on-disk research and phase plan caches'
+    )
     enhanced_group.add_argument(
         '--discover-mcp',
         action='store_true',
@@ -8916,6 +12668,44 @@ Version 2.3.0 Features:
         action='store_true',
         help='Automatically install recommended MCP servers'
     )
+    enhanced_group.add_argument(
+        '--mcp-install-concurrency',
+        type=int,
+        default=MCP_INSTALL_CONCURRENCY,
+        help=f'Parallel npm installs for --auto-install-mcp (default: {MCP_INSTALL_CONCURRENCY})'
+    )
+    enhanced_group.add_argument(
+        '--mcp-offline-cache',
+        type=Path,
+        help='Install MCP servers without network from a directory of npm tarballs or an npm cache'
+    )
+    enhanced_group.add_argument(
+        '--mcp-warmup',
+        action='store_true',
+        help='Start each configured MCP server before phase 1 to cache its package and drop unhealthy servers'
+    )
+    enhanced_group.add_argument(
+        '--mcp-warmup-timeout',
+        type=float,
+        default=MCP_WARMUP_TIMEOUT,
+        help=f'Seconds to wait for a cold MCP server start, including download (default: {MCP_WARMUP_TIMEOUT:.0f})'
+    )
+    enhanced_group.add_argument(
+        '--mcp-max-warm-start',
+        type=float,
+        default=MCP_WARMUP_MAX_START,
+        help=f'Drop MCP servers whose warm start takes longer than this many seconds (default: {MCP_WARMUP_MAX_START:.0f})'
+    )
+    enhanced_group.add_argument(
+        '--mcp-daemon',
+        action='store_true',
+        help='Start MCP servers once per build and share them across phases through local proxies'
+    )
+    enhanced_group.add_argument(
+        '--refresh-mcp',
+        action='store_true',
+        help='Ignore the cached MCP inventory and rescan installed servers'
+    )
     enhanced_group.add_argument(
         '--additional-mcp-servers',
         nargs='+',
@@ -8944,8 +12734,43 @@ Version 2.3.0 Features:
     phase_group.add_argument(
         '--phase-timeout',
         type=int,
-        default=600,
-        help='Timeout per phase in seconds (default: 600)'
+        default=PHASE_TIMEOUT,
+        help=f'Wall-clock limit per Claude Code session in seconds, 0 for none (default: {PHASE_TIMEOUT})'
+    )
+    phase_group.add_argument(
+        '--phase-idle-timeout',
+        type=int,
+        default=PHASE_IDLE_TIMEOUT,
+        help=f'Stop a streaming session after this many seconds without output, 0 for none (default: {PHASE_IDLE_TIMEOUT})'
+    )
+    phase_group.add_argument(
+        '--spec-context-tokens',
+        type=int,
+        default=SPEC_CONTEXT_TOKENS,
+        help=f'Token budget for specification sections in prompts after phase 1 (default: {SPEC_CONTEXT_TOKENS})'
+    )
+    phase_group.add_argument(
+        '--max-parallel-phases',
+        type=int,
+        default=MAX_PARALLEL_PHASES,
+        help=f'Run up to this many independent phases at once in git worktrees (default: {MAX_PARALLEL_PHASES})'
+    )
+    phase_group.add_argument(
+        '--parallel-tasks',
+        type=int,
+        default=MAX_PARALLEL_TASK_GROUPS,
+        help=f'Split each phase into up to this many task groups with disjoint files and run them concurrently, '
+             f'followed by an integration session (default: {MAX_PARALLEL_TASK_GROUPS})'
+    )
+    phase_group.add_argument(
+        '--replan',
+        action='store_true',
+        help='Ignore the cached phase plan for an unchanged specification and analyze again'
+    )
+    phase_group.add_argument(
+        '--plan-only',
+        action='store_true',
+        help='Print the phase plan with its critical path and makespan estimate, then exit without building'
     )
     
     # Output formatting
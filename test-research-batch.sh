@@ -0,0 +1,79 @@
+#!/bin/bash
+# Test --research-batch against the file-backed batch client (no API calls)
+
+set -e
+
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+
+echo "Testing research batch mode..."
+
+python3 - "$SCRIPT_DIR/claude-code-builder-researcher.py" <<'EOF'
+import asyncio
+import importlib.util
+import json
+import re
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+spec = importlib.util.spec_from_file_location("builder", sys.argv[1])
+builder = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(builder)
+
+ANSWER = {"summary": "ok", "key_insights": ["use a connection pool"], "recommendations": ["pin versions"],
+          "best_practices": ["write tests"], "confidence_level": "High"}
+
+
+def respond(params):
+    """Answer every query id in the prompt, or the single query"""
+    prompt = params["messages"][0]["content"]
+    query_ids = re.findall(r"^QUERY ID: (\S+)", prompt, re.M)
+    return json.dumps({query_id: ANSWER for query_id in query_ids} if query_ids else ANSWER)
+
+
+class DirectMessages:
+    """Answers direct calls made after a batch misses its deadline"""
+
+    def __init__(self):
+        self.calls = 0
+
+    async def create(self, **params):
+        self.calls += 1
+        return SimpleNamespace(content=[SimpleNamespace(type="text", text=respond(params))], usage=None)
+
+
+context = {"project_type": "web", "technology_stack": ["python"], "requirements": ["database"],
+           "complexity": "medium", "specification": "# App\nA python web service with a database.\n"}
+spec_text = context["specification"]
+
+with tempfile.TemporaryDirectory() as batch_dir:
+    # 1. Every research and synthesis request is served from the batch
+    client = builder.FileBatchClient(Path(batch_dir), responder=respond, poll_interval=0.01)
+    manager = builder.ResearchManager(batch_client=client, stream_responses=False)
+    results = asyncio.run(manager.conduct_comprehensive_research(spec_text, dict(context)))
+    assert "error" not in results, results
+    assert any(isinstance(value, dict) and value.get("recommendations") for value in results.values()), results
+    print("✓ batch results feed synthesis")
+
+    # 2. A batch that never ends is given up at the deadline
+    client = builder.FileBatchClient(Path(batch_dir), poll_interval=0.05, deadline=0.2)
+    manager = builder.ResearchManager(batch_client=client, stream_responses=False)
+    started = time.monotonic()
+    entries = asyncio.run(manager._execute_batch([{"custom_id": "r000_test", "params": {}}]))
+    assert time.monotonic() - started < 5, "deadline was not enforced"
+    assert entries == {"r000_test": {"error": "batch deadline exceeded", "expired": True}}, entries
+    print("✓ unfinished batch stops at the deadline")
+
+    # 3. With an API client, expired requests run as direct calls instead
+    messages = DirectMessages()
+    manager = builder.ResearchManager(SimpleNamespace(messages=messages), batch_client=client,
+                                      stream_responses=False)
+    results = asyncio.run(manager.conduct_comprehensive_research(spec_text, dict(context)))
+    assert messages.calls > 0, "no direct fallback calls were made"
+    assert any(isinstance(value, dict) and value.get("recommendations") for value in results.values()), results
+    print(f"✓ expired batch requests fell back to {messages.calls} direct calls")
+EOF
+
+echo "Research batch tests passed"